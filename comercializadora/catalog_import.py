@@ -0,0 +1,225 @@
+"""
+Importación del catálogo minorista desde CSV o XLSX.
+
+El archivo se lee en streaming y se procesa en bloques de CHUNK_SIZE filas:
+cada bloque se valida completo y se guarda con dos upserts
+(bulk_create(update_conflicts=True)), uno sobre (tenant, sku) para
+CommercialProduct y otro sobre (commercial_product, warehouse, tenant) para
+CommercialInventory. Las filas con errores no se guardan y se devuelven en el
+reporte con su número de línea.
+
+Columnas reconocidas (la primera fila es el encabezado):
+    sku (obligatoria), barcode, name, description, category, subcategory,
+    brand, variants (JSON), cost_price, sale_price, discount_price, weight,
+    dimensions, is_active, warehouse (id o nombre), quantity,
+    min_stock_level, max_stock_level
+
+Sólo se actualizan las columnas presentes. Sin `name` el archivo es sólo de
+stock y los SKU tienen que existir. Sin `warehouse` sólo se carga el catálogo.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.bulk import notify_bulk_created
+from core.models import Warehouse
+from .models import CommercialProduct, CommercialInventory
+
+CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+
+PRODUCT_FIELDS = (
+    'barcode', 'name', 'description', 'category', 'subcategory', 'brand', 'variants',
+    'cost_price', 'sale_price', 'discount_price', 'weight', 'dimensions', 'is_active',
+)
+INVENTORY_FIELDS = ('quantity', 'min_stock_level', 'max_stock_level')
+TRUE_VALUES = {'1', 'true', 'si', 'sí', 'yes', 'x'}
+
+
+class ImportFileError(Exception):
+    """El archivo no se puede leer o le falta el encabezado obligatorio."""
+
+
+def _decoded_lines(file):
+    # Como bank_ingestion._decode: UTF-8 o, si no, Windows-1252 (Excel en
+    # castellano). Se decide por línea para no cortar el streaming.
+    for number, line in enumerate(file):
+        if number == 0 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError:
+            yield line.decode('cp1252', errors='replace')
+
+
+def _csv_rows(file):
+    try:
+        yield from csv.reader(_decoded_lines(file))
+    except csv.Error as exc:
+        raise ImportFileError(f'No se pudo leer el CSV: {exc}')
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Excel guarda los enteros como float
+    return str(value)
+
+
+def _xlsx_rows(file):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportFileError('La importación de XLSX requiere openpyxl.')
+    try:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as exc:  # openpyxl levanta BadZipFile, InvalidFileException, KeyError... según el archivo
+        raise ImportFileError(f'No se pudo abrir el XLSX: {exc}')
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield [_cell_text(value) for value in row]
+    except Exception as exc:
+        raise ImportFileError(f'No se pudo leer el XLSX: {exc}')
+    finally:
+        workbook.close()
+
+
+def read_rows(file, filename):
+    """(número de línea, {columna: valor}) por cada fila de datos del archivo."""
+    rows = _xlsx_rows(file) if filename.lower().endswith('.xlsx') else _csv_rows(file)
+    try:
+        header = [column.strip().lower() for column in next(rows)]
+    except StopIteration:
+        raise ImportFileError('El archivo está vacío.')
+    if 'sku' not in header:
+        raise ImportFileError('Falta la columna obligatoria "sku".')
+    for line, values in enumerate(rows, start=2):
+        if any(value.strip() for value in values):
+            yield line, dict(zip(header, (value.strip() for value in values)))
+
+
+def _clean(model, name, value):
+    field = model._meta.get_field(name)
+    if value == '':
+        value = field.get_default() if not field.null else None
+    elif name == 'variants':
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValidationError('JSON inválido.')
+    elif name == 'is_active':
+        value = value.lower() in TRUE_VALUES
+    return field.clean(value, None)
+
+
+def _error_messages(exc):
+    return exc.messages if hasattr(exc, 'messages') else [str(exc)]
+
+
+class CatalogImport:
+    """Importa un archivo para `tenant`; run() devuelve el reporte."""
+
+    def __init__(self, tenant, chunk_size=CHUNK_SIZE):
+        self.tenant = tenant
+        self.chunk_size = chunk_size
+        self.warehouses = {}
+        for pk, name in Warehouse.objects.filter(tenant=tenant).values_list('id', 'name'):
+            self.warehouses[str(pk)] = pk
+            self.warehouses.setdefault(name.lower(), pk)
+        self.report = {'rows': 0, 'products': 0, 'inventory': 0, 'error_count': 0, 'errors': []}
+
+    def add_error(self, line, sku, errors):
+        self.report['error_count'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'line': line, 'sku': sku, 'errors': errors})
+
+    def run(self, file, filename):
+        rows = read_rows(file, filename)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return self.report
+            self.report['rows'] += len(chunk)
+            self.import_chunk(chunk)
+
+    def validate(self, line, row):
+        """(sku, campos de producto, campos de stock, errores) de una fila."""
+        errors = {}
+        sku = row.get('sku', '')
+        if not sku:
+            errors['sku'] = ['Obligatorio.']
+        product, stock = {}, {}
+        for name in PRODUCT_FIELDS:
+            if name in row:
+                try:
+                    product[name] = _clean(CommercialProduct, name, row[name])
+                except ValidationError as exc:
+                    errors[name] = _error_messages(exc)
+        if 'warehouse' in row:
+            stock['warehouse_id'] = self.warehouses.get(row['warehouse'].lower())
+            if stock['warehouse_id'] is None:
+                errors['warehouse'] = ['Almacén inexistente.']
+            for name in INVENTORY_FIELDS:
+                if name in row:
+                    try:
+                        stock[name] = _clean(CommercialInventory, name, row[name])
+                    except ValidationError as exc:
+                        errors[name] = _error_messages(exc)
+        return sku, product, stock, errors
+
+    def import_chunk(self, chunk):
+        # Si un SKU (o un SKU en un almacén) se repite en el bloque, gana la última fila.
+        products, stocks, lines = {}, {}, {}
+        for line, row in chunk:
+            sku, product, stock, errors = self.validate(line, row)
+            if errors:
+                self.add_error(line, sku, errors)
+                continue
+            lines[sku] = line
+            products[sku] = product
+            if stock:
+                stocks[sku, stock['warehouse_id']] = stock
+        if not products:
+            return
+
+        # sku es único en toda la base: no se pisan productos de otro tenant.
+        foreign = set(
+            CommercialProduct.objects.filter(sku__in=products).exclude(tenant=self.tenant).values_list('sku', flat=True)
+        )
+        for sku in foreign:
+            self.add_error(lines[sku], sku, {'sku': ['El SKU pertenece a otra empresa.']})
+            del products[sku]
+        product_fields = sorted({name for product in products.values() for name in product})
+
+        with transaction.atomic():
+            if 'name' in product_fields:
+                objs = [CommercialProduct(tenant=self.tenant, sku=sku, **product) for sku, product in products.items()]
+                CommercialProduct.objects.bulk_create(
+                    objs, update_conflicts=True, unique_fields=['tenant', 'sku'], update_fields=product_fields
+                )
+                notify_bulk_created(CommercialProduct, objs)
+                self.report['products'] += len(objs)
+
+            ids = dict(CommercialProduct.objects.filter(tenant=self.tenant, sku__in=products).values_list('sku', 'id'))
+            for sku in products.keys() - ids.keys():
+                self.add_error(lines[sku], sku, {'sku': ['Producto inexistente; incluir la columna "name" para crearlo.']})
+            inventory = [
+                CommercialInventory(tenant=self.tenant, commercial_product_id=ids[sku], **stock)
+                for (sku, _), stock in stocks.items() if sku in ids
+            ]
+            if inventory:
+                stock_fields = sorted({name for stock in stocks.values() for name in stock} - {'warehouse_id'})
+                if stock_fields:
+                    CommercialInventory.objects.bulk_create(
+                        inventory, update_conflicts=True,
+                        unique_fields=['commercial_product', 'warehouse', 'tenant'], update_fields=stock_fields
+                    )
+                else:
+                    CommercialInventory.objects.bulk_create(inventory, ignore_conflicts=True)
+                notify_bulk_created(CommercialInventory, inventory)
+                self.report['inventory'] += len(inventory)
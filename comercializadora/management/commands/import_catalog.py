@@ -0,0 +1,41 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Tenant
+from comercializadora.catalog_import import CHUNK_SIZE, CatalogImport, ImportFileError
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa productos y stock del catálogo minorista desde un CSV o XLSX "
+        "(ver comercializadora.catalog_import)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--tenant', type=int, required=True)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--errors', help="Guarda el reporte de errores (JSON) en este archivo.")
+
+    def handle(self, *args, **options):
+        try:
+            tenant = Tenant.objects.get(pk=options['tenant'])
+        except Tenant.DoesNotExist:
+            raise CommandError(f"No existe el tenant {options['tenant']}.")
+
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as file:
+                report = CatalogImport(tenant, options['chunk_size']).run(file, options['path'])
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(str(exc))
+
+        if options['errors']:
+            with open(options['errors'], 'w', encoding='utf-8') as file:
+                json.dump(report['errors'], file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} filas en {time.perf_counter() - started:.1f} s: {report['products']} productos, "
+            f"{report['inventory']} registros de stock, {report['error_count']} filas con errores."
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercializadora', '0001_initial'),
+        ('core', '0070_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commercialproduct',
+            index=models.Index(fields=['tenant', 'id'], name='com_prod_tenant_id_idx'),
+        ),
+    ]
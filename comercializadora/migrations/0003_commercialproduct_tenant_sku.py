@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comercializadora', '0002_commercialproduct_tenant_id_index'),
+        ('core', '0073_data_versions'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='commercialproduct',
+            constraint=models.UniqueConstraint(fields=('tenant', 'sku'), name='com_prod_tenant_sku_uniq'),
+        ),
+    ]
@@ -24,6 +24,15 @@ class CommercialProduct(TenantAwareModel):
     main_image = models.ImageField(upload_to='commercial_products/', blank=True, null=True)
     is_active = models.BooleanField(default=True, db_index=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'id'], name='com_prod_tenant_id_idx'),
+        ]
+        # Destino del upsert de la importación de catálogo (ver catalog_import).
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'sku'], name='com_prod_tenant_sku_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.sku})"
 
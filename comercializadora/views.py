@@ -1,10 +1,15 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from core.exports import ExportMixin
 from core.views import TenantAwareViewSet
 from .models import (
     CommercialProduct, CommercialProductImage, CommercialInventory, ProductReservation,
     Promotion, LoyaltyCard, EcommerceSale, CommercialSale, InternalDeliveryNote,
     CommercialEmployee
 )
+from .catalog_import import CatalogImport, ImportFileError
 from .serializers import (
     CommercialProductSerializer, CommercialProductImageSerializer, CommercialInventorySerializer,
     ProductReservationSerializer, PromotionSerializer, LoyaltyCardSerializer,
@@ -16,13 +21,33 @@ class CommercialProductViewSet(TenantAwareViewSet):
     queryset = CommercialProduct.objects.all()
     serializer_class = CommercialProductSerializer
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_catalog(self, request, *args, **kwargs):
+        """
+        Carga o actualiza productos y stock desde el archivo `file` (CSV o
+        XLSX, ver catalog_import). Devuelve el reporte con los errores por línea.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Se requiere el archivo en el campo "file".'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            report = CatalogImport(self.get_tenant()).run(upload, upload.name)
+        except ImportFileError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
 class CommercialProductImageViewSet(TenantAwareViewSet):
     queryset = CommercialProductImage.objects.all()
     serializer_class = CommercialProductImageSerializer
 
-class CommercialInventoryViewSet(TenantAwareViewSet):
+class CommercialInventoryViewSet(ExportMixin, TenantAwareViewSet):
     queryset = CommercialInventory.objects.all()
     serializer_class = CommercialInventorySerializer
+    export_fields = {
+        'id': 'id', 'commercial_product_id': 'commercial_product_id', 'sku': 'commercial_product__sku',
+        'product_name': 'commercial_product__name', 'warehouse_id': 'warehouse_id', 'warehouse_name': 'warehouse__name',
+        'quantity': 'quantity', 'min_stock_level': 'min_stock_level', 'max_stock_level': 'max_stock_level',
+    }
 
 class ProductReservationViewSet(TenantAwareViewSet):
     queryset = ProductReservation.objects.all()
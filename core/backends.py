@@ -1,5 +1,6 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from .middleware import get_cached_tenant
 
 class TenantAwareModelBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, tenant_id=None, **kwargs):
@@ -8,12 +9,13 @@ class TenantAwareModelBackend(ModelBackend):
             username = kwargs.get(UserModel.USERNAME_FIELD)
 
         if tenant_id is None and request:
-            # Try to get tenant_id from request headers (e.g., X-Tenant-ID)
-            tenant_id = request.META.get('HTTP_X_TENANT_ID')
-            if not tenant_id:
+            # TenantMiddleware already resolved and validated X-Tenant-ID
+            tenant = getattr(request, 'tenant', None) or get_cached_tenant(request.META.get('HTTP_X_TENANT_ID'))
+            if tenant is None:
                 # Alternatively, infer from hostname/subdomain if applicable
                 # For now, we'll stick to explicit header for clarity
-                return None # Tenant ID not provided in header
+                return None # Tenant ID not provided in header (or unknown tenant)
+            tenant_id = tenant.id
 
         if tenant_id is None:
             return None # Tenant ID is required for authentication
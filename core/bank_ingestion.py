@@ -0,0 +1,283 @@
+"""
+Lectura de extractos bancarios (BankStatement.file) a filas de BankTransaction.
+
+La API sólo guarda el archivo, deja el extracto 'Pendiente' y encola la
+tarea 'bank_statements.ingest' (core.tasks); `manage.py ingest_bank_statements`
+procesa los pendientes que hayan quedado sin trabajo. En el extracto quedan
+el estado y el avance para que el frontend lo consulte.
+
+Formatos:
+    CSV  encabezado con fecha, descripción/concepto y monto/importe (o
+         débito y crédito). Fechas DD/MM/AAAA o AAAA-MM-DD; montos con coma
+         o punto decimal.
+    OFX  bloques <STMTTRN> (DTPOSTED, TRNAMT, NAME/MEMO), SGML o XML.
+    PDF  texto de cada página (requiere pypdf). Se toman las líneas que
+         empiezan con una fecha y terminan en uno o dos montos; si hay dos,
+         el último es el saldo y se descarta.
+
+Cada línea lleva una huella de (banco, fecha, importe, descripción,
+repetición) y se inserta con bulk_create(ignore_conflicts=True) sobre la
+restricción única (tenant, dedup_key): volver a cargar el mismo extracto, o
+uno que se superpone con otro, no duplica movimientos.
+"""
+import csv
+import datetime
+import hashlib
+import io
+import os
+import re
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import versions
+from .bulk import notify_bulk_created
+from .models import BankStatement, BankTransaction
+
+BATCH_SIZE = 500
+
+DATE_COLUMNS = ('fecha', 'date', 'fecha operacion', 'fecha operación', 'fecha valor')
+DESCRIPTION_COLUMNS = ('descripcion', 'descripción', 'description', 'concepto', 'detalle', 'memo')
+AMOUNT_COLUMNS = ('monto', 'importe', 'amount')
+DEBIT_COLUMNS = ('debito', 'débito', 'debe', 'debit')
+CREDIT_COLUMNS = ('credito', 'crédito', 'haber', 'credit')
+
+AMOUNT = r'-?\$?\s?-?\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{1,2})?-?|-?\d+(?:[.,]\d{1,2})?-?'
+PDF_LINE = re.compile(
+    rf'^(?P<date>\d{{1,2}}[/-]\d{{1,2}}[/-]\d{{2,4}})\s+(?P<description>.+?)\s+'
+    rf'(?P<amount>{AMOUNT})(?:\s+(?P<balance>{AMOUNT}))?$'
+)
+OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|</BANKTRANLIST>)', re.S | re.I)
+
+
+class StatementParseError(Exception):
+    """El archivo no tiene un formato de extracto reconocible."""
+
+
+def parse_amount(text):
+    """'1.234,56', '1,234.56', '-50', '50-', '$ 12,5' -> Decimal."""
+    value = text.strip().replace('$', '').replace(' ', '')
+    negative = value.startswith('-') or value.endswith('-') or (value.startswith('(') and value.endswith(')'))
+    value = value.strip('-()')
+    if ',' in value and '.' in value:
+        decimal_mark = ',' if value.rfind(',') > value.rfind('.') else '.'
+    elif ',' in value:
+        decimal_mark = ',' if re.search(r',\d{1,2}$', value) else None
+    else:
+        decimal_mark = '.' if re.search(r'\.\d{1,2}$', value) else None
+    thousands = {',', '.'} - {decimal_mark}
+    for mark in thousands:
+        value = value.replace(mark, '')
+    if decimal_mark:
+        value = value.replace(decimal_mark, '.')
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f'Monto no reconocido: {text!r}')
+    return -amount if negative else amount
+
+
+def parse_date(text):
+    text = text.strip()
+    for fmt in ('%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d', '%d-%m-%Y', '%d-%m-%y', '%Y%m%d'):
+        try:
+            return datetime.datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Fecha no reconocida: {text!r}')
+
+
+def _decode(content):
+    # Los bancos exportan en UTF-8 o en Windows-1252.
+    try:
+        return content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return content.decode('cp1252', errors='replace')
+
+
+def _column(header, names):
+    return next((index for index, column in enumerate(header) if column in names), None)
+
+
+def _csv_rows(reader):
+    # csv.Error (comillas sin cerrar, campos enormes) es un archivo mal formado, no una falla para reintentar.
+    try:
+        yield from reader
+    except csv.Error as exc:
+        raise StatementParseError(f'No se pudo leer el CSV: {exc}')
+
+
+def parse_csv(content):
+    text = _decode(content)
+    # La muestra termina en una línea completa: una cortada por la mitad confunde al Sniffer.
+    sample = text[:4096] if len(text) <= 4096 else text[:4096].rpartition('\n')[0] or text[:4096]
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t') if text.strip() else csv.excel
+    except csv.Error:
+        raise StatementParseError('No se pudo reconocer el separador del CSV (coma, punto y coma o tabulación).')
+    rows = _csv_rows(csv.reader(io.StringIO(text), dialect))
+    header = [column.strip().lower() for column in next(rows, [])]
+    date_col, description_col = _column(header, DATE_COLUMNS), _column(header, DESCRIPTION_COLUMNS)
+    amount_col = _column(header, AMOUNT_COLUMNS)
+    debit_col, credit_col = _column(header, DEBIT_COLUMNS), _column(header, CREDIT_COLUMNS)
+    if date_col is None or description_col is None or (amount_col is None and credit_col is None and debit_col is None):
+        raise StatementParseError('El CSV necesita columnas de fecha, descripción y monto (o débito/crédito).')
+
+    def cell(row, index):
+        return row[index].strip() if index is not None and index < len(row) else ''
+
+    for row in rows:
+        if not any(value.strip() for value in row):
+            continue
+        if amount_col is not None:
+            amount = parse_amount(cell(row, amount_col))
+        else:
+            credit, debit = cell(row, credit_col), cell(row, debit_col)
+            amount = (parse_amount(credit) if credit else Decimal('0')) - (abs(parse_amount(debit)) if debit else Decimal('0'))
+        yield parse_date(cell(row, date_col)), cell(row, description_col), amount
+
+
+def parse_ofx(content):
+    text = _decode(content)
+    blocks = OFX_TRANSACTION.findall(text)
+    if not blocks:
+        raise StatementParseError('El archivo OFX no tiene movimientos (<STMTTRN>).')
+
+    def tag(block, name):
+        match = re.search(rf'<{name}>([^<\r\n]*)', block, re.I)
+        return match.group(1).strip() if match else ''
+
+    for block in blocks:
+        description = ' '.join(part for part in (tag(block, 'NAME'), tag(block, 'MEMO')) if part)
+        yield parse_date(tag(block, 'DTPOSTED')[:8]), description, Decimal(tag(block, 'TRNAMT').replace(',', '.'))
+
+
+def parse_statement_text(text):
+    """Líneas de movimientos del texto de un extracto en PDF."""
+    for line in text.splitlines():
+        match = PDF_LINE.match(' '.join(line.split()))
+        if not match:
+            continue
+        try:
+            yield parse_date(match['date']), match['description'], parse_amount(match['amount'])
+        except ValueError:
+            continue
+
+
+def parse_pdf(content, on_page=None):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise StatementParseError('La lectura de extractos en PDF requiere pypdf.')
+    try:
+        reader = PdfReader(io.BytesIO(content))
+        pages = reader.pages
+        lines = []
+        for number, page in enumerate(pages, start=1):
+            lines.extend(parse_statement_text(page.extract_text() or ''))
+            if on_page:
+                on_page(number, len(pages))
+    except StatementParseError:
+        raise
+    except Exception as exc:  # pypdf levanta distintos errores según cómo esté roto el archivo
+        raise StatementParseError(f'No se pudo leer el PDF: {exc}')
+    return lines
+
+
+def parse_statement(name, content, on_page=None):
+    extension = os.path.splitext(name)[1].lower()
+    if extension == '.pdf' or content.startswith(b'%PDF'):
+        return parse_pdf(content, on_page)
+    if extension in ('.ofx', '.qfx') or b'<OFX>' in content[:2048].upper():
+        return list(parse_ofx(content))
+    if extension in ('.csv', '.txt'):
+        return list(parse_csv(content))
+    raise StatementParseError(f'Formato de extracto no soportado: {extension or name}.')
+
+
+def dedup_key(bank_id, date, amount, description, occurrence):
+    normalized = ' '.join(description.lower().split())
+    payload = f'{bank_id}|{date.isoformat()}|{amount:.2f}|{normalized}|{occurrence}'
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _set_progress(statement, **fields):
+    # update() no dispara señales: se cambia la versión para que los GET condicionales vean el avance.
+    BankStatement.objects.filter(pk=statement.pk).update(**fields)
+    versions.bump(statement.tenant_id, BankStatement)
+    for name, value in fields.items():
+        setattr(statement, name, value)
+
+
+def claim(statement_id, reclaim=False):
+    """
+    Marca el extracto como 'Procesando' si seguía pendiente; None si otro
+    proceso lo tomó. Con `reclaim` también toma uno que quedó 'Procesando'
+    porque el worker anterior murió a mitad de camino.
+    """
+    statuses = ('Pendiente', 'Procesando') if reclaim else ('Pendiente',)
+    # UPDATE condicional: si otro proceso lo tomó antes, no afecta filas.
+    if not BankStatement.objects.filter(pk=statement_id, status__in=statuses).update(status='Procesando', progress=0):
+        return None
+    statement = BankStatement.objects.get(pk=statement_id)
+    versions.bump(statement.tenant_id, BankStatement)
+    return statement
+
+
+def claim_next(tenant_id=None):
+    """Toma el extracto pendiente más viejo (o None)."""
+    pending = BankStatement.objects.filter(status='Pendiente')
+    if tenant_id:
+        pending = pending.filter(tenant_id=tenant_id)
+    for pk in pending.order_by('id').values_list('pk', flat=True)[:10]:
+        statement = claim(pk)
+        if statement is not None:
+            return statement
+    return None
+
+
+def ingest(statement):
+    """Lee el archivo de `statement` y carga sus movimientos; deja el resultado en el extracto."""
+    try:
+        with statement.file.open('rb') as file:
+            content = file.read()
+        lines = parse_statement(
+            statement.file.name, content,
+            on_page=lambda page, pages: _set_progress(statement, progress=int(50 * page / pages)),
+        )
+    except (OSError, ValueError, StatementParseError) as exc:
+        _set_progress(statement, status='Error', error_message=str(exc), processed_at=timezone.now())
+        return statement
+    _set_progress(statement, progress=50, lines_found=len(lines))
+
+    occurrences = Counter()
+    rows = []
+    for date, description, amount in lines:
+        description = description[:255]
+        occurrence_key = (date, amount, ' '.join(description.lower().split()))
+        occurrences[occurrence_key] += 1
+        rows.append(BankTransaction(
+            tenant_id=statement.tenant_id, bank_statement=statement, date=date, description=description,
+            amount=amount, dedup_key=dedup_key(statement.bank_id, date, amount, description, occurrences[occurrence_key]),
+        ))
+
+    imported = 0
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        with transaction.atomic():
+            existing = set(BankTransaction.objects.filter(
+                tenant_id=statement.tenant_id, dedup_key__in=[row.dedup_key for row in batch]
+            ).values_list('dedup_key', flat=True))
+            new = [row for row in batch if row.dedup_key not in existing]
+            BankTransaction.objects.bulk_create(new, ignore_conflicts=True)
+            notify_bulk_created(BankTransaction, new)
+        imported += len(new)
+        _set_progress(statement, progress=50 + int(50 * (start + len(batch)) / len(rows)), lines_imported=imported)
+
+    _set_progress(
+        statement, status='Procesado', progress=100, lines_imported=imported, error_message='',
+        processed_at=timezone.now(),
+    )
+    return statement
@@ -0,0 +1,119 @@
+"""
+Altas masivas para las escrituras anidadas (ventas, presupuestos, remitos,
+órdenes de compra y órdenes de producción).
+
+bulk_create_items() inserta los ítems de un documento en un INSERT por lote.
+Como bulk_create no dispara post_save, aplica de una vez por modelo y tenant
+lo que las señales de core.signals harían fila por fila: resúmenes diarios,
+proyecciones, cache de respuestas y versiones de datos.
+
+BulkCreateMixin agrega POST .../bulk/ a un TenantAwareViewSet: recibe una
+lista de documentos, valida todos antes de escribir y los crea en una sola
+transacción. Las respuestas de create y bulk informan en el header
+X-DB-Statements cuántas sentencias SQL ejecutó la escritura.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from . import forecasting, response_cache, rollups, versions
+
+BATCH_SIZE = 500
+BULK_MAX_DOCUMENTS = 200
+STATEMENTS_HEADER = 'X-DB-Statements'
+
+
+@contextmanager
+def count_statements(using=DEFAULT_DB_ALIAS):
+    """Cuenta las sentencias que se ejecutan en la conexión dentro del bloque."""
+    counter = {'statements': 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter['statements'] += 1
+        return execute(sql, params, many, context)
+
+    with connections[using].execute_wrapper(wrapper):
+        yield counter
+
+
+def notify_bulk_created(model, instances):
+    """Lo que harían las señales post_save para `instances`, agrupado."""
+    if not instances:
+        return
+    if model in rollups.SOURCES:
+        rollups.record_bulk_create(model, instances)
+    for tenant_id in {instance.tenant_id for instance in instances}:
+        for metric in forecasting.metrics_for(model):
+            forecasting.invalidate(tenant_id, metric)
+        for scope in response_cache.scopes_for(model):
+            response_cache.invalidate(tenant_id, scope)
+        if versions.is_tracked(model):
+            versions.bump(tenant_id, model)
+
+
+def bulk_create_items(model, objs):
+    """Inserta `objs` (ya construidos y validados) con bulk_create."""
+    created = model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    notify_bulk_created(model, created)
+    return created
+
+
+class BulkCreateMixin:
+    """
+    Para TenantAwareViewSet. Cada documento pasa por get_bulk_serializer() y
+    perform_create(), igual que en un POST individual.
+    """
+    bulk_max_documents = BULK_MAX_DOCUMENTS
+
+    def get_bulk_serializer(self, data):
+        return self.get_serializer(data=data)
+
+    def counted_perform_create(self, serializer):
+        # Envuelve el perform_create del viewset (todos lo redefinen); sólo
+        # se cuentan las escrituras, no la validación ni la respuesta.
+        with count_statements() as counter:
+            self.perform_create(serializer)
+        self.write_statements += counter['statements']
+
+    def create(self, request, *args, **kwargs):
+        self.write_statements = 0
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.counted_perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        headers[STATEMENTS_HEADER] = str(self.write_statements)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        documents = request.data
+        if not isinstance(documents, list) or not documents:
+            return Response({'error': 'Se espera una lista de documentos.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(documents) > self.bulk_max_documents:
+            return Response(
+                {'error': f'Se admiten hasta {self.bulk_max_documents} documentos por solicitud.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        bulk_serializers = []
+        errors = {}
+        for index, document in enumerate(documents):
+            serializer = self.get_bulk_serializer(document)
+            if not serializer.is_valid():
+                errors[index] = serializer.errors
+            bulk_serializers.append(serializer)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        self.write_statements = 0
+        with transaction.atomic():
+            for index, serializer in enumerate(bulk_serializers):
+                try:
+                    self.counted_perform_create(serializer)
+                except serializers.ValidationError as exc:
+                    raise serializers.ValidationError({'errors': {index: exc.detail}})
+        data = [serializer.data for serializer in bulk_serializers]
+        return Response(data, status=status.HTTP_201_CREATED, headers={STATEMENTS_HEADER: str(self.write_statements)})
@@ -0,0 +1,172 @@
+"""
+Propagación de los costos de los lotes (MateriaPrimaProveedor.cost) a las
+recetas y al catálogo:
+
+    RawMaterial -> DesignMaterial.cost -> Design.calculated_cost -> Product
+
+El costo unitario vigente de una materia prima es el mayor entre sus lotes
+(el mismo criterio que RawMaterialViewSet.highest_cost_value y el armado de
+plantillas en el frontend).
+
+Las señales de MateriaPrimaProveedor anotan cada cambio con cost_changed();
+al confirmarse la transacción propagate_changes() resuelve todo el lote
+junto: una consulta arma el índice materia prima -> líneas de receta, un
+UPDATE corrige las líneas desactualizadas, design_costs.recalculate()
+recalcula sólo los diseños tocados, y se guarda un CostHistory por lote
+con los productos que quedaron con algún precio por debajo del costo.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Max, Q, Value, When
+
+from . import deferred, design_costs, response_cache, versions
+from .bulk import notify_bulk_created
+from .models import CostHistory, DesignMaterial, MateriaPrimaProveedor, Product
+
+BATCH_NAME = 'cost_propagation'
+SNAPSHOT_ATTR = '_loaded_cost'
+PRICE_FIELDS = ('factory_price', 'club_price', 'suggested_final_price')
+
+
+def cost_changed(lot, previous_cost, deleted=False, using=None):
+    """Anota el cambio de costo de `lot`; se propaga al confirmar la transacción."""
+    change = (lot.tenant_id, lot.raw_material_id, None if deleted else lot.pk, previous_cost, lot.cost)
+    deferred.add(BATCH_NAME, propagate_changes, change, using)
+
+
+def flush(using=None):
+    deferred.flush(BATCH_NAME, using)
+
+
+def dependencies(tenant_id, raw_material_ids):
+    """Índice materia prima -> [(id, design_id, cost)] de las líneas de receta que la usan."""
+    index = defaultdict(list)
+    lines = DesignMaterial.objects.filter(tenant_id=tenant_id, raw_material_id__in=raw_material_ids)
+    for line_id, raw_material_id, design_id, cost in lines.values_list('id', 'raw_material_id', 'design_id', 'cost'):
+        index[raw_material_id].append((line_id, design_id, cost))
+    return index
+
+
+def material_costs(tenant_id, raw_material_ids):
+    """Costo vigente (el mayor entre lotes) de cada materia prima que tiene lotes."""
+    return dict(
+        MateriaPrimaProveedor.objects.filter(tenant_id=tenant_id, raw_material_id__in=raw_material_ids)
+        .values('raw_material').annotate(cost=Max('cost')).values_list('raw_material', 'cost')
+    )
+
+
+def propagate(tenant_id, raw_material_ids):
+    """
+    Lleva el costo vigente de `raw_material_ids` a las recetas y recalcula los
+    diseños afectados. Devuelve, por materia prima, los diseños que la usan y
+    los que se actualizaron, cuántos diseños cambiaron de costo y los productos
+    afectados que quedaron por debajo del costo.
+    """
+    raw_material_ids = set(raw_material_ids)
+    costs = material_costs(tenant_id, raw_material_ids)
+    index = dependencies(tenant_id, raw_material_ids)
+
+    stale = defaultdict(list)
+    designs_by_material = {}
+    for raw_material_id, lines in index.items():
+        designs_by_material[raw_material_id] = {design_id for _, design_id, _ in lines}
+        cost = costs.get(raw_material_id)
+        if cost is None:
+            # Sin lotes no hay costo de referencia: la receta queda como está.
+            continue
+        stale[raw_material_id] = [(line_id, design_id) for line_id, design_id, line_cost in lines if line_cost != cost]
+
+    _update_lines(tenant_id, stale, costs)
+    updated = {raw_material_id: {design_id for _, design_id in lines} for raw_material_id, lines in stale.items()}
+    changed = design_costs.recalculate(set().union(*updated.values()))
+
+    affected = set().union(*designs_by_material.values())
+    return {
+        'costs': costs,
+        'designs': designs_by_material,
+        'updated': updated,
+        'designs_changed': changed,
+        'below_cost': below_cost_report(tenant_id, design_ids=affected),
+    }
+
+
+def _update_lines(tenant_id, stale, costs):
+    lines = [(raw_material_id, line_id) for raw_material_id, rows in stale.items() for line_id, _ in rows]
+    if not lines:
+        return
+    for start in range(0, len(lines), design_costs.BATCH_SIZE):
+        chunk = lines[start:start + design_costs.BATCH_SIZE]
+        materials = {raw_material_id for raw_material_id, _ in chunk}
+        DesignMaterial.objects.filter(pk__in=[line_id for _, line_id in chunk]).update(cost=Case(
+            *[When(raw_material_id=raw_material_id, then=Value(costs[raw_material_id])) for raw_material_id in materials],
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ))
+    # update() no dispara señales.
+    versions.bump(tenant_id, DesignMaterial)
+    for scope in response_cache.scopes_for(DesignMaterial):
+        response_cache.invalidate(tenant_id, scope)
+
+
+def below_cost(products):
+    """Productos con diseño y algún precio cargado (> 0) menor que su costo calculado."""
+    cost = F('design__calculated_cost')
+    condition = Q()
+    for field in PRICE_FIELDS:
+        condition |= Q(**{f'{field}__gt': 0, f'{field}__lt': cost})
+    return products.filter(design__isnull=False).filter(condition)
+
+
+def below_cost_report(tenant_id, design_ids=None):
+    products = Product.objects.filter(tenant_id=tenant_id)
+    if design_ids is not None:
+        if not design_ids:
+            return []
+        products = products.filter(design_id__in=design_ids)
+    rows = below_cost(products).order_by('id').values(
+        'id', 'name', 'sku', 'design_id', *PRICE_FIELDS, cost=F('design__calculated_cost')
+    )
+    report = []
+    for row in rows:
+        row['prices_below_cost'] = [field for field in PRICE_FIELDS if Decimal(0) < row[field] < row['cost']]
+        report.append(row)
+    return report
+
+
+def propagate_changes(changes):
+    """Propaga un lote de cambios anotados por cost_changed() y guarda su historial."""
+    materials_by_tenant = defaultdict(set)
+    for tenant_id, raw_material_id, *_ in changes:
+        materials_by_tenant[tenant_id].add(raw_material_id)
+
+    # Un lote borrado más adelante en la misma transacción ya no tiene historial.
+    lots = set(MateriaPrimaProveedor.objects.filter(
+        pk__in={lot_id for _, _, lot_id, _, _ in changes if lot_id is not None}
+    ).values_list('pk', flat=True))
+    history = []
+    for tenant_id, raw_material_ids in materials_by_tenant.items():
+        result = propagate(tenant_id, raw_material_ids)
+        below_by_design = defaultdict(list)
+        for row in result['below_cost']:
+            below_by_design[row['design_id']].append(row['id'])
+        for change_tenant, raw_material_id, lot_id, previous_cost, new_cost in changes:
+            if change_tenant != tenant_id or lot_id not in lots:
+                continue
+            designs = result['designs'].get(raw_material_id, set())
+            history.append(CostHistory(
+                tenant_id=tenant_id, raw_material_id=raw_material_id, materia_prima_proveedor_id=lot_id,
+                previous_cost=previous_cost, new_cost=new_cost, material_cost=result['costs'].get(raw_material_id),
+                designs_updated=len(result['updated'].get(raw_material_id, ())),
+                products_below_cost=sorted(product for design in designs for product in below_by_design[design]),
+            ))
+    CostHistory.objects.bulk_create(history)
+    notify_bulk_created(CostHistory, history)
+    return history
+
+
+def propagate_all(tenant_id):
+    """Sincroniza todas las recetas del tenant con el costo vigente de sus materias primas."""
+    raw_material_ids = set(
+        DesignMaterial.objects.filter(tenant_id=tenant_id).values_list('raw_material_id', flat=True).distinct()
+    )
+    return propagate(tenant_id, raw_material_ids)
@@ -0,0 +1,75 @@
+"""
+Trabajo que se junta durante una transacción y se ejecuta una sola vez al
+confirmarla (transaction.on_commit). Lo usan las señales que, fila por fila,
+dispararían el mismo recálculo muchas veces (ver core.design_costs y
+core.cost_propagation).
+
+    deferred.add('design_costs', recalculate, design_id)
+
+Fuera de una transacción la función se ejecuta enseguida con ese único
+elemento. Dentro, hay un lote por nivel de savepoint (uno que se revierte
+se lleva su lote) y al confirmar se juntan los que siguen vivos. flush() la ejecuta antes del commit, para quien necesita el
+resultado dentro de la misma transacción.
+"""
+import weakref
+
+from django.db import transaction
+
+BATCHES_ATTR = '_deferred_batches'
+
+
+class Batch:
+    def __init__(self, name, func, connection):
+        self.name = name
+        self.func = func
+        self.connection = connection
+        self.items = set()
+
+    def commit(self):
+        _flush(self.connection, self.name)
+
+
+def _batches(connection):
+    # Referencias débiles: la única fuerte es el callback de on_commit. Si
+    # Django lo descarta porque se revirtió la transacción o el savepoint, el
+    # lote desaparece con él y el próximo add() arma otro.
+    if not hasattr(connection, BATCHES_ATTR):
+        setattr(connection, BATCHES_ATTR, weakref.WeakValueDictionary())
+    return getattr(connection, BATCHES_ATTR)
+
+
+def _flush(connection, name):
+    # Junta los lotes vivos de `name` de todos los niveles: una sola llamada.
+    items, func = set(), None
+    for key, batch in list(_batches(connection).items()):
+        if key[0] == name:
+            items |= batch.items
+            batch.items = set()
+            func = batch.func
+    if items:
+        func(items)
+
+
+def add(name, func, item, using=None):
+    """Agrega `item` al lote `name`; func(items) corre una vez al confirmar."""
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        func({item})
+        return
+    # Un lote por savepoint: lo agregado dentro de uno que se revierte no se
+    # mezcla con lo que sí se confirma.
+    key = (name, tuple(connection.savepoint_ids))
+    batches = _batches(connection)
+    batch = batches.get(key)
+    if batch is None:
+        batch = batches[key] = Batch(name, func, connection)
+    batch.items.add(item)
+    # Un callback por elemento (el primero que corre vacía el lote y los
+    # demás no encuentran nada): así ningún elemento depende de un callback
+    # registrado antes y que ya se haya ejecutado.
+    transaction.on_commit(batch.commit, using=using)
+
+
+def flush(name, using=None):
+    """Ejecuta ya el lote `name` de la transacción actual."""
+    _flush(transaction.get_connection(using), name)
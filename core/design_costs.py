@@ -0,0 +1,80 @@
+"""
+Costo calculado de los diseños (Design.calculated_cost):
+
+    Σ DesignMaterial.quantity × DesignMaterial.cost + Σ DesignProcess.cost
+
+Guardar o borrar una línea de la receta no recalcula en el momento:
+mark_dirty() anota el diseño en el lote de la transacción (core.deferred),
+que se recalcula entero una sola vez al confirmarla. Así,
+reescribir una receta de 30 líneas cuesta un recálculo y no 60. Quien quiera
+el costo antes del commit (los serializers, para devolverlo en la respuesta)
+llama a flush().
+
+recalculate() resuelve cualquier cantidad de diseños con dos agregados
+agrupados y un bulk_update de los que cambiaron.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Sum
+
+from . import deferred, response_cache, versions
+from .models import Design, DesignMaterial, DesignProcess
+
+BATCH_SIZE = 1000
+BATCH_NAME = 'design_costs'
+CENTS = Decimal('0.01')
+
+
+def mark_dirty(design_id, using=None):
+    """Recalcula el costo de `design_id` al confirmarse la transacción (enseguida si no hay una)."""
+    deferred.add(BATCH_NAME, recalculate, design_id, using)
+
+
+def flush(using=None):
+    """Recalcula ya los diseños anotados en la transacción actual."""
+    deferred.flush(BATCH_NAME, using)
+
+
+def recalculate(design_ids):
+    """Recalcula el costo de `design_ids`; devuelve cuántos cambiaron."""
+    design_ids = list(design_ids)
+    changed = []
+    for start in range(0, len(design_ids), BATCH_SIZE):
+        changed.extend(_recalculate_chunk(design_ids[start:start + BATCH_SIZE]))
+    for tenant_id in {design.tenant_id for design in changed}:
+        # bulk_update no dispara señales.
+        versions.bump(tenant_id, Design)
+        for scope in response_cache.scopes_for(Design):
+            response_cache.invalidate(tenant_id, scope)
+    return len(changed)
+
+
+def _recalculate_chunk(ids):
+    materials = dict(
+        DesignMaterial.objects.filter(design_id__in=ids).values('design').annotate(
+            total=Sum(F('quantity') * F('cost'), output_field=DecimalField(max_digits=20, decimal_places=6))
+        ).values_list('design', 'total')
+    )
+    processes = dict(
+        DesignProcess.objects.filter(design_id__in=ids).values('design').annotate(
+            total=Sum('cost')
+        ).values_list('design', 'total')
+    )
+    changed = []
+    for design in Design.objects.filter(pk__in=ids).only('id', 'tenant_id', 'calculated_cost'):
+        cost = ((materials.get(design.pk) or 0) + (processes.get(design.pk) or 0))
+        cost = Decimal(cost).quantize(CENTS)
+        if cost != design.calculated_cost:
+            design.calculated_cost = cost
+            changed.append(design)
+    Design.objects.bulk_update(changed, ['calculated_cost'], batch_size=500)
+    return changed
+
+
+def recalculate_all(tenant_id=None):
+    """Recalcula todos los diseños (de un tenant o de todos); devuelve (revisados, cambiados)."""
+    designs = Design.objects.order_by('id')
+    if tenant_id:
+        designs = designs.filter(tenant_id=tenant_id)
+    ids = list(designs.values_list('id', flat=True))
+    return len(ids), recalculate(ids)
@@ -0,0 +1,172 @@
+"""
+Proyecciones mensuales para ProjectedGrowthView.
+
+La serie histórica de la métrica se carga agrupada por mes en un arreglo de
+NumPy (los meses sin movimientos valen 0) y se ajusta por mínimos cuadrados
+un modelo de tendencia lineal más estacionalidad mensual. La estacionalidad
+sólo se usa con al menos dos años de historia y la tendencia con al menos
+tres meses; con menos datos se proyecta el promedio.
+
+El modelo ajustado se guarda en el cache FORECAST_CACHE_ALIAS (compartido
+entre procesos) por tenant, métrica y rango histórico. Las señales de core.signals cambian la generación de la
+métrica cuando se escriben sus tablas de origen, lo que invalida los ajustes
+anteriores.
+"""
+import datetime
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import (
+    DailySalesRollup, DailyProductionRollup, DailyTransactionRollup, Sale, SaleItem, ProductionOrder,
+    ProductionOrderItem, Transaction
+)
+
+CONFIDENCE_Z = 1.96  # banda del 95 %
+SEASONAL_MIN_MONTHS = 24
+TREND_MIN_MONTHS = 3
+
+
+def _monthly(queryset, date_field, value):
+    return queryset.annotate(period=TruncMonth(date_field)).values('period').annotate(value=value).order_by('period')
+
+
+def _sales_revenue(tenant_id, start, end):
+    rows = DailySalesRollup.objects.filter(tenant_id=tenant_id, date__range=(start, end))
+    return _monthly(rows, 'date', Sum('total_amount'))
+
+
+def _sales_units(tenant_id, start, end):
+    rows = SaleItem.objects.filter(tenant_id=tenant_id, sale__sale_date__date__range=(start, end))
+    return _monthly(rows, 'sale__sale_date', Sum('quantity'))
+
+
+def _production_volume(tenant_id, start, end):
+    rows = DailyProductionRollup.objects.filter(tenant_id=tenant_id, date__range=(start, end))
+    return _monthly(rows, 'date', Sum('quantity'))
+
+
+def _financial_result(tenant_id, start, end):
+    rows = DailyTransactionRollup.objects.filter(tenant_id=tenant_id, date__range=(start, end))
+    revenue = Sum('amount', filter=Q(account__account_type='Ingreso'), default=0)
+    expenses = Sum('amount', filter=Q(account__account_type='Egreso'), default=0)
+    return _monthly(rows, 'date', revenue - expenses)
+
+
+class Metric:
+    def __init__(self, load, sources, allow_negative=False):
+        self.load = load
+        self.sources = sources
+        self.allow_negative = allow_negative
+
+
+# data_type -> métrica. 'sales', 'production' y 'financial' son los que ya usan los dashboards.
+METRICS = {
+    'sales': Metric(_sales_revenue, (Sale,)),
+    'sales_units': Metric(_sales_units, (SaleItem,)),
+    'production': Metric(_production_volume, (ProductionOrder, ProductionOrderItem)),
+    'financial': Metric(_financial_result, (Transaction,), allow_negative=True),
+}
+
+
+def metrics_for(model):
+    return [name for name, metric in METRICS.items() if model in metric.sources]
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _month_start(index):
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _design_matrix(months, origin, seasonal, trend):
+    """Columnas: constante, tendencia (meses desde el origen) y 11 variables de mes."""
+    columns = [np.ones(len(months))]
+    if trend:
+        columns.append((months - origin).astype(float))
+    if seasonal:
+        month_of_year = months % 12
+        columns.extend((month_of_year == m).astype(float) for m in range(1, 12))
+    return np.column_stack(columns)
+
+
+def fit(values, origin):
+    """Ajusta el modelo sobre `values` (un valor por mes desde `origin`)."""
+    n = len(values)
+    seasonal = n >= SEASONAL_MIN_MONTHS
+    trend = n >= TREND_MIN_MONTHS
+    months = origin + np.arange(n)
+    X = _design_matrix(months, origin, seasonal, trend)
+    coefficients, *_ = np.linalg.lstsq(X, values, rcond=None)
+    residuals = values - X @ coefficients
+    dof = max(n - X.shape[1], 1)
+    return {
+        'origin': origin,
+        'seasonal': seasonal,
+        'trend': trend,
+        'coefficients': coefficients,
+        'sigma': float(np.sqrt(residuals @ residuals / dof)),
+        'covariance': np.linalg.pinv(X.T @ X),
+    }
+
+
+def project(model, first_month, last_month, allow_negative=False):
+    """Proyección mes a mes con banda de confianza para el rango pedido."""
+    months = np.arange(first_month, last_month + 1)
+    if not len(months):
+        return []
+    X = _design_matrix(months, model['origin'], model['seasonal'], model['trend'])
+    values = X @ model['coefficients']
+    spread = CONFIDENCE_Z * model['sigma'] * np.sqrt(1 + np.einsum('ij,jk,ik->i', X, model['covariance'], X))
+    lower, upper = values - spread, values + spread
+    if not allow_negative:
+        values, lower, upper = (np.clip(array, 0, None) for array in (values, lower, upper))
+    return [
+        {'date': _month_start(int(month)).isoformat(), 'value': round(float(v), 2), 'lower': round(float(lo), 2), 'upper': round(float(hi), 2)}
+        for month, v, lo, hi in zip(months, values, lower, upper)
+    ]
+
+
+def load_history(metric, tenant_id, start, end):
+    origin, last = _month_index(start), _month_index(end)
+    values = np.zeros(last - origin + 1)
+    for row in METRICS[metric].load(tenant_id, start, end):
+        values[_month_index(row['period']) - origin] = float(row['value'] or 0)
+    return values, origin
+
+
+def get_cache():
+    return caches[settings.FORECAST_CACHE_ALIAS]
+
+
+def _generation_key(tenant_id, metric):
+    return f'forecast-generation:{tenant_id}:{metric}'
+
+
+def invalidate(tenant_id, metric):
+    get_cache().set(_generation_key(tenant_id, metric), uuid.uuid4().hex, None)
+
+
+def get_model(metric, tenant_id, start, end):
+    """Modelo ajustado para la historia [start, end], reutilizando el cache si no hubo escrituras."""
+    cache = get_cache()
+    generation = cache.get_or_set(_generation_key(tenant_id, metric), lambda: uuid.uuid4().hex, None)
+    key = f'forecast:{tenant_id}:{metric}:{start.isoformat()}:{end.isoformat()}:{generation}'
+    model = cache.get(key)
+    if model is None:
+        model = fit(*load_history(metric, tenant_id, start, end))
+        cache.set(key, model, settings.FORECAST_CACHE_TTL)
+    return model
+
+
+def forecast(metric, tenant_id, start, end, projection_start, projection_end):
+    model = get_model(metric, tenant_id, start, end)
+    return project(
+        model, _month_index(projection_start), _month_index(projection_end), METRICS[metric].allow_negative
+    )
@@ -0,0 +1,170 @@
+"""
+Cola de trabajos en la base de datos, sin broker externo.
+
+Las vistas encolan con enqueue('nombre', tenant_id, **payload) y responden
+enseguida con el id del Job; `manage.py run_workers` ejecuta los trabajos
+en procesos aparte y el frontend consulta GET /api/jobs/<id>/.
+
+Las tareas se registran con @task en el módulo `tasks` de cada app (se
+cargan con load_tasks()). Reciben el tenant_id y el payload, y lo que
+devuelven (serializable a JSON) queda en Job.result. Si fallan se
+reintentan con espera exponencial hasta max_attempts. Con @task(bind=True)
+la tarea recibe además el Job como primer argumento, para saber si está en
+su último intento (is_last_attempt).
+
+Para tomar un trabajo:
+    PostgreSQL  SELECT ... FOR UPDATE SKIP LOCKED: cada worker salta las
+                filas que ya bloqueó otro, sin esperas ni choques.
+    SQLite      UPDATE condicional (status='Pendiente'): SQLite serializa
+                las escrituras con su lock de base, así que un solo worker
+                logra cambiar la fila.
+"""
+import datetime
+import logging
+import os
+import socket
+import time
+import traceback
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+# Un trabajo 'Procesando' sin terminar después de esto se da por perdido
+# (el worker murió) y vuelve a la cola.
+STALE_AFTER = datetime.timedelta(minutes=30)
+CLAIM_CANDIDATES = 10
+
+
+class UnknownTask(Exception):
+    """No hay ninguna tarea registrada con ese nombre."""
+
+
+def task(name, max_attempts=DEFAULT_MAX_ATTEMPTS, bind=False):
+    """Registra la función como tarea `name`."""
+    def register(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        func.bind = bind
+        REGISTRY[name] = func
+        return func
+    return register
+
+
+def load_tasks():
+    autodiscover_modules('tasks')
+
+
+def enqueue(name, tenant_id, delay=0, **payload):
+    """Crea el Job; con transacción abierta, el worker lo ve recién al confirmarse."""
+    load_tasks()
+    if name not in REGISTRY:
+        raise UnknownTask(name)
+    return Job.objects.create(
+        tenant_id=tenant_id, name=name, payload=payload, max_attempts=REGISTRY[name].max_attempts,
+        run_at=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _ready(now):
+    return Job.objects.filter(status='Pendiente', run_at__lte=now).order_by('run_at', 'id')
+
+
+def claim(worker=None):
+    """Toma el próximo trabajo listo y lo marca 'Procesando'; None si no hay."""
+    now = timezone.now()
+    worker = worker or worker_id()
+    claimed = {'status': 'Procesando', 'locked_by': worker, 'locked_at': now, 'started_at': now}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = _ready(now).select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            job.attempts += 1
+            for name, value in claimed.items():
+                setattr(job, name, value)
+            job.save(update_fields=['attempts', *claimed])
+            return job
+    for pk in _ready(now).values_list('pk', flat=True)[:CLAIM_CANDIDATES]:
+        if Job.objects.filter(pk=pk, status='Pendiente').update(attempts=F('attempts') + 1, **claimed):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def is_last_attempt(job):
+    """Si este intento falla, el trabajo queda en 'Error' sin reintentos."""
+    return job.attempts >= job.max_attempts
+
+
+def retry_delay(attempts):
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+
+def execute(job):
+    """Ejecuta un trabajo ya tomado y guarda el resultado o el error."""
+    func = REGISTRY.get(job.name)
+    try:
+        if func is None:
+            raise UnknownTask(job.name)
+        result = func(job, job.tenant_id, **job.payload) if func.bind else func(job.tenant_id, **job.payload)
+    except Exception as exc:
+        logger.exception('Job %s (%s) falló en el intento %s', job.pk, job.name, job.attempts)
+        job.error = ''.join(traceback.format_exception_only(type(exc), exc)).strip()
+        job.locked_by = ''
+        if job.attempts < job.max_attempts and not isinstance(exc, UnknownTask):
+            job.status = 'Pendiente'
+            job.run_at = timezone.now() + datetime.timedelta(seconds=retry_delay(job.attempts))
+        else:
+            job.status = 'Error'
+            job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'locked_by', 'run_at', 'finished_at'])
+        return job
+    job.status, job.result, job.error, job.locked_by = 'Completado', result, '', ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'locked_by', 'finished_at'])
+    return job
+
+
+def requeue_stale():
+    now = timezone.now()
+    stale = Job.objects.filter(status='Procesando', locked_at__lt=now - STALE_AFTER)
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status='Error', locked_by='', error='El worker no terminó el trabajo.', finished_at=now
+    )
+    return stale.update(status='Pendiente', locked_by='', run_at=now)
+
+
+def run_pending(limit=None, worker=None):
+    """Ejecuta trabajos hasta vaciar la cola (o `limit`); devuelve cuántos."""
+    load_tasks()
+    done = 0
+    while limit is None or done < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        execute(job)
+        done += 1
+    return done
+
+
+def work(interval=2.0, should_stop=lambda: False):
+    """Bucle de un worker: toma trabajos y, si no hay, espera `interval` segundos."""
+    load_tasks()
+    worker = worker_id()
+    while not should_stop():
+        requeue_stale()
+        if not run_pending(limit=100, worker=worker):
+            time.sleep(interval)
@@ -0,0 +1,107 @@
+"""
+Libro mayor de cuenta corriente calculado en la base de datos.
+
+Las ventas (DEBE) y los cobros (HABER) se unen con UNION ALL y el saldo
+acumulado se calcula con una función de ventana, así el saldo de cada fila
+no depende del rango de fechas ni de la página que se pida.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.utils.dateparse import parse_date
+
+from .models import Sale, Transaction, User
+from .queries import MONEY
+
+SALE, PAYMENT = 0, 1
+
+CLIENT_LEDGER_SQL = """
+    SELECT date, kind, ref_id, amount, detail, user_email, balance
+    FROM (
+        SELECT movements.*,
+               SUM(amount) OVER (
+                   ORDER BY date, kind, ref_id
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+               ) AS balance
+        FROM (
+            SELECT DATE(s.sale_date) AS date, {sale} AS kind, s.id AS ref_id,
+                   -s.total_amount AS amount, NULL AS detail, u.email AS user_email
+            FROM {sale_table} s
+            LEFT JOIN {user_table} u ON u.id = s.user_id
+            WHERE s.tenant_id = %s AND s.client_id = %s
+            UNION ALL
+            SELECT t.date, {payment}, t.id, t.amount, t.description, NULL
+            FROM {transaction_table} t
+            INNER JOIN {sale_table} s ON s.id = t.related_sale_id
+            WHERE t.tenant_id = %s AND s.client_id = %s AND t.amount > 0
+        ) movements
+    ) ledger
+    WHERE {where}
+    ORDER BY date, kind, ref_id
+"""
+
+
+def _as_date(value):
+    return value if isinstance(value, datetime.date) else parse_date(str(value))
+
+
+def _money(value):
+    # SQLite devuelve float en las sumas; PostgreSQL ya devuelve Decimal.
+    return MONEY.to_python(value).quantize(Decimal('0.01'))
+
+
+def client_ledger(tenant_id, client_id, start_date=None, end_date=None, after=None, limit=None):
+    """
+    Movimientos de la cuenta corriente del cliente en orden cronológico
+    (ventas antes que cobros del mismo día) con su saldo acumulado.
+    `after` es la clave de la última fila ya entregada (ver ledger_cursor_key).
+    """
+    adapt = connection.ops.adapt_datefield_value
+    where, params = ['1 = 1'], [tenant_id, client_id, tenant_id, client_id]
+    if start_date:
+        where.append('date >= %s')
+        params.append(adapt(start_date))
+    if end_date:
+        where.append('date <= %s')
+        params.append(adapt(end_date))
+    if after:
+        where.append('(date > %s OR (date = %s AND (kind > %s OR (kind = %s AND ref_id > %s))))')
+        date, kind, ref_id = after
+        params += [adapt(date), adapt(date), kind, kind, ref_id]
+    sql = CLIENT_LEDGER_SQL.format(
+        sale=SALE, payment=PAYMENT, where=' AND '.join(where),
+        sale_table=Sale._meta.db_table, transaction_table=Transaction._meta.db_table, user_table=User._meta.db_table,
+    )
+    if limit:
+        sql += ' LIMIT %s'
+        params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'date': _as_date(date),
+            'kind': kind,
+            'ref_id': ref_id,
+            'amount': _money(amount),
+            'detail': detail,
+            'user_email': user_email,
+            'balance': _money(balance),
+        }
+        for date, kind, ref_id, amount, detail, user_email, balance in rows
+    ]
+
+
+def ledger_cursor_key(row):
+    return [row['date'].isoformat(), row['kind'], row['ref_id']]
+
+
+def parse_ledger_cursor(values):
+    date, kind, ref_id = values
+    date = parse_date(date)
+    if date is None:
+        raise ValueError(values)
+    return date, int(kind), int(ref_id)
@@ -0,0 +1,90 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import (
+    Tenant, User, RawMaterial, Process, Design, DesignMaterial, DesignProcess, Size, Color, Product
+)
+from core.views import ProductViewSet
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide tamaño de respuesta, consultas y latencia de /api/products/ en modo "
+        "compacto y con ?expand=recipe sobre un catálogo sintético. Los datos se "
+        "crean dentro de una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--recipe-lines', type=int, default=20)
+        parser.add_argument('--designs', type=int, default=50, help="Cantidad de diseños compartidos entre los productos.")
+        parser.add_argument('--skip-expanded', action='store_true', help="No medir la representación expandida.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        tenant = Tenant.objects.create(name='Benchmark catálogo')
+        user = User.objects.create_user(email='benchmark@example.com', password='benchmark', tenant=tenant)
+        size = Size.objects.create(name='BENCH-M', tenant=tenant)
+        colors = Color.objects.bulk_create([Color(name=f'BENCH-{i}', tenant=tenant) for i in range(3)])
+
+        lines = options['recipe_lines']
+        raw_materials = RawMaterial.objects.bulk_create(
+            [RawMaterial(name=f'BENCH-MP-{i}', tenant=tenant) for i in range(lines)]
+        )
+        processes = Process.objects.bulk_create(
+            [Process(name=f'BENCH-PROC-{i}', cost=Decimal('1.00'), tenant=tenant) for i in range(lines)]
+        )
+        designs = Design.objects.bulk_create(
+            [Design(name=f'Diseño {i}', tenant=tenant) for i in range(options['designs'])]
+        )
+        DesignMaterial.objects.bulk_create([
+            DesignMaterial(design=design, raw_material=raw_material, quantity=Decimal('1.5'), cost=Decimal('2.00'), tenant=tenant)
+            for design in designs for raw_material in raw_materials
+        ])
+        DesignProcess.objects.bulk_create([
+            DesignProcess(design=design, process=process, order=order, cost=Decimal('1.00'), tenant=tenant)
+            for design in designs for order, process in enumerate(processes)
+        ])
+        products = Product.objects.bulk_create([
+            Product(name=f'Producto {i}', sku=f'BENCH-{i}', design=designs[i % len(designs)], size=size, tenant=tenant)
+            for i in range(options['products'])
+        ])
+        Product.colors.through.objects.bulk_create([
+            Product.colors.through(product_id=product.id, color_id=color.id)
+            for product in products for color in colors
+        ])
+
+        self.stdout.write(f"{len(products)} productos, recetas de {lines} materiales + {lines} procesos")
+        self._measure('compacto', '/api/products/', tenant, user)
+        if not options['skip_expanded']:
+            self._measure('expand=recipe', '/api/products/?expand=recipe', tenant, user)
+
+    def _measure(self, label, url, tenant, user):
+        request = APIRequestFactory().get(url, HTTP_X_TENANT_ID=str(tenant.id))
+        force_authenticate(request, user=user)
+        view = ProductViewSet.as_view({'get': 'list'})
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:>14}: {len(response.content) / 1024:10.1f} KiB  "
+            f"{len(ctx.captured_queries):6d} consultas  {elapsed * 1000:9.1f} ms"
+        )
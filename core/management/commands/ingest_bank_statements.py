@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import bank_ingestion
+
+
+class Command(BaseCommand):
+    help = (
+        "Lee los extractos bancarios pendientes (PDF, CSV u OFX) y carga sus "
+        "movimientos. Con --loop queda esperando extractos nuevos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=int, help="Sólo este tenant (por defecto, todos).")
+        parser.add_argument('--loop', action='store_true', help="No terminar: revisar cada --interval segundos.")
+        parser.add_argument('--interval', type=float, default=5, help="Segundos entre revisiones con --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.process_pending(options['tenant'])
+            if not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"{processed} extractos procesados."))
+                return
+            if not processed:
+                time.sleep(options['interval'])
+
+    def process_pending(self, tenant_id):
+        processed = 0
+        while (statement := bank_ingestion.claim_next(tenant_id)) is not None:
+            bank_ingestion.ingest(statement)
+            processed += 1
+            if statement.status == 'Error':
+                self.stderr.write(f"Extracto {statement.pk}: {statement.error_message}")
+            else:
+                self.stdout.write(
+                    f"Extracto {statement.pk}: {statement.lines_imported} de {statement.lines_found} movimientos nuevos."
+                )
+        return processed
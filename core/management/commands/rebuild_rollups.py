@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core import response_cache, rollups
+from core.models import Tenant
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde las tablas de origen los resúmenes diarios que usan los "
+        "dashboards. Usar después de migrar o de cargas masivas con bulk_create/update()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=int, help="Sólo este tenant (por defecto, todos).")
+
+    def handle(self, *args, **options):
+        created = rollups.rebuild(options['tenant'])
+        tenant_ids = [options['tenant']] if options['tenant'] else Tenant.objects.values_list('id', flat=True)
+        for tenant_id in tenant_ids:
+            response_cache.invalidate(tenant_id, 'dashboards')
+        self.stdout.write(self.style.SUCCESS(f"{created} filas de resumen regeneradas."))
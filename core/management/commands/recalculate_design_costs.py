@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core import cost_propagation, design_costs
+from core.models import Tenant
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula Design.calculated_cost de todos los diseños con dos consultas "
+        "agregadas por bloque. Usar después de cargas masivas o de cambiar costos con update()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=int, help="Sólo este tenant (por defecto, todos).")
+        parser.add_argument(
+            '--sync-materials', action='store_true',
+            help="Antes, lleva a las recetas el costo vigente de cada materia prima (ver core.cost_propagation).",
+        )
+
+    def handle(self, *args, **options):
+        if options['sync_materials']:
+            tenants = [options['tenant']] if options['tenant'] else Tenant.objects.values_list('id', flat=True)
+            updated = 0
+            for tenant_id in tenants:
+                result = cost_propagation.propagate_all(tenant_id)
+                updated += len(set().union(*result['updated'].values()))
+            self.stdout.write(f"{updated} diseños con materias primas a costo actualizado.")
+        checked, changed = design_costs.recalculate_all(options['tenant'])
+        self.stdout.write(self.style.SUCCESS(f"{checked} diseños revisados, {changed} con costo actualizado."))
@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta los trabajos encolados en la base (ver core.jobs). Con --processes "
+        "levanta varios workers; con --once vacía la cola y termina."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Cantidad de procesos worker.")
+        parser.add_argument('--interval', type=float, default=2, help="Segundos de espera cuando la cola está vacía.")
+        parser.add_argument('--once', action='store_true', help="Ejecutar lo pendiente y terminar.")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            jobs.requeue_stale()
+            done = jobs.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"{done} trabajos ejecutados."))
+            return
+
+        if options['processes'] <= 1:
+            self.stdout.write(f"Worker {jobs.worker_id()} esperando trabajos.")
+            run_worker(options['interval'])
+            return
+
+        # Cada proceso abre su propia conexión: no se hereda la del padre.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=run_worker, args=(options['interval'],), daemon=True)
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"{len(workers)} workers esperando trabajos.")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+
+
+def run_worker(interval):
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)  # termina el trabajo en curso y sale
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        jobs.work(interval, should_stop=lambda: bool(stopping))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Tenant
+
+# Cache local al proceso: tenant_id -> (instancia, expira_en).
+_tenant_cache = {}
+_tenant_cache_lock = threading.Lock()
+
+
+def get_cached_tenant(tenant_id):
+    """
+    Devuelve el Tenant con ese id usando un cache TTL local al proceso.
+    Retorna None si el id es inválido o el tenant no existe.
+    """
+    try:
+        tenant_id = int(tenant_id)
+    except (TypeError, ValueError):
+        return None
+
+    now = time.monotonic()
+    with _tenant_cache_lock:
+        entry = _tenant_cache.get(tenant_id)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    try:
+        tenant = Tenant.objects.get(id=tenant_id)
+    except Tenant.DoesNotExist:
+        return None
+
+    ttl = getattr(settings, 'TENANT_CACHE_TTL', 300)
+    with _tenant_cache_lock:
+        _tenant_cache[tenant_id] = (tenant, now + ttl)
+    return tenant
+
+
+def invalidate_tenant_cache(tenant_id=None):
+    """Elimina un tenant del cache, o vacía el cache completo si no se indica id."""
+    with _tenant_cache_lock:
+        if tenant_id is None:
+            _tenant_cache.clear()
+        else:
+            _tenant_cache.pop(tenant_id, None)
+
+
+class TenantMiddleware:
+    """
+    Resuelve el header X-Tenant-ID una sola vez por request y deja el
+    resultado en `request.tenant` (None si falta o no es válido).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tenant_id = request.headers.get('X-Tenant-ID')
+        request.tenant = get_cached_tenant(tenant_id) if tenant_id else None
+        return self.get_response(request)
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0069_alter_warehouse_options_remove_warehouse_factory_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productionorder',
+            index=models.Index(fields=['tenant', 'creation_date', 'id'], name='core_op_tenant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['tenant', 'sale_date', 'id'], name='core_sale_tenant_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['tenant', 'date', 'id'], name='core_trans_tenant_date_idx'),
+        ),
+    ]
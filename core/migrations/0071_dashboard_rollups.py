@@ -0,0 +1,135 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    # Sin esto los dashboards, que ya leen de los resúmenes, quedarían en cero
+    # hasta correr `manage.py rebuild_rollups`. Es la agregación de
+    # core.rollups.rebuild en esta versión, con los modelos históricos: el
+    # módulo vivo puede cambiar y la migración tiene que escribir siempre lo mismo.
+    def model(name):
+        return apps.get_model('core', name)
+
+    money = models.DecimalField(max_digits=12, decimal_places=2)
+    sales = (
+        model('Sale').objects.annotate(day=TruncDate('sale_date'))
+        .values('tenant_id', 'day', 'local_id', 'is_ecommerce_sale', 'ecommerce_platform')
+        .annotate(total_amount=Sum('total_amount'), sale_count=Count('id')).order_by()
+    )
+    transactions = (
+        model('Transaction').objects.values('tenant_id', 'account_id', 'cash_register_id', day=F('date'))
+        .annotate(amount=Sum('amount'), transaction_count=Count('id')).order_by()
+    )
+    process_logs = (
+        model('ProductionProcessLog').objects.annotate(day=TruncDate('start_time'))
+        .values('tenant_id', 'day', 'process_id')
+        .annotate(quantity_processed=Sum('quantity_processed'), quantity_defective=Sum('quantity_defective')).order_by()
+    )
+    production = (
+        model('ProductionOrderItem').objects.annotate(day=TruncDate('production_order__creation_date'))
+        .values('tenant_id', 'day', design_id=F('product__design_id'), op_type=F('production_order__op_type'))
+        .annotate(quantity=Sum('quantity')).order_by()
+    )
+    purchases = (
+        model('PurchaseOrderItem').objects.values('tenant_id', day=F('purchase_order__order_date'))
+        .annotate(amount=Sum(F('quantity') * F('unit_price'), output_field=money)).order_by()
+    )
+    salaries = model('Salary').objects.values('tenant_id', day=F('pay_date')).annotate(amount=Sum('amount')).order_by()
+
+    for rollup, rows in (
+        ('DailySalesRollup', sales),
+        ('DailyTransactionRollup', transactions),
+        ('DailyProcessRollup', process_logs),
+        ('DailyProductionRollup', production),
+        ('DailyExpenseRollup', ({**row, 'source': 'Compras'} for row in purchases if row['day'])),
+        ('DailyExpenseRollup', ({**row, 'source': 'Sueldos'} for row in salaries)),
+    ):
+        rollup = model(rollup)
+        rollup.objects.bulk_create([rollup(date=row.pop('day'), **row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0070_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyExpenseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('source', models.CharField(choices=[('Compras', 'Compras'), ('Sueldos', 'Sueldos')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'date'], name='core_rollup_expense_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProcessRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity_processed', models.IntegerField(default=0)),
+                ('quantity_defective', models.IntegerField(default=0)),
+                ('process', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.process')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'date'], name='core_rollup_process_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('op_type', models.CharField(max_length=50)),
+                ('quantity', models.IntegerField(default=0)),
+                ('design', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.design')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'date'], name='core_rollup_production_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('is_ecommerce_sale', models.BooleanField(default=False)),
+                ('ecommerce_platform', models.CharField(blank=True, max_length=100, null=True)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sale_count', models.IntegerField(default=0)),
+                ('local', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.local')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'date'], name='core_rollup_sales_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.account')),
+                ('cash_register', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.cashregister')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'date'], name='core_rollup_trans_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
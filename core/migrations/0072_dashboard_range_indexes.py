@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0071_dashboard_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productionprocesslog',
+            index=models.Index(fields=['tenant', 'start_time'], name='core_proclog_tenant_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['tenant', 'order_date'], name='core_po_tenant_date_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0073_data_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankstatement',
+            name='error_message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='lines_found',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='lines_imported',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='status',
+            field=models.CharField(choices=[('Pendiente', 'Pendiente'), ('Procesando', 'Procesando'), ('Procesado', 'Procesado'), ('Error', 'Error')], db_index=True, default='Pendiente', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='banktransaction',
+            name='dedup_key',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='banktransaction',
+            constraint=models.UniqueConstraint(fields=('tenant', 'dedup_key'), name='core_banktrans_dedup_uniq'),
+        ),
+    ]
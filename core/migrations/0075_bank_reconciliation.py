@@ -0,0 +1,64 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0074_bank_statement_ingestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankReconciliation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.DecimalField(decimal_places=3, default=1, max_digits=4)),
+                ('is_manual', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(fields=['tenant', 'date'], name='core_banktrans_tenant_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='check',
+            index=models.Index(fields=['tenant', 'due_date'], name='core_check_tenant_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['tenant', 'date'], name='core_payment_tenant_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='bankreconciliation',
+            name='bank_transaction',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation', to='core.banktransaction'),
+        ),
+        migrations.AddField(
+            model_name='bankreconciliation',
+            name='check_record',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation', to='core.check'),
+        ),
+        migrations.AddField(
+            model_name='bankreconciliation',
+            name='payment',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation', to='core.payment'),
+        ),
+        migrations.AddField(
+            model_name='bankreconciliation',
+            name='tenant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant'),
+        ),
+        migrations.AddField(
+            model_name='bankreconciliation',
+            name='transaction',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation', to='core.transaction'),
+        ),
+        migrations.AddConstraint(
+            model_name='bankreconciliation',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('check_record__isnull', True), ('payment__isnull', True), ('transaction__isnull', False)), models.Q(('check_record__isnull', True), ('payment__isnull', False), ('transaction__isnull', True)), models.Q(('check_record__isnull', False), ('payment__isnull', True), ('transaction__isnull', True)), _connector='OR'), name='core_bankrecon_un_solo_movimiento'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:08
+
+import base64
+import binascii
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def move_qr_images_to_storage(apps, schema_editor):
+    # Mismo esquema de nombres que core.qr_labels.store_png.
+    MateriaPrimaProveedor = apps.get_model('core', 'MateriaPrimaProveedor')
+    lots = MateriaPrimaProveedor.objects.exclude(qr_code_data__isnull=True).exclude(qr_code_data='')
+    for lot in lots.only('id', 'qr_code_data').iterator(chunk_size=200):
+        try:
+            png = base64.b64decode(lot.qr_code_data, validate=True)
+        except (binascii.Error, ValueError):
+            continue
+        key = hashlib.sha256(png).hexdigest()
+        name = f'qr/{key[:2]}/{key}.png'
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(png))
+        MateriaPrimaProveedor.objects.filter(pk=lot.pk).update(qr_code=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0076_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materiaprimaproveedor',
+            name='qr_code',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(move_qr_images_to_storage, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='materiaprimaproveedor',
+            name='qr_code_data',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0077_qr_code_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('previous_cost', models.DecimalField(blank=True, decimal_places=2, help_text='Costo anterior del lote; vacío si el lote es nuevo.', max_digits=10, null=True)),
+                ('new_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('material_cost', models.DecimalField(blank=True, decimal_places=2, help_text='Costo unitario vigente de la materia prima (el mayor entre sus lotes) tras el cambio.', max_digits=10, null=True)),
+                ('designs_updated', models.PositiveIntegerField(default=0)),
+                ('products_below_cost', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('materia_prima_proveedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cost_history', to='core.materiaprimaproveedor')),
+                ('raw_material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_history', to='core.rawmaterial')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.tenant')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['tenant', 'raw_material', 'created_at'], name='core_costhist_material_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0078_cost_history'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='status',
+            field=models.CharField(choices=[('Borrador', 'Borrador'), ('Pendiente', 'Pendiente'), ('Comprada por Pagar', 'Comprada por Pagar'), ('Pagada', 'Pagada')], default='Pendiente', max_length=50),
+        ),
+    ]
@@ -58,7 +58,8 @@ class MateriaPrimaProveedor(TenantAwareModel):
     cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     current_stock = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     batch_number = models.CharField(max_length=100, blank=True, null=True)
-    qr_code_data = models.TextField(blank=True, null=True) # Field for storing QR code image data
+    # SHA-256 del PNG del QR en el storage (ver core.qr_labels.store_png)
+    qr_code = models.CharField(max_length=64, blank=True, null=True)
 
     class Meta:
         unique_together = ('raw_material', 'warehouse', 'tenant')
@@ -66,6 +67,26 @@ class MateriaPrimaProveedor(TenantAwareModel):
     def __str__(self):
         return f"{self.raw_material.name} - {self.supplier.name} ({self.local.name if self.local else 'Sin Ubicación'})"
 
+class CostHistory(TenantAwareModel):
+    # Cambio de costo de un lote y su propagación a los diseños (ver core.cost_propagation).
+    raw_material = models.ForeignKey(RawMaterial, on_delete=models.CASCADE, related_name='cost_history')
+    materia_prima_proveedor = models.ForeignKey(MateriaPrimaProveedor, on_delete=models.SET_NULL, null=True, blank=True, related_name='cost_history')
+    previous_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Costo anterior del lote; vacío si el lote es nuevo.")
+    new_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    material_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Costo unitario vigente de la materia prima (el mayor entre sus lotes) tras el cambio.")
+    designs_updated = models.PositiveIntegerField(default=0)
+    products_below_cost = JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['tenant', 'raw_material', 'created_at'], name='core_costhist_material_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.raw_material_id}: {self.previous_cost} -> {self.new_cost}"
+
 class Process(TenantAwareModel):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
@@ -88,10 +109,10 @@ class Design(TenantAwareModel):
     calculated_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
     def calculate_cost(self):
-        total_material_cost = sum(dm.cost * dm.quantity for dm in self.designmaterial_set.all())
-        total_process_cost = sum(dp.process.cost for dp in self.designprocess_set.all())
-        self.calculated_cost = total_material_cost + total_process_cost
-        self.save(update_fields=['calculated_cost'])
+        # Ver core.design_costs; las escrituras de la receta ya lo recalculan al confirmarse.
+        from .design_costs import recalculate
+        recalculate([self.pk])
+        self.refresh_from_db(fields=['calculated_cost'])
 
     def __str__(self):
         return self.name
@@ -258,6 +279,11 @@ class Sale(TenantAwareModel):
     is_ecommerce_sale = models.BooleanField(default=False)
     ecommerce_platform = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'sale_date', 'id'], name='core_sale_tenant_date_idx'),
+        ]
+
     def __str__(self):
         return f"Venta #{self.id} - {self.sale_date.strftime('%Y-%m-%d')}"
 
@@ -399,6 +425,11 @@ class ProductionOrder(TenantAwareModel):
     colors = models.ManyToManyField(Color, blank=True)
     specifications = models.CharField(max_length=255, blank=True)
     model = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'creation_date', 'id'], name='core_op_tenant_created_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.estimated_delivery_date and self.order_note:
@@ -448,6 +479,11 @@ class ProductionProcessLog(TenantAwareModel):
     failure_details = models.TextField(blank=True, null=True)
     raw_materials_consumed = models.ManyToManyField(RawMaterial, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'start_time'], name='core_proclog_tenant_start_idx'),
+        ]
+
     def __str__(self):
         return f"Log OP #{self.production_order.id} - Proceso: {self.process.name}"
 
@@ -519,11 +555,19 @@ class Supplier(TenantAwareModel):
         return self.name
 
 class PurchaseOrder(TenantAwareModel):
+    DRAFT = 'Borrador'
+    RECEIVED = 'Recibida'
     supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE)
     user = models.ForeignKey('User', on_delete=models.SET_NULL, null=True, blank=True) # New field
     order_date = models.DateField(auto_now_add=True)
     expected_delivery_date = models.DateField()
-    status = models.CharField(max_length=50, default='Pendiente', choices=[('Pendiente', 'Pendiente'), ('Comprada por Pagar', 'Comprada por Pagar'), ('Pagada', 'Pagada')])
+    # 'Borrador': propuesta de core.purchase_suggestions; no cuenta como deuda hasta confirmarla.
+    status = models.CharField(max_length=50, default='Pendiente', choices=[('Borrador', 'Borrador'), ('Pendiente', 'Pendiente'), ('Comprada por Pagar', 'Comprada por Pagar'), ('Pagada', 'Pagada')])
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'order_date'], name='core_po_tenant_date_idx'),
+        ]
 
     def __str__(self):
         return f"Orden de Compra #{self.id} - {self.supplier.name}"
@@ -606,6 +650,11 @@ class Transaction(TenantAwareModel):
     related_purchase = models.ForeignKey(PurchaseOrder, on_delete=models.SET_NULL, null=True, blank=True)
     cash_register = models.ForeignKey(CashRegister, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'date', 'id'], name='core_trans_tenant_date_idx'),
+        ]
+
     def __str__(self):
         return f"Transacción #{self.id} - {self.date} - {self.amount}"
 
@@ -625,6 +674,11 @@ class Payment(TenantAwareModel):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'date'], name='core_payment_tenant_date_idx'),
+        ]
+
     def __str__(self):
         return f"Pago de {self.amount} para Factura #{self.invoice.id}"
 
@@ -635,9 +689,17 @@ class Bank(TenantAwareModel):
         return self.name
 
 class BankStatement(TenantAwareModel):
+    # Estado de la lectura del archivo (ver core.bank_ingestion); el frontend lo consulta.
+    STATUS_CHOICES = [('Pendiente', 'Pendiente'), ('Procesando', 'Procesando'), ('Procesado', 'Procesado'), ('Error', 'Error')]
     bank = models.ForeignKey(Bank, on_delete=models.CASCADE)
     statement_date = models.DateField()
     file = models.FileField(upload_to='bank_statements/')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pendiente', db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    lines_found = models.PositiveIntegerField(default=0)
+    lines_imported = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Extracto de {self.bank.name} - {self.statement_date}"
@@ -647,10 +709,46 @@ class BankTransaction(TenantAwareModel):
     date = models.DateField()
     description = models.CharField(max_length=255)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Huella de (banco, fecha, importe, descripción, repetición) de las líneas importadas;
+    # vacía en las cargadas a mano.
+    dedup_key = models.CharField(max_length=40, null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'dedup_key'], name='core_banktrans_dedup_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tenant', 'date'], name='core_banktrans_tenant_date_idx'),
+        ]
 
     def __str__(self):
         return f"Transacción {self.description} - {self.amount}"
 
+class BankReconciliation(TenantAwareModel):
+    # Conciliación de una línea del extracto con un movimiento interno (ver core.reconciliation).
+    bank_transaction = models.OneToOneField(BankTransaction, on_delete=models.CASCADE, related_name='reconciliation')
+    transaction = models.OneToOneField(Transaction, on_delete=models.CASCADE, null=True, blank=True, related_name='reconciliation')
+    payment = models.OneToOneField(Payment, on_delete=models.CASCADE, null=True, blank=True, related_name='reconciliation')
+    check_record = models.OneToOneField('Check', on_delete=models.CASCADE, null=True, blank=True, related_name='reconciliation')
+    score = models.DecimalField(max_digits=4, decimal_places=3, default=1)
+    is_manual = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            CheckConstraint(
+                check=(
+                    Q(transaction__isnull=False, payment__isnull=True, check_record__isnull=True)
+                    | Q(transaction__isnull=True, payment__isnull=False, check_record__isnull=True)
+                    | Q(transaction__isnull=True, payment__isnull=True, check_record__isnull=False)
+                ),
+                name='core_bankrecon_un_solo_movimiento'
+            )
+        ]
+
+    def __str__(self):
+        return f"Conciliación {self.bank_transaction_id} - {self.score}"
+
 class PaymentMethodType(TenantAwareModel):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
@@ -819,5 +917,107 @@ class Check(TenantAwareModel):
         ('Anulado', 'Anulado'),
     ])
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'due_date'], name='core_check_tenant_due_idx'),
+        ]
+
     def __str__(self):
         return f"Cheque #{self.order_number} - {self.amount}"
+
+# --- Dashboard Rollup Models ---
+# Hechos diarios por tenant que mantiene core.rollups al escribir las tablas
+# de origen; los dashboards suman estas filas en lugar de toda la historia.
+# Puede haber más de una fila para la misma clave: siempre se leen con Sum().
+
+class DailySalesRollup(TenantAwareModel):
+    date = models.DateField()
+    local = models.ForeignKey(Local, on_delete=models.SET_NULL, null=True, blank=True)
+    is_ecommerce_sale = models.BooleanField(default=False)
+    ecommerce_platform = models.CharField(max_length=100, blank=True, null=True)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sale_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['tenant', 'date'], name='core_rollup_sales_idx')]
+
+class DailyTransactionRollup(TenantAwareModel):
+    date = models.DateField()
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    cash_register = models.ForeignKey(CashRegister, on_delete=models.SET_NULL, null=True, blank=True)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['tenant', 'date'], name='core_rollup_trans_idx')]
+
+class DailyProcessRollup(TenantAwareModel):
+    date = models.DateField()
+    process = models.ForeignKey(Process, on_delete=models.CASCADE)
+    quantity_processed = models.IntegerField(default=0)
+    quantity_defective = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['tenant', 'date'], name='core_rollup_process_idx')]
+
+class DailyProductionRollup(TenantAwareModel):
+    date = models.DateField()
+    design = models.ForeignKey(Design, on_delete=models.SET_NULL, null=True, blank=True)
+    op_type = models.CharField(max_length=50)
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['tenant', 'date'], name='core_rollup_production_idx')]
+
+class DailyExpenseRollup(TenantAwareModel):
+    SOURCE_CHOICES = [('Compras', 'Compras'), ('Sueldos', 'Sueldos')]
+    date = models.DateField()
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['tenant', 'date'], name='core_rollup_expense_idx')]
+
+# --- Data Version Models ---
+# Versión por tenant y modelo que core.versions incrementa en cada escritura;
+# con ella TenantAwareViewSet arma los ETag / Last-Modified de sus listados.
+
+class DataVersion(TenantAwareModel):
+    model_label = models.CharField(max_length=100)
+    version = models.PositiveBigIntegerField(default=0)
+    modified_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'model_label'], name='core_dataversion_unique')
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} v{self.version}"
+
+# --- Background Jobs ---
+# Trabajos largos que las vistas encolan y ejecuta `manage.py run_workers` (ver core.jobs).
+
+class Job(TenantAwareModel):
+    STATUS_CHOICES = [('Pendiente', 'Pendiente'), ('Procesando', 'Procesando'), ('Completado', 'Completado'), ('Error', 'Error')]
+    name = models.CharField(max_length=100)
+    payload = JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pendiente')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at', 'id'], name='core_job_status_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.id} {self.name} ({self.status})"
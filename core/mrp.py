@@ -0,0 +1,141 @@
+"""
+Requerimiento de materiales (MRP) de las órdenes de producción abiertas.
+
+Cada OP abierta necesita, por materia prima, la suma de sus ítems por la
+cantidad de la receta del diseño de su producto base (el mismo cálculo que
+hace complete_process al consumir). Con cuatro consultas se cargan las OPs,
+las recetas de sus diseños, el stock por depósito y los nombres, y el resto
+se resuelve con NumPy:
+
+    recetas       diseños × materias primas
+    requerido     OPs × materias primas   (unidades de la OP × fila de su receta)
+    stock         materias primas × depósitos
+
+Las OPs se ordenan por fecha de necesidad (entrega estimada o, si no tiene,
+fecha de creación); la suma acumulada del requerido contra el stock total
+da, para cada materia prima que no alcanza, la primera OP y fecha en que
+falta.
+"""
+import numpy as np
+from django.db.models import Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+from .models import DesignMaterial, MateriaPrimaProveedor, ProductionOrder, RawMaterial
+
+CLOSED_STATUSES = ('Completada', 'Cancelada')
+DECIMALS = 4
+EPSILON = 1e-9
+
+
+def open_orders(tenant_id):
+    """OPs que todavía van a consumir materiales."""
+    return ProductionOrder.objects.filter(
+        tenant_id=tenant_id, base_product__design__isnull=False
+    ).exclude(status__in=CLOSED_STATUSES)
+
+
+def _load_orders(orders):
+    return list(
+        orders.annotate(
+            units=Sum('items__quantity'),
+            need_date=Coalesce('estimated_delivery_date', TruncDate('creation_date')),
+        ).filter(units__gt=0).order_by('need_date', 'id').values_list(
+            'id', 'base_product__design_id', 'units', 'need_date'
+        )
+    )
+
+
+def _index(values):
+    return {value: position for position, value in enumerate(values)}
+
+
+def plan(tenant_id, orders=None, warehouse_ids=None):
+    """
+    Requerimiento neto por materia prima de `orders` (por defecto, todas las
+    OPs abiertas) contra el stock de los lotes, opcionalmente sólo de
+    `warehouse_ids`.
+    """
+    orders = _load_orders(open_orders(tenant_id) if orders is None else orders)
+    if not orders:
+        return {'orders': 0, 'shortages': 0, 'materials': []}
+    order_ids, order_designs, units, need_dates = zip(*orders)
+
+    designs = _index(sorted(set(order_designs)))
+    lines = list(
+        DesignMaterial.objects.filter(tenant_id=tenant_id, design_id__in=designs)
+        .values_list('design_id', 'raw_material_id', 'quantity')
+    )
+    if not lines:
+        return {'orders': len(orders), 'shortages': 0, 'materials': []}
+    line_designs, line_materials, line_quantities = zip(*lines)
+    materials = _index(sorted(set(line_materials)))
+
+    recipes = np.zeros((len(designs), len(materials)))
+    np.add.at(
+        recipes,
+        ([designs[d] for d in line_designs], [materials[m] for m in line_materials]),
+        np.array(line_quantities, dtype=float),
+    )
+    required = np.array(units, dtype=float)[:, None] * recipes[[designs[d] for d in order_designs]]
+
+    lots = MateriaPrimaProveedor.objects.filter(tenant_id=tenant_id, raw_material_id__in=materials)
+    if warehouse_ids is not None:
+        lots = lots.filter(warehouse_id__in=warehouse_ids)
+    stock_rows = list(
+        lots.values('raw_material', 'warehouse').annotate(stock=Sum('current_stock'))
+        .values_list('raw_material', 'warehouse', 'warehouse__name', 'stock')
+    )
+    warehouses = _index(sorted({row[1] for row in stock_rows}, key=lambda pk: (pk is None, pk or 0)))
+    warehouse_names = {row[1]: row[2] for row in stock_rows}
+    stock = np.zeros((len(materials), len(warehouses)))
+    if stock_rows:
+        np.add.at(
+            stock,
+            ([materials[row[0]] for row in stock_rows], [warehouses[row[1]] for row in stock_rows]),
+            np.array([row[3] or 0 for row in stock_rows], dtype=float),
+        )
+
+    available = stock.sum(axis=1)
+    cumulative = np.cumsum(required, axis=0)
+    total = cumulative[-1]
+    short = cumulative > available + EPSILON
+    is_short = short.any(axis=0)
+    first_short = short.argmax(axis=0)
+    shortage = np.clip(total - available, 0, None)
+    orders_using = (required > 0).sum(axis=0)
+
+    names = {
+        pk: (name, unit)
+        for pk, name, unit in RawMaterial.objects.filter(pk__in=materials).values_list('id', 'name', 'unit_of_measure')
+    }
+    warehouse_order = list(warehouses)
+    rows = []
+    for material, column in materials.items():
+        name, unit = names.get(material, ('', ''))
+        row = {
+            'raw_material': material,
+            'name': name,
+            'unit_of_measure': unit,
+            'orders': int(orders_using[column]),
+            'required': round(float(total[column]), DECIMALS),
+            'available': round(float(available[column]), DECIMALS),
+            'shortage': round(float(shortage[column]), DECIMALS),
+            'short_from': None,
+            'short_order': None,
+            'stock_by_warehouse': [
+                {'warehouse': pk, 'warehouse_name': warehouse_names[pk], 'stock': round(float(value), DECIMALS)}
+                for pk, value in zip(warehouse_order, stock[column]) if value
+            ],
+        }
+        if is_short[column]:
+            position = int(first_short[column])
+            row['short_from'] = need_dates[position]
+            row['short_order'] = order_ids[position]
+        rows.append(row)
+    rows.sort(key=lambda row: (row['short_from'] is None, row['short_from'] or need_dates[0], -row['shortage'], row['name']))
+    return {'orders': len(orders), 'shortages': int(is_short.sum()), 'materials': rows}
+
+
+def shortages(tenant_id, orders=None, warehouse_ids=None):
+    """Sólo las materias primas que no alcanzan para las OPs."""
+    return [row for row in plan(tenant_id, orders, warehouse_ids)['materials'] if row['shortage'] > 0]
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TenantKeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (campo de orden, id).
+
+    Es opcional: sólo se activa cuando el cliente envía `page_size` o
+    `cursor`; sin esos parámetros el listado se devuelve completo como
+    antes. El campo de orden lo define la vista con `pagination_ordering`
+    (por ejemplo '-sale_date') y debe ser no nulo. El `id` desempata filas
+    con el mismo valor, así el cursor es estable aunque se inserten filas.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    default_page_size = 50
+    max_page_size = 500
+    default_ordering = '-id'
+    invalid_cursor_message = 'Invalid cursor'
+    signing_salt = 'core.pagination.keyset'
+
+    def get_page_size(self, request):
+        params = request.query_params
+        if self.page_size_query_param not in params and self.cursor_query_param not in params:
+            return None
+        try:
+            page_size = int(params.get(self.page_size_query_param, self.default_page_size))
+        except (TypeError, ValueError):
+            page_size = self.default_page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, view):
+        ordering = getattr(view, 'pagination_ordering', None) or self.default_ordering
+        descending = ordering.startswith('-')
+        return ordering.lstrip('-'), descending
+
+    def encode_cursor(self, field, instance):
+        # Admite instancias de modelo o filas de `.values()` (dicts).
+        if isinstance(instance, dict):
+            pk = instance[field.model._meta.pk.attname]
+            instance = SimpleNamespace(**instance)
+        else:
+            pk = instance.pk
+        if field.primary_key:
+            value = None
+        else:
+            value = field.value_to_string(instance)
+        return self.sign_cursor([value, pk])
+
+    def decode_cursor(self, field, token):
+        def parse(values):
+            value, pk = values
+            if value is not None:
+                value = field.to_python(value)
+            return value, int(pk)
+        return self.unsign_cursor(token, parse)
+
+    def sign_cursor(self, values):
+        return signing.dumps(values, salt=self.signing_salt)
+
+    def unsign_cursor(self, token, parse):
+        try:
+            return parse(signing.loads(token, salt=self.signing_salt))
+        except (signing.BadSignature, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        field_name, descending = self.get_ordering(view)
+        field = queryset.model._meta.get_field(field_name)
+        pk_name = queryset.model._meta.pk.name
+        prefix = '-' if descending else ''
+        lookup = 'lt' if descending else 'gt'
+
+        if field.primary_key:
+            queryset = queryset.order_by(f'{prefix}{pk_name}')
+        else:
+            queryset = queryset.order_by(f'{prefix}{field_name}', f'{prefix}{pk_name}')
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            value, pk = self.decode_cursor(field, token)
+            pk_filter = Q(**{f'{pk_name}__{lookup}': pk})
+            if field.primary_key:
+                queryset = queryset.filter(pk_filter)
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{field_name}__{lookup}': value}) | (Q(**{field_name: value}) & pk_filter)
+                )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(field, rows[-1]) if self.has_next else None
+        return rows
+
+    def paginate_rows(self, request, fetch_rows, cursor_key, parse_cursor):
+        """
+        Igual que paginate_queryset pero para consultas SQL propias (p. ej.
+        core.ledger). `fetch_rows(after, limit)` devuelve las filas ya
+        ordenadas posteriores a la clave `after`; `cursor_key(row)` arma esa
+        clave (serializable a JSON) y `parse_cursor` la reconstruye.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        token = request.query_params.get(self.cursor_query_param)
+        after = self.unsign_cursor(token, parse_cursor) if token else None
+
+        rows = fetch_rows(after, self.page_size + 1)
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_cursor = self.sign_cursor(cursor_key(rows[-1])) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,141 @@
+"""
+Órdenes de compra sugeridas a partir de los faltantes de core.mrp.
+
+Cada materia prima que no alcanza para las OPs abiertas se asigna a un
+proveedor de sus lotes (MateriaPrimaProveedor.supplier / cost):
+
+    cheapest   el lote de menor costo (los de costo 0 van al final);
+    preferred  el proveedor de la última compra de esa materia prima, si
+               tiene lotes de ella; si no, el más barato.
+
+Se descuenta lo que ya piden las órdenes abiertas (borradores y
+confirmadas sin recibir), así volver a generar no duplica. Con las sugerencias se arma una PurchaseOrder en estado
+'Borrador' por proveedor y todos sus ítems con dos bulk_create; los datos
+salen de las consultas de core.mrp más tres agregadas, sin consultas por
+ítem.
+"""
+import math
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Min, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from . import mrp
+from .bulk import bulk_create_items
+from .models import MateriaPrimaProveedor, PurchaseOrder, PurchaseOrderItem, RawMaterial
+
+DRAFT = PurchaseOrder.DRAFT
+RECEIVED = PurchaseOrder.RECEIVED
+STRATEGIES = ('cheapest', 'preferred')
+
+
+def _offers(tenant_id, material_ids):
+    """raw_material -> [(costo, supplier_id, nombre)] ordenado del más barato al más caro."""
+    offers = defaultdict(list)
+    rows = (
+        MateriaPrimaProveedor.objects.filter(
+            tenant_id=tenant_id, raw_material_id__in=material_ids, supplier__isnull=False
+        ).values('raw_material', 'supplier', 'supplier__name').annotate(cost=Min('cost'))
+        .values_list('raw_material', 'supplier', 'supplier__name', 'cost')
+    )
+    for material, supplier, name, cost in rows:
+        offers[material].append((cost, supplier, name))
+    for candidates in offers.values():
+        candidates.sort(key=lambda offer: (not offer[0], offer[0], offer[1]))
+    return offers
+
+
+def _last_suppliers(tenant_id, material_ids):
+    """raw_material -> proveedor de su última compra confirmada."""
+    last = PurchaseOrderItem.objects.filter(
+        raw_material=OuterRef('pk'), purchase_order__tenant_id=tenant_id
+    ).exclude(purchase_order__status=DRAFT).order_by('-purchase_order__order_date', '-id')
+    return dict(
+        RawMaterial.objects.filter(pk__in=material_ids)
+        .annotate(supplier=Subquery(last.values('purchase_order__supplier')[:1]))
+        .exclude(supplier=None).values_list('id', 'supplier')
+    )
+
+
+def _on_order(tenant_id, material_ids):
+    """Cantidad ya pedida en órdenes sin recibir (borradores incluidos), por materia prima."""
+    return dict(
+        PurchaseOrderItem.objects.filter(
+            purchase_order__tenant_id=tenant_id, raw_material_id__in=material_ids
+        ).exclude(purchase_order__status=RECEIVED).values('raw_material').annotate(total=Sum('quantity')).values_list('raw_material', 'total')
+    )
+
+
+def suggest(tenant_id, strategy='cheapest', orders=None, warehouse_ids=None):
+    """
+    Sugerencias agrupadas por proveedor para los faltantes de `orders` (por
+    defecto, todas las OPs abiertas). Devuelve {'suppliers': [...], 'unassigned': [...]}.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f'strategy must be one of {", ".join(STRATEGIES)}.')
+    shortages = mrp.shortages(tenant_id, orders, warehouse_ids)
+    material_ids = [row['raw_material'] for row in shortages]
+    if not material_ids:
+        return {'suppliers': [], 'unassigned': []}
+    offers = _offers(tenant_id, material_ids)
+    last_suppliers = _last_suppliers(tenant_id, material_ids) if strategy == 'preferred' else {}
+    on_order = _on_order(tenant_id, material_ids)
+
+    groups = {}
+    unassigned = []
+    for row in shortages:
+        material = row['raw_material']
+        # PurchaseOrderItem.quantity es entera: se redondea hacia arriba.
+        quantity = math.ceil(row['shortage'] - 1e-9) - (on_order.get(material) or 0)
+        if quantity <= 0:
+            continue
+        item = {
+            'raw_material': material, 'name': row['name'], 'unit_of_measure': row['unit_of_measure'],
+            'quantity': quantity, 'shortage': row['shortage'], 'needed_by': row['short_from'],
+        }
+        candidates = offers.get(material)
+        if not candidates:
+            unassigned.append(item)
+            continue
+        offer = candidates[0]
+        preferred = last_suppliers.get(material)
+        if preferred is not None:
+            offer = next((candidate for candidate in candidates if candidate[1] == preferred), offer)
+        cost, supplier, supplier_name = offer
+        item['unit_price'] = cost
+        group = groups.setdefault(supplier, {
+            'supplier': supplier, 'supplier_name': supplier_name, 'expected_delivery_date': None,
+            'total': Decimal('0.00'), 'items': [],
+        })
+        group['items'].append(item)
+        group['total'] += cost * quantity
+        if item['needed_by'] and (group['expected_delivery_date'] is None or item['needed_by'] < group['expected_delivery_date']):
+            group['expected_delivery_date'] = item['needed_by']
+    suppliers = sorted(groups.values(), key=lambda group: group['supplier_name'])
+    return {'suppliers': suppliers, 'unassigned': unassigned}
+
+
+def create_drafts(tenant_id, suggestions, user=None):
+    """Crea un borrador de PurchaseOrder por proveedor con sus ítems; devuelve las órdenes."""
+    groups = suggestions['suppliers']
+    if not groups:
+        return []
+    today = timezone.localdate()
+    with transaction.atomic():
+        orders = bulk_create_items(PurchaseOrder, [
+            PurchaseOrder(
+                tenant_id=tenant_id, supplier_id=group['supplier'], user=user, status=DRAFT,
+                expected_delivery_date=max(group['expected_delivery_date'] or today, today),
+            )
+            for group in groups
+        ])
+        bulk_create_items(PurchaseOrderItem, [
+            PurchaseOrderItem(
+                tenant_id=tenant_id, purchase_order=order, raw_material_id=item['raw_material'],
+                quantity=item['quantity'], unit_price=item['unit_price'],
+            )
+            for order, group in zip(orders, groups) for item in group['items']
+        ])
+    return orders
@@ -0,0 +1,294 @@
+"""
+Códigos QR de lotes de materia prima y órdenes de producción, sueltos o en
+hojas de etiquetas para imprimir.
+
+render_png() dibuja un QR; render_many() dibuja muchos: busca primero en el
+cache por el hash del contenido (el mismo texto da siempre la misma imagen,
+así que repetir etiquetas no cuesta nada) y los que faltan los reparte en un
+pool de procesos. compose_sheet() los ordena en hojas A4 con una leyenda
+debajo de cada código y devuelve un PDF (todas las hojas) o un PNG (una).
+
+store_png() guarda un PNG en el storage con el SHA-256 de sus bytes como
+nombre (qr/ab/abcd....png); los modelos guardan sólo ese hash y las
+respuestas una URL a core.views.QRCodeImageView, que lo sirve con cache de un año:
+el contenido de un nombre no cambia nunca.
+
+QRLabelSheetMixin agrega POST .../qr-labels/ a un TenantAwareViewSet:
+
+    {"ids": [12, 13, 14], "output": "pdf"}      (output: pdf | png; page para png)
+
+Un PNG es una sola hoja y un PDF de hasta SYNC_MAX_LABELS etiquetas se
+dibujan en la misma request, sin pool. Los PDF más grandes van a la cola de
+trabajos (tarea 'qr_labels.sheet', ver core.tasks): la respuesta es 202 con
+el id del Job, el worker guarda el PDF en el storage (qr/sheets/) y se baja
+con GET .../qr-labels/<job>/ cuando el Job está 'Completado'.
+"""
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+from PIL import Image, ImageDraw, ImageFont
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from . import jobs
+from .models import Job
+
+BOX_SIZE = 10
+BORDER = 4
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# Con menos códigos por dibujar no conviene levantar procesos.
+POOL_MIN_ITEMS = 24
+MAX_LABELS = 1000
+# Hasta una hoja se dibuja en la request; más, en un worker (ver sheet_job).
+SYNC_MAX_LABELS = 24
+SHEET_TASK = 'qr_labels.sheet'
+
+# Hoja A4 a 150 dpi.
+PAGE_SIZE = (1240, 1754)
+PAGE_MARGIN = 60
+COLUMNS = 4
+ROWS = 6
+CAPTION_HEIGHT = 36
+
+OUTPUTS = {'pdf': 'application/pdf', 'png': 'image/png'}
+
+STORAGE_PREFIX = 'qr'
+IMAGE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def production_order_text(order):
+    base_product_name = order.base_product.name if order.base_product else 'Sin producto base'
+    estimated_delivery = order.estimated_delivery_date.strftime('%d/%m/%Y') if order.estimated_delivery_date else 'No definida'
+    return (
+        f"━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+        f"  ORDEN DE PRODUCCIÓN\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"ID: #{order.id}\n"
+        f"Tipo: {order.op_type}\n"
+        f"Producto: {base_product_name}\n"
+        f"Entrega estimada: {estimated_delivery}\n"
+        f"Estado: {order.status}\n\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━━━━"
+    )
+
+
+def sourced_material_text(lot, total_stock):
+    supplier_name = lot.supplier.name if lot.supplier else 'Sin proveedor'
+    batch_number = lot.batch_number if lot.batch_number else 'Sin lote'
+    return (
+        f"Material: {lot.raw_material.name}\n"
+        f"Proveedor: {supplier_name}\n"
+        f"Lote: {batch_number}\n"
+        f"Stock del Lote: {lot.current_stock}\n"
+        f"Stock Total (Material): {total_stock}"
+    )
+
+
+def content_hash(text):
+    return hashlib.sha256(f'{BOX_SIZE}|{BORDER}|{text}'.encode()).hexdigest()
+
+
+def render_png(text):
+    """PNG del QR de `text` (sin cache; se ejecuta también en los procesos del pool)."""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=BOX_SIZE,
+        border=BORDER,
+    )
+    qr.add_data(text)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _cache():
+    return caches['default']
+
+
+def render_many(texts, processes=None):
+    """{hash: PNG} de cada texto distinto de `texts`."""
+    unique = {content_hash(text): text for text in texts}
+    cache = _cache()
+    found = cache.get_many([f'qr:{key}' for key in unique])
+    images = {key: found[f'qr:{key}'] for key in unique if f'qr:{key}' in found}
+    missing = [key for key in unique if key not in images]
+    if not missing:
+        return images
+
+    processes = processes or getattr(settings, 'QR_RENDER_PROCESSES', None) or os.cpu_count() or 1
+    if processes > 1 and len(missing) >= POOL_MIN_ITEMS:
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            rendered = pool.map(render_png, [unique[key] for key in missing], chunksize=8)
+            images.update(zip(missing, rendered))
+    else:
+        images.update((key, render_png(unique[key])) for key in missing)
+    cache.set_many({f'qr:{key}': images[key] for key in missing}, CACHE_TIMEOUT)
+    return images
+
+
+def storage_name(key):
+    return f'{STORAGE_PREFIX}/{key[:2]}/{key}.png'
+
+
+def sheet_storage_name(key, output):
+    return f'{STORAGE_PREFIX}/sheets/{key[:2]}/{key}.{output}'
+
+
+def store_sheet(content, output):
+    """Guarda una hoja compuesta en el worker; devuelve su nombre en el storage."""
+    name = sheet_storage_name(hashlib.sha256(content).hexdigest(), output)
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return name
+
+
+def store_png(png):
+    """Guarda el PNG (si no estaba) y devuelve su hash, que es la referencia a guardar en el modelo."""
+    key = hashlib.sha256(png).hexdigest()
+    name = storage_name(key)
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(png))
+    return key
+
+
+def image_url(key, request=None):
+    if not key:
+        return None
+    url = reverse('qr-code-image', args=[key])
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _pages(labels):
+    per_page = COLUMNS * ROWS
+    return [labels[start:start + per_page] for start in range(0, len(labels), per_page)] or [[]]
+
+
+def _draw_page(labels, images):
+    page = Image.new('RGB', PAGE_SIZE, 'white')
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default()
+    cell_width = (PAGE_SIZE[0] - 2 * PAGE_MARGIN) // COLUMNS
+    cell_height = (PAGE_SIZE[1] - 2 * PAGE_MARGIN) // ROWS
+    side = min(cell_width, cell_height - CAPTION_HEIGHT) - 10
+    for index, (text, caption) in enumerate(labels):
+        column, row = index % COLUMNS, index // COLUMNS
+        left = PAGE_MARGIN + column * cell_width
+        top = PAGE_MARGIN + row * cell_height
+        code = Image.open(BytesIO(images[content_hash(text)])).convert('RGB').resize((side, side), Image.NEAREST)
+        page.paste(code, (left + (cell_width - side) // 2, top))
+        caption = caption if len(caption) <= 40 else caption[:39] + '…'
+        width = draw.textlength(caption, font=font)
+        draw.text((left + (cell_width - width) / 2, top + side + 8), caption, fill='black', font=font)
+    return page
+
+
+def page_count(labels):
+    return len(_pages(labels))
+
+
+def compose_sheet(labels, output='pdf', page=1, processes=None):
+    """
+    Hoja(s) de etiquetas para `labels` [(texto del QR, leyenda), ...]. El PDF
+    lleva todas las hojas; el PNG sólo la número `page`.
+    """
+    pages = _pages(labels)
+    # Para el PNG sólo hacen falta los códigos de esa hoja.
+    wanted = pages[page - 1] if output == 'png' else labels
+    images = render_many([text for text, _ in wanted], processes)
+    buffer = BytesIO()
+    if output == 'png':
+        _draw_page(pages[page - 1], images).save(buffer, format='PNG')
+    else:
+        sheets = [_draw_page(chunk, images) for chunk in pages]
+        sheets[0].save(buffer, format='PDF', resolution=150, save_all=True, append_images=sheets[1:])
+    return buffer.getvalue()
+
+
+def sheet_job(tenant_id, labels, filename):
+    """Encola el PDF de `labels`; el resultado queda en Job.result (ver core.tasks)."""
+    return jobs.enqueue(SHEET_TASK, tenant_id, labels=[list(label) for label in labels], filename=filename)
+
+
+def _sheet_response(content, output, name, pages):
+    response = (
+        FileResponse(content, content_type=OUTPUTS[output]) if hasattr(content, 'read')
+        else HttpResponse(content, content_type=OUTPUTS[output])
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}.{output}"'
+    response['X-Total-Pages'] = str(pages)
+    return response
+
+
+class QRLabelSheetMixin:
+    """
+    Para TenantAwareViewSet. El viewset tiene que definir qr_labels(objects) ->
+    [(texto del QR, leyenda), ...] en el orden de los ids pedidos; se
+    controla al definir la clase.
+    """
+    qr_label_name = 'etiquetas'
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, 'qr_labels', None)):
+            raise TypeError(f'{cls.__name__} usa QRLabelSheetMixin y tiene que definir qr_labels(objects).')
+
+    @action(detail=False, methods=['post'], url_path='qr-labels')
+    def qr_label_sheet(self, request, *args, **kwargs):
+        ids = request.data.get('ids')
+        output = request.data.get('output', 'pdf')
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'Se espera una lista de ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > MAX_LABELS:
+            return Response({'error': f'Se admiten hasta {MAX_LABELS} etiquetas por hoja.'}, status=status.HTTP_400_BAD_REQUEST)
+        if output not in OUTPUTS:
+            return Response({'error': 'output must be pdf or png.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids = [int(pk) for pk in ids]
+            page = int(request.data.get('page', 1))
+        except (TypeError, ValueError):
+            return Response({'error': 'ids y page deben ser enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        objects = {obj.pk: obj for obj in self.get_queryset().filter(pk__in=ids)}
+        missing = [pk for pk in ids if pk not in objects]
+        if missing:
+            return Response({'error': 'Registros inexistentes.', 'ids': missing}, status=status.HTTP_404_NOT_FOUND)
+        labels = self.qr_labels([objects[pk] for pk in ids])
+        pages = page_count(labels)
+        if output == 'png' and not 1 <= page <= pages:
+            return Response({'error': f'page debe estar entre 1 y {pages}.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if output == 'pdf' and len(labels) > SYNC_MAX_LABELS:
+            job = sheet_job(self.get_tenant().id, labels, self.qr_label_name)
+            return Response({'job': job.id, 'status': job.status, 'pages': pages}, status=status.HTTP_202_ACCEPTED)
+        # En la request no se levantan procesos: hasta una hoja se dibuja acá mismo.
+        return _sheet_response(compose_sheet(labels, output, page, processes=1), output, self.qr_label_name, pages)
+
+    @action(detail=False, methods=['get'], url_path=r'qr-labels/(?P<job_id>\d+)')
+    def qr_label_sheet_result(self, request, job_id=None, *args, **kwargs):
+        """El PDF de una hoja encolada, cuando su Job terminó."""
+        job = Job.objects.filter(pk=job_id, tenant=self.get_tenant(), name=SHEET_TASK).first()
+        if job is None:
+            return Response({'error': 'No existe el trabajo.'}, status=status.HTTP_404_NOT_FOUND)
+        if job.status != 'Completado':
+            return Response({'job': job.id, 'status': job.status, 'error': job.error}, status=status.HTTP_409_CONFLICT)
+        result = job.result
+        try:
+            content = default_storage.open(result['file'], 'rb')
+        except FileNotFoundError:
+            return Response({'error': 'La hoja ya no está disponible.'}, status=status.HTTP_410_GONE)
+        return _sheet_response(content, result['output'], result['filename'], result['pages'])
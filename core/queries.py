@@ -0,0 +1,95 @@
+"""
+Expresiones reutilizables (Subquery/agregados) para anotar querysets
+en lugar de calcular valores fila por fila en los serializers.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Payment, PurchaseOrderItem, Transaction
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _sum_subquery(queryset, group_field, expression):
+    total = (
+        queryset
+        .order_by()
+        .values(group_field)
+        .annotate(total=Sum(expression, output_field=MONEY))
+        .values('total')[:1]
+    )
+    return Coalesce(Subquery(total, output_field=MONEY), Value(Decimal('0.00')), output_field=MONEY)
+
+
+def sale_paid_amount(sale_ref='pk'):
+    """
+    Total cobrado (transacciones positivas) de la venta referenciada por
+    `sale_ref` en el queryset externo, p. ej. 'pk' o 'order_note__sale'.
+    """
+    paid = Transaction.objects.filter(related_sale=OuterRef(sale_ref), amount__gt=0)
+    return _sum_subquery(paid, 'related_sale', 'amount')
+
+
+def purchase_order_total(order_ref='pk'):
+    """Suma de cantidad * precio unitario de los ítems de la orden de compra."""
+    items = PurchaseOrderItem.objects.filter(purchase_order=OuterRef(order_ref))
+    return _sum_subquery(items, 'purchase_order', F('quantity') * F('unit_price'))
+
+
+def purchase_order_paid(order_ref='pk'):
+    """Suma de los pagos registrados contra la orden de compra."""
+    payments = Payment.objects.filter(purchase_order=OuterRef(order_ref))
+    return _sum_subquery(payments, 'purchase_order', 'amount')
+
+
+AGING_BUCKETS = (
+    ('current', 0, 30),
+    ('days_31_60', 31, 60),
+    ('days_61_90', 61, 90),
+    ('over_90', 91, None),
+)
+
+
+def supplier_payables(purchase_orders, as_of, age_field='expected_delivery_date'):
+    """
+    Saldo pendiente por proveedor en tramos de antigüedad, en una sola
+    consulta agrupada sobre `purchase_orders`. La antigüedad se mide en días
+    desde `age_field` hasta `as_of`; las órdenes aún no vencidas caen en
+    'current'. Sólo cuentan las órdenes con saldo pendiente positivo.
+    """
+    orders = purchase_orders.annotate(
+        outstanding=purchase_order_total() - purchase_order_paid()
+    ).filter(outstanding__gt=0)
+
+    buckets = {}
+    for name, min_days, max_days in AGING_BUCKETS:
+        condition = Q()
+        if min_days:
+            condition &= Q(**{f'{age_field}__lte': as_of - datetime.timedelta(days=min_days)})
+        if max_days is not None:
+            condition &= Q(**{f'{age_field}__gte': as_of - datetime.timedelta(days=max_days)})
+        buckets[name] = Coalesce(Sum('outstanding', filter=condition, output_field=MONEY), Value(Decimal('0.00')), output_field=MONEY)
+
+    return (
+        orders
+        .order_by()
+        .values('supplier_id', supplier_name=F('supplier__name'))
+        .annotate(
+            total_outstanding=Sum('outstanding', output_field=MONEY),
+            open_orders=Count('id'),
+            oldest_date=Min(age_field),
+            **buckets,
+        )
+    )
+
+
+def payment_status(paid_amount, total_amount):
+    """Estado de pago de una venta a partir de lo cobrado y su total."""
+    if paid_amount >= total_amount:
+        return "Pagado"
+    elif paid_amount > 0:
+        return "Pago Parcial"
+    return "Pendiente de Pago"
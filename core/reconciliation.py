@@ -0,0 +1,193 @@
+"""
+Conciliación bancaria: empareja líneas de extracto (BankTransaction) con
+movimientos internos (Transaction, Payment a proveedores y Check).
+
+Una línea y un movimiento sólo pueden conciliarse si tienen el mismo importe
+(en valor absoluto y con el sentido esperado: un pago o un cheque propio es
+un débito) y las fechas están a lo sumo a DATE_WINDOW días. Entre esos
+candidatos el puntaje combina la cercanía de fechas y el parecido de las
+descripciones; la asignación es golosa de mayor a menor puntaje, así que
+cada línea y cada movimiento se usan una sola vez.
+
+Los candidatos se leen en una consulta por tipo (sólo los que aún no están
+conciliados y caen en el rango de fechas de las líneas) y se agrupan por
+importe, ordenados por fecha: cada línea busca con bisect en su grupo en
+lugar de recorrer todos los movimientos.
+"""
+import bisect
+import datetime
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+from difflib import SequenceMatcher
+
+from django.db import transaction
+
+from .bulk import notify_bulk_created
+from .models import BankReconciliation, BankTransaction, Check, Payment, Transaction
+
+DATE_WINDOW = 5
+MIN_SCORE = 0.5
+DATE_WEIGHT = 0.5
+DESCRIPTION_WEIGHT = 0.5
+
+TRANSACTION, PAYMENT, CHECK = 'transaction', 'payment', 'check'
+# Columna de BankReconciliation para cada tipo de movimiento.
+TARGET_FIELDS = {TRANSACTION: 'transaction_id', PAYMENT: 'payment_id', CHECK: 'check_record_id'}
+
+# direction: 1 crédito, -1 débito, 0 cualquiera.
+Candidate = namedtuple('Candidate', 'kind pk date cents direction text')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def similarity(a, b):
+    """Parecido entre dos descripciones ya normalizadas, de 0 a 1."""
+    if not a or not b:
+        return 0.0
+    words_a, words_b = set(a.split()), set(b.split())
+    overlap = len(words_a & words_b) / min(len(words_a), len(words_b))
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    if matcher.real_quick_ratio() <= overlap:
+        return overlap
+    return max(overlap, matcher.ratio())
+
+
+def _cents(amount):
+    return int(abs(amount) * 100)
+
+
+def _direction(amount):
+    return 1 if amount > 0 else -1
+
+
+def _candidates(tenant_id, start, end):
+    transactions = Transaction.objects.filter(
+        tenant_id=tenant_id, date__range=(start, end), reconciliation__isnull=True
+    ).values_list('id', 'date', 'amount', 'description', 'account__account_type', 'account__name')
+    for pk, date, amount, description, account_type, account in transactions:
+        direction = {'Ingreso': 1, 'Egreso': -1}.get(account_type, 0)
+        yield Candidate(TRANSACTION, pk, date, _cents(amount), direction, normalize(f'{description or ""} {account}'))
+
+    payments = Payment.objects.filter(
+        tenant_id=tenant_id, date__range=(start, end), reconciliation__isnull=True
+    ).values_list('id', 'date', 'amount', 'payment_method', 'purchase_order__supplier__name')
+    for pk, date, amount, method, supplier in payments:
+        yield Candidate(PAYMENT, pk, date, _cents(amount), -1, normalize(f'{method} {supplier or ""}'))
+
+    checks = Check.objects.filter(
+        tenant_id=tenant_id, due_date__range=(start, end), reconciliation__isnull=True
+    ).exclude(status__in=('Anulado', 'Rechazado')).values_list(
+        'id', 'due_date', 'amount', 'is_own', 'order_number', 'issuer', 'receiver', 'received_from'
+    )
+    for pk, date, amount, is_own, number, *names in checks:
+        text = ' '.join(['cheque', number] + [name for name in names if name])
+        yield Candidate(CHECK, pk, date, _cents(amount), -1 if is_own else 1, normalize(text))
+
+
+class CandidateIndex:
+    """Movimientos agrupados por importe y ordenados por fecha."""
+
+    def __init__(self, candidates):
+        buckets = defaultdict(list)
+        for candidate in candidates:
+            buckets[candidate.cents].append(candidate)
+        self.buckets = {}
+        for cents, group in buckets.items():
+            group.sort(key=lambda candidate: (candidate.date, candidate.kind, candidate.pk))
+            self.buckets[cents] = ([candidate.date.toordinal() for candidate in group], group)
+
+    def __len__(self):
+        return sum(len(group) for _, group in self.buckets.values())
+
+    def around(self, cents, date, window):
+        ordinals, group = self.buckets.get(cents, ((), ()))
+        day = date.toordinal()
+        return group[bisect.bisect_left(ordinals, day - window):bisect.bisect_right(ordinals, day + window)]
+
+
+def score(line_date, line_text, candidate, window=DATE_WINDOW):
+    days = abs((line_date - candidate.date).days)
+    date_score = 1 - days / (window + 1)
+    return DATE_WEIGHT * date_score + DESCRIPTION_WEIGHT * similarity(line_text, candidate.text)
+
+
+def reconcile(tenant_id, statement_id=None, start_date=None, end_date=None, window=DATE_WINDOW, min_score=MIN_SCORE):
+    """
+    Concilia las líneas sin conciliar del tenant (de un extracto o de un rango
+    de fechas) y guarda las conciliaciones. Devuelve un resumen.
+    """
+    lines = BankTransaction.objects.filter(tenant_id=tenant_id, reconciliation__isnull=True)
+    if statement_id:
+        lines = lines.filter(bank_statement_id=statement_id)
+    if start_date:
+        lines = lines.filter(date__gte=start_date)
+    if end_date:
+        lines = lines.filter(date__lte=end_date)
+    lines = list(lines.values_list('id', 'date', 'amount', 'description'))
+    summary = {'bank_lines': len(lines), 'candidates': 0, 'matched': 0}
+    if not lines:
+        summary['unmatched'] = 0
+        return summary
+
+    margin = datetime.timedelta(days=window)
+    first = min(date for _, date, _, _ in lines) - margin
+    last = max(date for _, date, _, _ in lines) + margin
+    index = CandidateIndex(_candidates(tenant_id, first, last))
+    summary['candidates'] = len(index)
+
+    pairs = []
+    for pk, date, amount, description in lines:
+        if not amount:
+            continue
+        text, direction = normalize(description), _direction(amount)
+        for candidate in index.around(_cents(amount), date, window):
+            if candidate.direction and candidate.direction != direction:
+                continue
+            value = score(date, text, candidate, window)
+            if value >= min_score:
+                pairs.append((-value, abs((date - candidate.date).days), pk, candidate.kind, candidate.pk))
+
+    pairs.sort()
+    used_lines, used_targets, matches = set(), set(), []
+    for negative_score, _, line_pk, kind, target_pk in pairs:
+        if line_pk in used_lines or (kind, target_pk) in used_targets:
+            continue
+        used_lines.add(line_pk)
+        used_targets.add((kind, target_pk))
+        matches.append(BankReconciliation(
+            tenant_id=tenant_id, bank_transaction_id=line_pk, score=Decimal(f'{-negative_score:.3f}'),
+            **{TARGET_FIELDS[kind]: target_pk}
+        ))
+
+    with transaction.atomic():
+        # ignore_conflicts: otra conciliación concurrente pudo tomar la línea o el movimiento.
+        BankReconciliation.objects.bulk_create(matches, batch_size=500, ignore_conflicts=True)
+        notify_bulk_created(BankReconciliation, matches)
+    summary['matched'] = len(matches)
+    summary['unmatched'] = len(lines) - len(matches)
+    return summary
+
+
+def unmatched(tenant_id, start_date=None, end_date=None):
+    """Querysets de líneas de extracto y movimientos internos aún sin conciliar."""
+    ranges = {
+        'bank_transactions': (BankTransaction, 'date'),
+        'transactions': (Transaction, 'date'),
+        'payments': (Payment, 'date'),
+        'checks': (Check, 'due_date'),
+    }
+    result = {}
+    for key, (model, date_field) in ranges.items():
+        queryset = model.objects.filter(tenant_id=tenant_id, reconciliation__isnull=True)
+        if start_date:
+            queryset = queryset.filter(**{f'{date_field}__gte': start_date})
+        if end_date:
+            queryset = queryset.filter(**{f'{date_field}__lte': end_date})
+        result[key] = queryset.order_by(date_field, 'id')
+    result['checks'] = result['checks'].exclude(status__in=('Anulado', 'Rechazado'))
+    return result
@@ -0,0 +1,134 @@
+"""
+Cache de respuestas por tenant para los dashboards y las listas de
+referencia que cambian poco (categorías, talles, colores, procesos, etc.).
+
+Usa el alias de cache 'responses' (ver CACHES en settings), así el backend
+se cambia por configuración: memoria local, archivos o Redis. Cada clave
+lleva la generación actual del par (tenant, scope); las señales de
+core.signals la renuevan al escribir los modelos de SCOPES y las entradas
+viejas dejan de leerse y vencen solas.
+
+Los contadores de aciertos y fallos por tenant y scope se guardan en el
+mismo cache; /api/cache-stats/ muestra sólo los del tenant de la request.
+"""
+import hashlib
+import uuid
+
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .models import (
+    Category, Size, Color, Process, PaymentMethodType, FinancialCostRule, Bank, Warehouse, Factory,
+    PurchaseOrder, Inventory, Account, CashRegister, Local, Design, RawMaterial
+)
+from .rollups import SOURCES as ROLLUP_SOURCES
+
+CACHE_ALIAS = 'responses'
+
+# scope -> modelos cuya escritura invalida las respuestas del scope.
+SCOPES = {
+    'categories': (Category,),
+    'sizes': (Size,),
+    'colors': (Color,),
+    'processes': (Process,),
+    'payment-method-types': (PaymentMethodType,),
+    'financial-cost-rules': (FinancialCostRule, PaymentMethodType, Bank),
+    'warehouses': (Warehouse, Factory),
+    'dashboards': tuple(ROLLUP_SOURCES) + (
+        PurchaseOrder, Inventory, Account, CashRegister, Local, Design, Process, RawMaterial,
+    ),
+}
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def scopes_for(model):
+    return [scope for scope, models in SCOPES.items() if model in models]
+
+
+def _generation_key(tenant_id, scope):
+    return f'generation:{tenant_id}:{scope}'
+
+
+def invalidate(tenant_id, scope):
+    get_cache().set(_generation_key(tenant_id, scope), uuid.uuid4().hex, None)
+
+
+def _stats_key(tenant_id, scope, outcome):
+    return f'stats:{tenant_id}:{scope}:{outcome}'
+
+
+def _count(tenant_id, scope, outcome):
+    cache, key = get_cache(), _stats_key(tenant_id, scope, outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:  # la clave venció entre add() e incr()
+            cache.add(key, 1, None)
+
+
+def stats(tenant_id):
+    cache = get_cache()
+    keys = [_stats_key(tenant_id, scope, outcome) for scope in SCOPES for outcome in ('hits', 'misses')]
+    values = cache.get_many(keys)
+    result = {}
+    for scope in SCOPES:
+        hits = values.get(_stats_key(tenant_id, scope, 'hits'), 0)
+        misses = values.get(_stats_key(tenant_id, scope, 'misses'), 0)
+        total = hits + misses
+        result[scope] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / total * 100, 2) if total else 0}
+    return result
+
+
+def cached_data(request, tenant_id, scope, compute):
+    """
+    Devuelve los datos de la respuesta para `request` desde el cache o, si no
+    están, los calcula con `compute()` y los guarda (salvo que devuelva None).
+    La clave incluye la ruta y los parámetros de la consulta.
+    """
+    cache = get_cache()
+    generation = cache.get_or_set(_generation_key(tenant_id, scope), lambda: uuid.uuid4().hex, None)
+    fingerprint = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+    key = f'response:{tenant_id}:{scope}:{generation}:{fingerprint}'
+    data = cache.get(key)
+    if data is not None:
+        _count(tenant_id, scope, 'hits')
+        return data
+    _count(tenant_id, scope, 'misses')
+    data = compute()
+    if data is not None:
+        cache.set(key, data)
+    return data
+
+
+class CachedResponseMixin:
+    """
+    Para TenantAwareViewSet: cachea list y retrieve bajo `cache_scope`.
+    Las respuestas de error no se guardan.
+    """
+    cache_scope = None
+    cached_actions = ('list', 'retrieve')
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
+
+    def _cached_response(self, request, respond):
+        tenant = self.get_tenant()
+        if not self.cache_scope or self.action not in self.cached_actions or tenant is None:
+            return respond()
+        failed = []
+
+        def compute():
+            response = respond()
+            if response.status_code != 200:
+                failed.append(response)
+                return None
+            return response.data
+
+        data = cached_data(request, tenant.id, self.cache_scope, compute)
+        return failed[0] if failed else Response(data)
@@ -0,0 +1,294 @@
+"""
+Mantenimiento incremental de las tablas diarias de los dashboards
+(DailySalesRollup, DailyTransactionRollup, DailyProcessRollup,
+DailyProductionRollup y DailyExpenseRollup).
+
+Cada modelo de origen declara qué campos sigue y cómo se traducen en
+aportes (rollup, clave, deltas). Las señales de core.signals toman una foto
+de esos campos al cargar la instancia y, al guardar o borrar, aplican la
+diferencia entre el aporte anterior y el nuevo con UPDATE ... SET x = x + d.
+
+`QuerySet.update()` y `bulk_create()` no disparan señales: las altas con
+bulk_create pasan por record_bulk_create() (ver core.bulk); después de un
+update() sobre estos modelos hay que llamar a rebuild() (o
+`manage.py rebuild_rollups`).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    Sale, Transaction, ProductionProcessLog, ProductionOrder, ProductionOrderItem, PurchaseOrder,
+    PurchaseOrderItem, Salary, Product, DailySalesRollup, DailyTransactionRollup, DailyProcessRollup,
+    DailyProductionRollup, DailyExpenseRollup
+)
+from .queries import MONEY
+
+SNAPSHOT_ATTR = '_rollup_snapshot'
+
+VALUE_FIELDS = {
+    DailySalesRollup: ('total_amount', 'sale_count'),
+    DailyTransactionRollup: ('amount', 'transaction_count'),
+    DailyProcessRollup: ('quantity_processed', 'quantity_defective'),
+    DailyProductionRollup: ('quantity',),
+    DailyExpenseRollup: ('amount',),
+}
+
+
+def _day(value):
+    if value is None or not hasattr(value, 'hour'):
+        return value
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def _money(value):
+    return MONEY.to_python(value or 0)
+
+
+def _fetch(model, pk, *fields):
+    return model.objects.filter(pk=pk).values(*fields).first()
+
+
+def _memoized_fetch():
+    """_fetch con memoria, para no repetir la misma lectura en cada fila de un lote."""
+    memo = {}
+
+    def fetch(model, pk, *fields):
+        if (model, pk, fields) not in memo:
+            memo[model, pk, fields] = _fetch(model, pk, *fields)
+        return memo[model, pk, fields]
+    return fetch
+
+
+def _sale(pk, values, fetch):
+    key = {
+        'date': _day(values['sale_date']),
+        'local_id': values['local_id'],
+        'is_ecommerce_sale': values['is_ecommerce_sale'],
+        'ecommerce_platform': values['ecommerce_platform'],
+    }
+    return [(DailySalesRollup, key, {'total_amount': _money(values['total_amount']), 'sale_count': 1})]
+
+
+def _transaction(pk, values, fetch):
+    key = {'date': values['date'], 'account_id': values['account_id'], 'cash_register_id': values['cash_register_id']}
+    return [(DailyTransactionRollup, key, {'amount': _money(values['amount']), 'transaction_count': 1})]
+
+
+def _process_log(pk, values, fetch):
+    key = {'date': _day(values['start_time']), 'process_id': values['process_id']}
+    deltas = {'quantity_processed': values['quantity_processed'] or 0, 'quantity_defective': values['quantity_defective'] or 0}
+    return [(DailyProcessRollup, key, deltas)]
+
+
+def _production_key(order, design_id):
+    return {'date': _day(order['creation_date']), 'design_id': design_id, 'op_type': order['op_type']}
+
+
+def _production_order_item(pk, values, fetch):
+    order = fetch(ProductionOrder, values['production_order_id'], 'creation_date', 'op_type')
+    if order is None:
+        return []
+    product = fetch(Product, values['product_id'], 'design_id')
+    design_id = product['design_id'] if product else None
+    return [(DailyProductionRollup, _production_key(order, design_id), {'quantity': values['quantity'] or 0})]
+
+
+def _production_order(pk, values, fetch):
+    # Mueve los ítems ya cargados si cambia la fecha o el tipo de la OP; los
+    # ítems nuevos o borrados se registran con su propio aporte.
+    items = (
+        ProductionOrderItem.objects.filter(production_order_id=pk)
+        .values('product__design_id').annotate(quantity=Sum('quantity')).order_by()
+    )
+    return [
+        (DailyProductionRollup, _production_key(values, item['product__design_id']), {'quantity': item['quantity'] or 0})
+        for item in items
+    ]
+
+
+def _purchase_order_item(pk, values, fetch):
+    order = fetch(PurchaseOrder, values['purchase_order_id'], 'order_date', 'status')
+    # Los borradores (compras sugeridas) no son gasto hasta confirmarse.
+    if order is None or order['status'] == PurchaseOrder.DRAFT:
+        return []
+    amount = _money(values['quantity']) * _money(values['unit_price'])
+    return [(DailyExpenseRollup, {'date': order['order_date'], 'source': 'Compras'}, {'amount': amount})]
+
+
+def _purchase_order(pk, values, fetch):
+    # Como en _production_order: confirmar un borrador o cambiar la fecha
+    # mueve el aporte de los ítems ya cargados.
+    if values['status'] == PurchaseOrder.DRAFT:
+        return []
+    amount = (
+        PurchaseOrderItem.objects.filter(purchase_order_id=pk)
+        .aggregate(amount=Sum(F('quantity') * F('unit_price'), output_field=MONEY))['amount']
+    )
+    if not amount:
+        return []
+    return [(DailyExpenseRollup, {'date': values['order_date'], 'source': 'Compras'}, {'amount': _money(amount)})]
+
+
+def _salary(pk, values, fetch):
+    return [(DailyExpenseRollup, {'date': values['pay_date'], 'source': 'Sueldos'}, {'amount': _money(values['amount'])})]
+
+
+class RollupSource:
+    def __init__(self, fields, contributions, track_delete=True):
+        self.fields = ('tenant_id',) + fields
+        self.contributions = contributions
+        self.track_delete = track_delete
+
+
+SOURCES = {
+    Sale: RollupSource(('sale_date', 'local_id', 'is_ecommerce_sale', 'ecommerce_platform', 'total_amount'), _sale),
+    Transaction: RollupSource(('date', 'account_id', 'cash_register_id', 'amount'), _transaction),
+    ProductionProcessLog: RollupSource(('start_time', 'process_id', 'quantity_processed', 'quantity_defective'), _process_log),
+    ProductionOrderItem: RollupSource(('production_order_id', 'product_id', 'quantity'), _production_order_item),
+    # El borrado de una OP borra sus ítems en cascada y ellos descuentan su aporte.
+    ProductionOrder: RollupSource(('creation_date', 'op_type'), _production_order, track_delete=False),
+    PurchaseOrderItem: RollupSource(('purchase_order_id', 'quantity', 'unit_price'), _purchase_order_item),
+    # Igual que ProductionOrder: sus ítems borrados en cascada descuentan su aporte.
+    PurchaseOrder: RollupSource(('order_date', 'status'), _purchase_order, track_delete=False),
+    Salary: RollupSource(('pay_date', 'amount'), _salary),
+}
+
+
+def snapshot(instance):
+    """Foto de los campos seguidos; None si la instancia es nueva o tiene campos diferidos."""
+    source = SOURCES[type(instance)]
+    if instance.pk is None or any(field not in instance.__dict__ for field in source.fields):
+        return None
+    return {field: instance.__dict__[field] for field in source.fields}
+
+
+def load_snapshot(instance):
+    """Antes de guardar: si la foto falta (campos diferidos), se lee de la base."""
+    if instance.pk is None or getattr(instance, SNAPSHOT_ATTR, None) is not None:
+        return
+    source = SOURCES[type(instance)]
+    setattr(instance, SNAPSHOT_ATTR, type(instance)._base_manager.filter(pk=instance.pk).values(*source.fields).first())
+
+
+def _current(instance):
+    return {field: getattr(instance, field) for field in SOURCES[type(instance)].fields}
+
+
+def record_save(instance, created):
+    source = SOURCES[type(instance)]
+    old = None if created else getattr(instance, SNAPSHOT_ATTR, None)
+    new = _current(instance)
+    if old != new:
+        changes = []
+        if old is not None:
+            changes.append((instance.pk, old, -1))
+        changes.append((instance.pk, new, 1))
+        _apply(source, changes)
+    setattr(instance, SNAPSHOT_ATTR, new)
+
+
+def record_delete(instance):
+    source = SOURCES[type(instance)]
+    if source.track_delete:
+        _apply(source, [(instance.pk, getattr(instance, SNAPSHOT_ATTR, None) or _current(instance), -1)])
+
+
+def record_bulk_create(model, instances):
+    """Aporte de filas nuevas insertadas con bulk_create: un add() por clave, no por fila."""
+    changes = []
+    for instance in instances:
+        new = _current(instance)
+        changes.append((instance.pk, new, 1))
+        setattr(instance, SNAPSHOT_ATTR, new)
+    _apply(SOURCES[model], changes, _memoized_fetch())
+
+
+def _apply(source, changes, fetch=_fetch):
+    totals = defaultdict(lambda: defaultdict(int))
+    for pk, values, sign in changes:
+        for rollup, key, deltas in source.contributions(pk, values, fetch):
+            bucket = totals[(rollup, values['tenant_id'], tuple(sorted(key.items())))]
+            for field, delta in deltas.items():
+                bucket[field] += sign * delta
+
+    for (rollup, tenant_id, key), deltas in totals.items():
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if deltas:
+            add(rollup, tenant_id, dict(key), deltas)
+
+
+def add(rollup, tenant_id, key, deltas):
+    """
+    Suma `deltas` a la fila de `key`, creándola si todavía no existe. Si una
+    resta deja todos los valores en cero se borra la fila, como si la clave
+    no tuviera movimientos.
+    """
+    pk = rollup.objects.filter(tenant_id=tenant_id, **key).values_list('pk', flat=True).first()
+    if pk is None:
+        rollup.objects.create(tenant_id=tenant_id, **key, **deltas)
+        return
+    rollup.objects.filter(pk=pk).update(**{field: F(field) + delta for field, delta in deltas.items()})
+    if any(delta < 0 for delta in deltas.values()):
+        rollup.objects.filter(pk=pk, **{field: 0 for field in VALUE_FIELDS[rollup]}).delete()
+
+
+def _rebuild_rows(tenant_filter):
+    sales = (
+        Sale.objects.filter(**tenant_filter).annotate(day=TruncDate('sale_date'))
+        .values('tenant_id', 'day', 'local_id', 'is_ecommerce_sale', 'ecommerce_platform')
+        .annotate(total_amount=Sum('total_amount'), sale_count=Count('id')).order_by()
+    )
+    yield DailySalesRollup, sales
+
+    transactions = (
+        Transaction.objects.filter(**tenant_filter)
+        .values('tenant_id', 'account_id', 'cash_register_id', day=F('date'))
+        .annotate(amount=Sum('amount'), transaction_count=Count('id')).order_by()
+    )
+    yield DailyTransactionRollup, transactions
+
+    process_logs = (
+        ProductionProcessLog.objects.filter(**tenant_filter).annotate(day=TruncDate('start_time'))
+        .values('tenant_id', 'day', 'process_id')
+        .annotate(quantity_processed=Sum('quantity_processed'), quantity_defective=Sum('quantity_defective')).order_by()
+    )
+    yield DailyProcessRollup, process_logs
+
+    production = (
+        ProductionOrderItem.objects.filter(**tenant_filter).annotate(day=TruncDate('production_order__creation_date'))
+        .values('tenant_id', 'day', design_id=F('product__design_id'), op_type=F('production_order__op_type'))
+        .annotate(quantity=Sum('quantity')).order_by()
+    )
+    yield DailyProductionRollup, production
+
+    purchases = (
+        PurchaseOrderItem.objects.filter(**tenant_filter).exclude(purchase_order__status=PurchaseOrder.DRAFT)
+        .values('tenant_id', day=F('purchase_order__order_date'))
+        .annotate(amount=Sum(F('quantity') * F('unit_price'), output_field=MONEY)).order_by()
+    )
+    yield DailyExpenseRollup, ({**row, 'source': 'Compras'} for row in purchases if row['day'])
+
+    salaries = (
+        Salary.objects.filter(**tenant_filter)
+        .values('tenant_id', day=F('pay_date'))
+        .annotate(amount=Sum('amount')).order_by()
+    )
+    yield DailyExpenseRollup, ({**row, 'source': 'Sueldos'} for row in salaries)
+
+
+@transaction.atomic
+def rebuild(tenant_id=None):
+    """Recalcula desde cero las tablas diarias de un tenant (o de todos)."""
+    tenant_filter = {'tenant_id': tenant_id} if tenant_id else {}
+    for rollup in VALUE_FIELDS:
+        rollup.objects.filter(**tenant_filter).delete()
+    created = 0
+    for rollup, rows in _rebuild_rows(tenant_filter):
+        objs = [rollup(date=row.pop('day'), **row) for row in rows]
+        rollup.objects.bulk_create(objs, batch_size=1000)
+        created += len(objs)
+    return created
@@ -10,12 +10,15 @@ from .models import (
     RawMaterial, Brand, MateriaPrimaProveedor, PedidoMaterial, 
     ProductionProcessLog, Local, Sale, Inventory, 
     Supplier, PurchaseOrder, PurchaseOrderItem, Account, CashRegister, Transaction, 
-    Client, Invoice, Payment, BankStatement, BankTransaction, Bank, Check, 
+    Client, Invoice, Payment, BankStatement, BankTransaction, BankReconciliation, Bank, Check, 
     PaymentMethodType, FinancialCostRule, Factory, EmployeeRole, Employee, 
     Salary, Vacation, Permit, MedicalRecord, Quotation, QuotationItem, StockAdjustment,
     Design, DesignMaterial, DesignProcess, SaleItem, DeliveryNote, DeliveryNoteItem, DesignFile, ProductFile,
-    Category, Size, Color, DesignSize, Contact, Warehouse
+    Category, Size, Color, DesignSize, Contact, Warehouse, Job, CostHistory
 )
+from .bulk import bulk_create_items
+from . import design_costs, qr_labels
+from .queries import payment_status
 
 # --- Base and Helper Serializers ---
 
@@ -90,17 +93,24 @@ class DesignSerializer(TenantAwareSerializer):
         with transaction.atomic():
             design = Design.objects.create(**validated_data)
             design.sizes.set(sizes_data)
-
-            for material_data in materials_data:
-                DesignMaterial.objects.create(design=design, tenant=design.tenant, **material_data)
-            
-            for process_data in processes_data:
-                DesignProcess.objects.create(design=design, tenant=design.tenant, **process_data)
-            
-            design.calculate_cost()
+            self._create_recipe(design, materials_data, processes_data)
 
         return design
 
+    def _create_recipe(self, design, materials_data, processes_data):
+        # bulk_create no dispara las señales: el costo se marca y se calcula una vez al final.
+        if materials_data:
+            bulk_create_items(DesignMaterial, [
+                DesignMaterial(design=design, tenant=design.tenant, **material_data) for material_data in materials_data
+            ])
+        if processes_data:
+            bulk_create_items(DesignProcess, [
+                DesignProcess(design=design, tenant=design.tenant, **process_data) for process_data in processes_data
+            ])
+        design_costs.mark_dirty(design.pk)
+        design_costs.flush()
+        design.refresh_from_db(fields=['calculated_cost'])
+
     def update(self, instance, validated_data):
         materials_data = validated_data.pop('designmaterial_set', None)
         processes_data = validated_data.pop('designprocess_set', None)
@@ -119,15 +129,9 @@ class DesignSerializer(TenantAwareSerializer):
 
             if materials_data is not None:
                 instance.designmaterial_set.all().delete()
-                for material_data in materials_data:
-                    DesignMaterial.objects.create(design=instance, tenant=instance.tenant, **material_data)
-
             if processes_data is not None:
                 instance.designprocess_set.all().delete()
-                for process_data in processes_data:
-                    DesignProcess.objects.create(design=instance, tenant=instance.tenant, **process_data)
-            
-            instance.calculate_cost()
+            self._create_recipe(instance, materials_data, processes_data)
 
         return instance
 
@@ -255,19 +259,17 @@ class SaleForOrderNoteSerializer(serializers.ModelSerializer):
     def get_payment_status(self, obj):
         """
         Calcula el estado del pago de la venta basado en las transacciones asociadas.
+        Si la vista ya anotó lo cobrado (`paid_amount_total`) no consulta de nuevo.
         """
-        paid_amount = Transaction.objects.filter(
-            tenant=obj.tenant,
-            related_sale=obj,
-            amount__gt=0
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        if paid_amount >= obj.total_amount:
-            return "Pagado"
-        elif paid_amount > 0:
-            return "Pago Parcial"
-        else:
-            return "Pendiente de Pago"
+        paid_amount = getattr(obj, 'paid_amount_total', None)
+        if paid_amount is None:
+            paid_amount = Transaction.objects.filter(
+                tenant_id=obj.tenant_id,
+                related_sale=obj,
+                amount__gt=0
+            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+
+        return payment_status(paid_amount, obj.total_amount)
 
 
 class OrderNoteSerializer(TenantAwareSerializer):
@@ -298,6 +300,12 @@ class OrderNoteSerializer(TenantAwareSerializer):
         ]
         read_only_fields = ('order_date',)
 
+    def to_representation(self, instance):
+        # Lo cobrado puede venir anotado en la nota (ver `sale_paid_amount`).
+        if instance.sale_id and hasattr(instance, 'sale_paid_amount'):
+            instance.sale.paid_amount_total = instance.sale_paid_amount
+        return super().to_representation(instance)
+
     def validate_sale_id(self, value):
         """
         Asegura que la venta no tenga ya una nota de pedido asociada.
@@ -337,13 +345,13 @@ class QuotationSerializer(TenantAwareSerializer):
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        quotation = Quotation.objects.create(**validated_data)
-        total_amount = 0
-        for item_data in items_data:
-            total_amount += item_data['quantity'] * item_data['unit_price']
-            QuotationItem.objects.create(quotation=quotation, tenant=quotation.tenant, **item_data)
-        quotation.total_amount = total_amount
-        quotation.save()
+        items = [QuotationItem(tenant=validated_data['tenant'], **item_data) for item_data in items_data]
+        validated_data['total_amount'] = sum((item.quantity * item.unit_price for item in items), 0)
+        with transaction.atomic():
+            quotation = Quotation.objects.create(**validated_data)
+            for item in items:
+                item.quotation = quotation
+            bulk_create_items(QuotationItem, items)
         return quotation
 
 class SaleSerializer(TenantAwareSerializer):
@@ -364,17 +372,20 @@ class SaleSerializer(TenantAwareSerializer):
     def get_payment_method_name(self, obj):
         try:
             pm_id = int(obj.payment_method)
-            pm_type = PaymentMethodType.objects.get(pk=pm_id)
-            return pm_type.name
-        except (ValueError, TypeError, PaymentMethodType.DoesNotExist):
+        except (ValueError, TypeError):
             return obj.payment_method or 'N/A'
+        # En listados el mismo serializer hijo procesa todas las filas:
+        # se memorizan los nombres para no consultar una vez por venta.
+        cache = self.__dict__.setdefault('_payment_method_names', {})
+        if pm_id not in cache:
+            cache[pm_id] = PaymentMethodType.objects.filter(pk=pm_id).values_list('name', flat=True).first()
+        return cache[pm_id] or obj.payment_method or 'N/A'
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')
         with transaction.atomic():
             sale = Sale.objects.create(**validated_data)
-            for item_data in items_data:
-                SaleItem.objects.create(sale=sale, tenant=sale.tenant, **item_data)
+            bulk_create_items(SaleItem, [SaleItem(sale=sale, tenant=sale.tenant, **item_data) for item_data in items_data])
         return sale
 
 # --- Other Model Serializers ---
@@ -462,6 +473,26 @@ class ProductSerializer(TenantAwareSerializer):
 
         return instance
 
+class ProductCompactSerializer(serializers.Serializer):
+    """
+    Representación liviana del catálogo para listados: sólo ids, nombres,
+    precios, costo (de `Design.calculated_cost`) e ids de colores. Trabaja
+    sobre las filas de `.values()` que arma ProductViewSet.
+    """
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    sku = serializers.CharField(allow_null=True)
+    design_id = serializers.IntegerField(allow_null=True)
+    design_name = serializers.CharField(allow_null=True)
+    size_id = serializers.IntegerField(allow_null=True)
+    size_name = serializers.CharField(allow_null=True)
+    color_ids = serializers.ListField(child=serializers.IntegerField())
+    factory_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    club_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    suggested_final_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    is_manufactured = serializers.BooleanField()
+    cost = serializers.DecimalField(max_digits=10, decimal_places=2)
+
 class DeliveryNoteItemSerializer(TenantAwareSerializer):
     product = SimpleProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
@@ -544,13 +575,10 @@ class DeliveryNoteSerializer(TenantAwareSerializer):
         
         with transaction.atomic():
             delivery_note = DeliveryNote.objects.create(**validated_data)
-            
-            for item_data in items_data:
-                DeliveryNoteItem.objects.create(
-                    delivery_note=delivery_note,
-                    tenant=delivery_note.tenant,
-                    **item_data
-                )
+            bulk_create_items(DeliveryNoteItem, [
+                DeliveryNoteItem(delivery_note=delivery_note, tenant=delivery_note.tenant, **item_data)
+                for item_data in items_data
+            ])
         
         return delivery_note
     
@@ -566,12 +594,10 @@ class DeliveryNoteSerializer(TenantAwareSerializer):
         if items_data is not None:
             with transaction.atomic():
                 instance.items.all().delete()
-                for item_data in items_data:
-                    DeliveryNoteItem.objects.create(
-                        delivery_note=instance,
-                        tenant=instance.tenant,
-                        **item_data
-                    )
+                bulk_create_items(DeliveryNoteItem, [
+                    DeliveryNoteItem(delivery_note=instance, tenant=instance.tenant, **item_data)
+                    for item_data in items_data
+                ])
         
         return instance
 
@@ -649,22 +675,64 @@ class ProductionOrderBaseSerializer(TenantAwareSerializer):
             'colors', 'color_ids', 'specifications', 'model'
         ]
 
-    def _create_or_update_items(self, production_order, items_data):
-        """Helper para crear/actualizar items de la orden."""
-        if items_data is not None:
-            with transaction.atomic():
-                production_order.items.all().delete()
-                for item_data in items_data:
-                    ProductionOrderItem.objects.create(
-                        production_order=production_order,
-                        tenant=production_order.tenant,
-                        product_id=item_data.get('product'),
-                        quantity=item_data.get('quantity'),
-                        size=str(item_data.get('size', '')),
-                        color=item_data.get('color', ''),
-                        detail=item_data.get('detail', ''),
-                        customizations=item_data.get('customizations', {})
-                    )
+    def _build_items(self, tenant, items_data):
+        """
+        Arma (sin guardar) los items de la orden y valida que los productos
+        existan en el tenant, antes de escribir nada.
+        """
+        product_ids = {item_data.get('product') for item_data in items_data}
+        found = set(Product.objects.filter(tenant=tenant, pk__in=product_ids).values_list('pk', flat=True))
+        missing = product_ids - found
+        if missing:
+            raise serializers.ValidationError({'items': f"Productos inexistentes: {', '.join(map(str, sorted(missing, key=str)))}."})
+        return [
+            ProductionOrderItem(
+                tenant=tenant,
+                product_id=item_data.get('product'),
+                quantity=item_data.get('quantity'),
+                size=str(item_data.get('size', '')),
+                color=item_data.get('color', ''),
+                detail=item_data.get('detail', ''),
+                customizations=item_data.get('customizations', {})
+            )
+            for item_data in items_data
+        ]
+
+    def _create_or_update_items(self, production_order, items):
+        """Reemplaza los items de la orden por `items` (ver _build_items)."""
+        if items is not None:
+            production_order.items.all().delete()
+            for item in items:
+                item.production_order = production_order
+            bulk_create_items(ProductionOrderItem, items)
+
+    def create(self, validated_data):
+        items_data = validated_data.pop('items', [])
+        colors_data = validated_data.pop('colors', [])
+        items = self._build_items(validated_data['tenant'], items_data)
+
+        with transaction.atomic():
+            production_order = ProductionOrder.objects.create(**validated_data)
+            production_order.colors.set(colors_data)
+            self._create_or_update_items(production_order, items)
+
+        return production_order
+
+    def update(self, instance, validated_data):
+        items_data = validated_data.pop('items', None)
+        colors_data = validated_data.pop('colors', None)
+        items = None if items_data is None else self._build_items(instance.tenant, items_data)
+
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            if colors_data is not None:
+                instance.colors.set(colors_data)
+            self._create_or_update_items(instance, items)
+
+        return instance
 
     def _create_or_update_files(self, production_order, files_data):
         """Helper para manejar la subida de archivos."""
@@ -672,39 +740,71 @@ class ProductionOrderBaseSerializer(TenantAwareSerializer):
 
 class ProductionOrderReadOnlySerializer(ProductionOrderBaseSerializer):
     """
-    Serializer para operaciones de LECTURA (GET). Muestra la representación
-    completa y anidada de la Orden de Producción.
+    Serializer para operaciones de LECTURA (GET).
+
+    Por defecto la nota de pedido se resume (cliente, vendedor y estado de
+    pago, tomado de la anotación `sale_paid_amount`). Con `expand` = {'sale'}
+    en el contexto se incluye la Nota de Pedido completa y anidada.
     """
+    items = serializers.SerializerMethodField()
+
+    def get_items(self, instance):
+        return [
+            {
+                'id': item.id,
+                'product': item.product_id,
+                'quantity': item.quantity,
+                'size': item.size,
+                'detail': item.detail,
+                'color': item.color,
+                'customizations': item.customizations
+            }
+            for item in instance.items.all()
+        ]
+
+    def _order_note_summary(self, order_note, paid_amount):
+        sale = order_note.sale
+        client = sale.client
+        user = sale.user
+        return {
+            'id': order_note.id,
+            'status': order_note.status,
+            'order_date': order_note.order_date,
+            'estimated_delivery_date': order_note.estimated_delivery_date,
+            'shipping_method': order_note.shipping_method,
+            'sale': {
+                'id': sale.id,
+                'total_amount': sale.total_amount,
+                'payment_status': payment_status(paid_amount, sale.total_amount),
+                'client': {'id': client.id, 'name': client.name} if client else None,
+                'user': {'id': user.id, 'email': user.email, 'first_name': user.first_name, 'last_name': user.last_name} if user else None,
+            },
+        }
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
+        expand = self.context.get('expand', set())
         
         # ===== SERIALIZAR ORDER NOTE =====
         order_note_instance = instance.order_note
         if order_note_instance:
-            representation['order_note'] = OrderNoteSerializer(order_note_instance, context=self.context).data
+            paid_amount = getattr(instance, 'sale_paid_amount', None)
+            if 'sale' in expand:
+                if paid_amount is not None:
+                    order_note_instance.sale.paid_amount_total = paid_amount
+                representation['order_note'] = OrderNoteSerializer(order_note_instance, context=self.context).data
+            else:
+                if paid_amount is None:
+                    paid_amount = Transaction.objects.filter(
+                        related_sale_id=order_note_instance.sale_id, amount__gt=0
+                    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+                representation['order_note'] = self._order_note_summary(order_note_instance, paid_amount)
         
         # ===== SERIALIZAR BASE PRODUCT =====
         base_product_instance = instance.base_product
         if base_product_instance:
             representation['base_product'] = SimpleProductSerializer(base_product_instance, context=self.context).data
         
-        # ===== SERIALIZAR ITEMS CORRECTAMENTE =====
-        items = instance.items.all()
-        
-        items_data = []
-        for item in items:
-            items_data.append({
-                'id': item.id,
-                'product': item.product_id,
-                'quantity': item.quantity,
-                'size': item.size,
-                'detail': item.detail,
-                'color': item.color,
-                'customizations': item.customizations
-            })
-        
-        representation['items'] = items_data
-        
         return representation
 
 class ProductionOrderIndumentariaSerializer(ProductionOrderBaseSerializer):
@@ -767,56 +867,6 @@ class ProductionOrderIndumentariaSerializer(ProductionOrderBaseSerializer):
         
         return validated_data
 
-    def create(self, validated_data):
-        items_data = validated_data.pop('items', [])
-        colors_data = validated_data.pop('colors', [])
-        
-        with transaction.atomic():
-            production_order = ProductionOrder.objects.create(**validated_data)
-            production_order.colors.set(colors_data)
-            
-            for item_data in items_data:
-                ProductionOrderItem.objects.create(
-                    production_order=production_order,
-                    tenant=production_order.tenant,
-                    product_id=item_data.get('product'),
-                    quantity=item_data.get('quantity'),
-                    size=str(item_data.get('size', '')),
-                    color=item_data.get('color', ''),
-                    detail=item_data.get('detail', ''),
-                    customizations=item_data.get('customizations', {})
-                )
-        
-        return production_order
-
-    def update(self, instance, validated_data):
-        items_data = validated_data.pop('items', None)
-        colors_data = validated_data.pop('colors', None)
-
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        if colors_data is not None:
-            instance.colors.set(colors_data)
-        
-        if items_data is not None:
-            instance.items.all().delete()
-            
-            for item_data in items_data:
-                ProductionOrderItem.objects.create(
-                    production_order=instance,
-                    tenant=instance.tenant,
-                    product_id=item_data.get('product'),
-                    quantity=item_data.get('quantity'),
-                    size=str(item_data.get('size', '')),
-                    color=item_data.get('color', ''),
-                    detail=item_data.get('detail', ''),
-                    customizations=item_data.get('customizations', {})
-                )
-        
-        return instance
-
 class ProductionOrderMediasSerializer(ProductionOrderBaseSerializer):
     """
     Serializer de ESCRITURA (POST, PUT) para Órdenes de tipo 'Medias'.
@@ -865,66 +915,6 @@ class ProductionOrderMediasSerializer(ProductionOrderBaseSerializer):
         
         return validated_data
 
-    def create(self, validated_data):
-        
-        items_data = validated_data.pop('items', [])
-        colors_data = validated_data.pop('colors', [])
-        
-        with transaction.atomic():
-            production_order = ProductionOrder.objects.create(**validated_data)
-            
-            production_order.colors.set(colors_data)
-            
-            # CREAR ITEMS
-            for idx, item_data in enumerate(items_data):
-                
-                item = ProductionOrderItem.objects.create(
-                    production_order=production_order,
-                    tenant=production_order.tenant,
-                    product_id=item_data.get('product'),
-                    quantity=item_data.get('quantity'),
-                    size=str(item_data.get('size', '')),
-                    color=item_data.get('color', ''),
-                    detail=item_data.get('detail', ''),
-                    customizations=item_data.get('customizations', {})
-                )
-
-        return production_order
-
-    def update(self, instance, validated_data):
-        
-        items_data = validated_data.pop('items', None)
-        colors_data = validated_data.pop('colors', None)
-
-        # Actualizar campos escalares
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        if colors_data is not None:
-            instance.colors.set(colors_data)
-        
-        # ACTUALIZAR ITEMS
-        if items_data is not None:
-            # Eliminar items existentes
-            deleted_count = instance.items.all().delete()[0]
-            
-            # Crear nuevos items
-            for idx, item_data in enumerate(items_data):
-                
-                item = ProductionOrderItem.objects.create(
-                    production_order=instance,
-                    tenant=instance.tenant,
-                    product_id=item_data.get('product'),
-                    quantity=item_data.get('quantity'),
-                    size=str(item_data.get('size', '')),
-                    color=item_data.get('color', ''),
-                    detail=item_data.get('detail', ''),
-                    customizations=item_data.get('customizations', {})
-                )
-        
-        return instance
-
 class ProductionProcessLogSerializer(TenantAwareSerializer):
     class Meta(TenantAwareSerializer.Meta):
         model = ProductionProcessLog
@@ -961,9 +951,24 @@ class RawMaterialSerializer(TenantAwareSerializer):
         fields = '__all__'
 
     def get_highest_cost(self, obj):
-        highest_cost = obj.proveedores.filter(tenant=obj.tenant).aggregate(max_cost=Max('cost'))['max_cost']
+        # RawMaterialViewSet lo anota en el listado; si no, se calcula aparte.
+        if hasattr(obj, 'highest_cost_value'):
+            highest_cost = obj.highest_cost_value
+        else:
+            highest_cost = obj.proveedores.filter(tenant_id=obj.tenant_id).aggregate(max_cost=Max('cost'))['max_cost']
         return highest_cost if highest_cost is not None else 0.00
 
+class CostHistorySerializer(TenantAwareSerializer):
+    raw_material_name = serializers.CharField(source='raw_material.name', read_only=True)
+
+    class Meta(TenantAwareSerializer.Meta):
+        model = CostHistory
+        fields = (
+            'id', 'raw_material', 'raw_material_name', 'materia_prima_proveedor', 'previous_cost', 'new_cost',
+            'material_cost', 'designs_updated', 'products_below_cost', 'created_at',
+        )
+        read_only_fields = fields
+
 class MateriaPrimaProveedorSerializer(TenantAwareSerializer):
     raw_material = serializers.PrimaryKeyRelatedField(
         queryset=RawMaterial.objects.all()
@@ -982,15 +987,19 @@ class MateriaPrimaProveedorSerializer(TenantAwareSerializer):
     unit_of_measure = serializers.CharField(source='raw_material.unit_of_measure', read_only=True)
     supplier_name = serializers.CharField(source='supplier.name', read_only=True)
     warehouse_name = serializers.CharField(source='warehouse.name', read_only=True)
+    qr_code_url = serializers.SerializerMethodField()
 
     class Meta(TenantAwareSerializer.Meta):
         model = MateriaPrimaProveedor
         fields = [
             'id', 'raw_material', 'supplier', 'brand', 'warehouse', 'supplier_code', 
-            'cost', 'current_stock', 'batch_number', 'qr_code_data',
+            'cost', 'current_stock', 'batch_number', 'qr_code_url',
             'name', 'description', 'category', 'unit_of_measure', 'supplier_name', 'warehouse_name'
         ]
-        read_only_fields = ('batch_number', 'qr_code_data')
+        read_only_fields = ('batch_number',)
+
+    def get_qr_code_url(self, obj):
+        return qr_labels.image_url(obj.qr_code, self.context.get('request'))
 
 class PurchaseOrderItemSerializer(TenantAwareSerializer):
     class Meta(TenantAwareSerializer.Meta):
@@ -1003,36 +1012,44 @@ class PurchaseOrderSerializer(TenantAwareSerializer):
     supplier_name = serializers.CharField(source='supplier.name', read_only=True)
     user_name = serializers.SerializerMethodField()
     total_amount = serializers.SerializerMethodField()
+    paid_amount = serializers.SerializerMethodField()
+    outstanding_balance = serializers.SerializerMethodField()
 
     class Meta(TenantAwareSerializer.Meta):
         model = PurchaseOrder
-        fields = ['id', 'supplier', 'supplier_name', 'user', 'user_name', 'order_date', 'expected_delivery_date', 'status', 'total_amount', 'paid_amount', 'items']
-
-    def get_total_amount(self, obj):
-        return obj.items.aggregate(total=Sum(F('quantity') * F('unit_price')))['total'] or Decimal('0.00')
-
-    paid_amount = serializers.SerializerMethodField()
+        fields = ['id', 'supplier', 'supplier_name', 'user', 'user_name', 'order_date', 'expected_delivery_date', 'status', 'total_amount', 'paid_amount', 'outstanding_balance', 'items']
 
     def get_user_name(self, obj):
         return obj.user.first_name if obj.user else None
 
+    # PurchaseOrderViewSet anota estos totales; el agregado por fila queda
+    # sólo para instancias sin anotar (p. ej. la respuesta de create/update).
     def get_total_amount(self, obj):
-        return obj.items.aggregate(total=Sum(F('quantity') * F('unit_price')))['total'] or Decimal('0.00')
+        total = getattr(obj, 'total_amount_value', None)
+        if total is None:
+            total = obj.items.aggregate(total=Sum(F('quantity') * F('unit_price')))['total'] or Decimal('0.00')
+        return total
 
     def get_paid_amount(self, obj):
-        return obj.payments.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        paid = getattr(obj, 'paid_amount_value', None)
+        if paid is None:
+            paid = obj.payments.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        return paid
+
+    def get_outstanding_balance(self, obj):
+        balance = getattr(obj, 'outstanding_balance_value', None)
+        if balance is None:
+            balance = self.get_total_amount(obj) - self.get_paid_amount(obj)
+        return balance
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')
         with transaction.atomic():
             purchase_order = PurchaseOrder.objects.create(**validated_data)
-            total_amount = Decimal('0.00')
-            for item_data in items_data:
-                item = PurchaseOrderItem.objects.create(purchase_order=purchase_order, tenant=purchase_order.tenant, **item_data)
-                total_amount += item.quantity * item.unit_price
-            purchase_order.total_amount = total_amount
-            purchase_order.paid_amount = Decimal('0.00') # Initially unpaid
-            purchase_order.save()
+            bulk_create_items(PurchaseOrderItem, [
+                PurchaseOrderItem(purchase_order=purchase_order, tenant=purchase_order.tenant, **item_data)
+                for item_data in items_data
+            ])
         return purchase_order
 
     def update(self, instance, validated_data):
@@ -1050,14 +1067,14 @@ class PurchaseOrderSerializer(TenantAwareSerializer):
         instance.save()
 
         # Handle nested items if provided
+        # Los totales se calculan al leer (ver get_total_amount).
         if items_data is not None:
-            instance.items.all().delete() # Delete existing items
-            total_amount = Decimal('0.00')
-            for item_data in items_data:
-                item = PurchaseOrderItem.objects.create(purchase_order=instance, tenant=instance.tenant, **item_data)
-                total_amount += item.quantity * item.unit_price
-            instance.total_amount = total_amount
-            instance.save(update_fields=['total_amount'])
+            with transaction.atomic():
+                instance.items.all().delete() # Delete existing items
+                bulk_create_items(PurchaseOrderItem, [
+                    PurchaseOrderItem(purchase_order=instance, tenant=instance.tenant, **item_data)
+                    for item_data in items_data
+                ])
 
         return instance
 
@@ -1128,12 +1145,37 @@ class BankStatementSerializer(TenantAwareSerializer):
     class Meta(TenantAwareSerializer.Meta):
         model = BankStatement
         fields = '__all__'
+        read_only_fields = ('tenant', 'status', 'progress', 'lines_found', 'lines_imported', 'error_message', 'processed_at')
+
+class JobSerializer(TenantAwareSerializer):
+    class Meta(TenantAwareSerializer.Meta):
+        model = Job
+        fields = (
+            'id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'result', 'error',
+            'created_at', 'started_at', 'finished_at',
+        )
+        read_only_fields = fields
 
 class BankTransactionSerializer(TenantAwareSerializer):
     class Meta(TenantAwareSerializer.Meta):
         model = BankTransaction
         fields = '__all__'
 
+class BankReconciliationSerializer(TenantAwareSerializer):
+    """Conciliación de una línea de extracto; al crearla a mano se indica un solo movimiento."""
+    class Meta(TenantAwareSerializer.Meta):
+        model = BankReconciliation
+        fields = '__all__'
+        read_only_fields = ('tenant', 'score', 'is_manual', 'created_at')
+
+    def validate(self, data):
+        targets = [data.get(name) for name in ('transaction', 'payment', 'check_record') if data.get(name)]
+        if len(targets) != 1:
+            raise serializers.ValidationError('Indicar exactamente uno de transaction, payment o check_record.')
+        if targets[0].tenant_id != data['bank_transaction'].tenant_id:
+            raise serializers.ValidationError('La línea del extracto y el movimiento son de empresas distintas.')
+        return data
+
 class BankSerializer(TenantAwareSerializer):
     class Meta(TenantAwareSerializer.Meta):
         model = Bank
@@ -1,19 +1,117 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_init, pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Design, DesignMaterial, DesignProcess
+from .models import Tenant, DesignMaterial, DesignProcess, MateriaPrimaProveedor
+from .middleware import invalidate_tenant_cache
+from . import cost_propagation, design_costs, forecasting, response_cache, rollups, versions
 
 @receiver(post_save, sender=DesignMaterial)
 @receiver(post_delete, sender=DesignMaterial)
-def update_design_cost_on_material_change(sender, instance, **kwargs):
+@receiver(post_save, sender=DesignProcess)
+@receiver(post_delete, sender=DesignProcess)
+def mark_design_cost_dirty(sender, instance, **kwargs):
     """
-    Signal to update the calculated_cost of a Design when its DesignMaterial changes.
+    Signal to recalculate the calculated_cost of a Design once, on commit, when its recipe changes.
     """
-    instance.design.calculate_cost()
+    design_costs.mark_dirty(instance.design_id)
 
-@receiver(post_save, sender=DesignProcess)
-@receiver(post_delete, sender=DesignProcess)
-def update_design_cost_on_process_change(sender, instance, **kwargs):
+@receiver(post_init, sender=MateriaPrimaProveedor)
+def snapshot_lot_cost(sender, instance, **kwargs):
+    """
+    Signal to remember the cost of a raw material lot as loaded.
+    """
+    # Con .only()/.defer() sin el costo no se consulta: cuenta como desconocido.
+    setattr(instance, cost_propagation.SNAPSHOT_ATTR, instance.__dict__.get('cost'))
+
+@receiver(post_save, sender=MateriaPrimaProveedor)
+def propagate_lot_cost(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Signal to propagate the cost of a raw material lot to the designs that use it, on commit.
+    """
+    if raw or (update_fields is not None and 'cost' not in update_fields):
+        return
+    previous = getattr(instance, cost_propagation.SNAPSHOT_ATTR, None)
+    if created or previous is None or previous != instance.cost:
+        cost_propagation.cost_changed(instance, None if created else previous)
+    setattr(instance, cost_propagation.SNAPSHOT_ATTR, instance.cost)
+
+@receiver(post_delete, sender=MateriaPrimaProveedor)
+def propagate_deleted_lot(sender, instance, **kwargs):
+    cost_propagation.cost_changed(instance, instance.cost, deleted=True)
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def invalidate_cached_tenant(sender, instance, **kwargs):
+    """
+    Signal to drop a Tenant from the TenantMiddleware cache when it changes.
+    """
+    invalidate_tenant_cache(instance.pk)
+
+
+def snapshot_rollup_source(sender, instance, **kwargs):
+    """
+    Signal to remember the rolled-up fields of a source row as loaded.
+    """
+    setattr(instance, rollups.SNAPSHOT_ATTR, rollups.snapshot(instance))
+
+def load_rollup_snapshot(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rollups.load_snapshot(instance)
+
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
     """
-    Signal to update the calculated_cost of a Design when its DesignProcess changes.
+    Signal to apply the change of a source row to the daily dashboard rollups.
     """
-    instance.design.calculate_cost()
\ No newline at end of file
+    if not raw:
+        rollups.record_save(instance, created)
+
+def update_rollups_on_delete(sender, instance, **kwargs):
+    rollups.record_delete(instance)
+
+for rollup_source in rollups.SOURCES:
+    post_init.connect(snapshot_rollup_source, sender=rollup_source)
+    pre_save.connect(load_rollup_snapshot, sender=rollup_source)
+    post_save.connect(update_rollups_on_save, sender=rollup_source)
+    post_delete.connect(update_rollups_on_delete, sender=rollup_source)
+
+
+def invalidate_forecasts(sender, instance, **kwargs):
+    """
+    Signal to discard the fitted forecasts of the metrics fed by this model.
+    """
+    for metric in forecasting.metrics_for(sender):
+        forecasting.invalidate(instance.tenant_id, metric)
+
+for forecast_source in {model for metric in forecasting.METRICS.values() for model in metric.sources}:
+    post_save.connect(invalidate_forecasts, sender=forecast_source)
+    post_delete.connect(invalidate_forecasts, sender=forecast_source)
+
+
+def invalidate_cached_responses(sender, instance, **kwargs):
+    """
+    Signal to expire the cached API responses that depend on this model.
+    """
+    for scope in response_cache.scopes_for(sender):
+        response_cache.invalidate(instance.tenant_id, scope)
+
+for response_source in {model for models in response_cache.SCOPES.values() for model in models}:
+    post_save.connect(invalidate_cached_responses, sender=response_source)
+    post_delete.connect(invalidate_cached_responses, sender=response_source)
+
+
+def bump_data_version(sender, instance, **kwargs):
+    """
+    Signal to change the ETag of the listings that depend on this model.
+    """
+    versions.bump(instance.tenant_id, sender)
+
+for versioned_model in versions.tracked_models():
+    post_save.connect(bump_data_version, sender=versioned_model)
+    post_delete.connect(bump_data_version, sender=versioned_model)
+
+def bump_data_version_on_m2m(sender, instance, action, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        versions.bump(instance.tenant_id, type(instance), model)
+
+for versioned_model in versions.tracked_models():
+    for m2m_field in versioned_model._meta.local_many_to_many:
+        m2m_changed.connect(bump_data_version_on_m2m, sender=m2m_field.remote_field.through)
@@ -0,0 +1,53 @@
+"""
+Tareas de core para la cola de trabajos (ver core.jobs).
+"""
+from django.utils import timezone
+
+from . import bank_ingestion, design_costs, qr_labels, reconciliation, versions
+from .jobs import is_last_attempt, task
+from .models import BankStatement
+
+
+@task('bank_statements.ingest', bind=True)
+def ingest_bank_statement(job, tenant_id, statement_id):
+    """Lee el extracto y concilia sus líneas nuevas."""
+    # En un reintento (o un trabajo que requeue_stale devolvió a la cola) el
+    # extracto puede haber quedado 'Procesando': el único que lo procesa es este Job.
+    statement = bank_ingestion.claim(statement_id, reclaim=job.attempts > 1)
+    if statement is None:
+        return {'skipped': 'El extracto no está pendiente.'}
+    try:
+        bank_ingestion.ingest(statement)
+    except Exception as exc:
+        # Lo deja pendiente para el reintento de la cola; en el último intento
+        # no hay reintento, así que queda en 'Error' con el motivo.
+        if is_last_attempt(job):
+            fields = {'status': 'Error', 'error_message': str(exc) or type(exc).__name__, 'processed_at': timezone.now()}
+        else:
+            fields = {'status': 'Pendiente'}
+        BankStatement.objects.filter(pk=statement_id).update(**fields)
+        versions.bump(tenant_id, BankStatement)
+        raise
+    result = {
+        'status': statement.status, 'lines_found': statement.lines_found, 'lines_imported': statement.lines_imported,
+    }
+    if statement.status == 'Procesado':
+        result['reconciliation'] = reconciliation.reconcile(tenant_id, statement_id=statement_id)
+    return result
+
+
+@task('designs.recalculate_costs')
+def recalculate_design_costs(tenant_id):
+    checked, changed = design_costs.recalculate_all(tenant_id)
+    return {'designs': checked, 'changed': changed}
+
+
+@task(qr_labels.SHEET_TASK)
+def render_qr_label_sheet(tenant_id, labels, filename):
+    """PDF de una hoja de etiquetas grande (ver core.qr_labels.sheet_job); en el worker sí se usa el pool."""
+    labels = [tuple(label) for label in labels]
+    content = qr_labels.compose_sheet(labels, 'pdf')
+    return {
+        'file': qr_labels.store_sheet(content, 'pdf'), 'output': 'pdf', 'filename': filename,
+        'pages': qr_labels.page_count(labels),
+    }
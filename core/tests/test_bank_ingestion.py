@@ -0,0 +1,128 @@
+import datetime
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.bank_ingestion import parse_amount, parse_statement_text
+from core.models import Bank, BankStatement, BankTransaction, Tenant, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+CSV_STATEMENT = (
+    'Fecha;Concepto;Importe\n'
+    '01/03/2025;Transferencia Cliente SA;1.500,00\n'
+    '02/03/2025;Comisión mantenimiento;-120,50\n'
+    '02/03/2025;Comisión mantenimiento;-120,50\n'
+)
+
+OFX_STATEMENT = (
+    '<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+    '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250302<TRNAMT>-120.50<NAME>Comisión mantenimiento</STMTTRN>\n'
+    '<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250303<TRNAMT>800.00<NAME>Depósito efectivo</STMTTRN>\n'
+    '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BankIngestionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Banco')
+        self.bank = Bank.objects.create(name='Banco Nación', tenant=self.tenant)
+
+    def upload(self, name, content):
+        statement = BankStatement(bank=self.bank, statement_date=datetime.date(2025, 3, 31), tenant=self.tenant)
+        statement.file.save(name, ContentFile(content.encode('utf-8')), save=True)
+        return statement
+
+    def ingest(self):
+        call_command('ingest_bank_statements', stdout=StringIO(), stderr=StringIO())
+
+    def test_csv_and_overlapping_ofx_do_not_duplicate(self):
+        csv_statement = self.upload('marzo.csv', CSV_STATEMENT)
+        self.ingest()
+        csv_statement.refresh_from_db()
+        self.assertEqual(
+            (csv_statement.status, csv_statement.progress, csv_statement.lines_found, csv_statement.lines_imported),
+            ('Procesado', 100, 3, 3)
+        )
+        # Dos comisiones iguales el mismo día son dos movimientos distintos.
+        self.assertEqual(BankTransaction.objects.filter(amount=Decimal('-120.50')).count(), 2)
+
+        ofx_statement = self.upload('marzo.ofx', OFX_STATEMENT)
+        self.ingest()
+        ofx_statement.refresh_from_db()
+        self.assertEqual((ofx_statement.status, ofx_statement.lines_found, ofx_statement.lines_imported), ('Procesado', 2, 1))
+        self.assertEqual(BankTransaction.objects.filter(tenant=self.tenant).count(), 4)
+
+        BankStatement.objects.filter(pk=csv_statement.pk).update(status='Pendiente')
+        self.ingest()
+        self.assertEqual(BankTransaction.objects.filter(tenant=self.tenant).count(), 4)
+
+    def test_unreadable_file_sets_error(self):
+        statement = self.upload('extracto.pdf', 'file_content')
+        self.ingest()
+        statement.refresh_from_db()
+        self.assertEqual(statement.status, 'Error')
+        self.assertTrue(statement.error_message)
+        self.assertFalse(BankTransaction.objects.exists())
+
+    def test_malformed_csv_sets_error(self):
+        # Un campo más largo que csv.field_size_limit() hace fallar al lector, no al Sniffer.
+        huge_field = CSV_STATEMENT + '03/03/2025;' + 'x' * 200000 + ';1\n'
+        for name, content in (('sin_separador.csv', 'solo texto\nsin columnas\n'), ('enorme.csv', huge_field)):
+            statement = self.upload(name, content)
+            self.ingest()
+            statement.refresh_from_db()
+            self.assertEqual(statement.status, 'Error', name)
+            self.assertIn('CSV', statement.error_message)
+
+    def test_statement_text_lines(self):
+        text = (
+            'BANCO NACION - Extracto de cuenta\n'
+            'Fecha Concepto Importe Saldo\n'
+            '05/03/2025 Pago proveedor Telas SRL -45.000,00 155.000,00\n'
+            '06/03/2025   Acreditación   ventas 12.345,67\n'
+            'Saldo final 167.345,67\n'
+        )
+        self.assertEqual(list(parse_statement_text(text)), [
+            (datetime.date(2025, 3, 5), 'Pago proveedor Telas SRL', Decimal('-45000.00')),
+            (datetime.date(2025, 3, 6), 'Acreditación ventas', Decimal('12345.67')),
+        ])
+        self.assertEqual(parse_amount('1,234.56'), Decimal('1234.56'))
+        self.assertEqual(parse_amount('50-'), Decimal('-50'))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BankStatementApiTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant API Banco')
+        self.user = User.objects.create_user(email='tesoreria@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.tenant.id))
+        bank = Bank.objects.create(name='Banco Provincia', tenant=self.tenant)
+        self.statement = BankStatement(
+            bank=bank, statement_date=datetime.date(2025, 3, 31), tenant=self.tenant, status='Error',
+            error_message='No se pudo leer el PDF',
+        )
+        self.statement.file.save('abril.csv', ContentFile(CSV_STATEMENT.encode('utf-8')), save=True)
+
+    def test_reprocess_queues_statement(self):
+        url = reverse('bankstatement-reprocess', args=[self.statement.pk])
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual((response.data['status'], response.data['error_message']), ('Pendiente', ''))
+
+        call_command('ingest_bank_statements', stdout=StringIO())
+        detail = self.client.get(reverse('bankstatement-detail', args=[self.statement.pk]))
+        self.assertEqual((detail.data['status'], detail.data['lines_imported']), ('Procesado', 3))
@@ -0,0 +1,76 @@
+import math
+from decimal import Decimal
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import rollups
+from core.bulk import BATCH_SIZE
+from core.models import (
+    Tenant, User, Design, Product, ProductionOrder, ProductionOrderItem, Supplier, RawMaterial, PurchaseOrder,
+    PurchaseOrderItem, DailyProductionRollup, DailyExpenseRollup
+)
+
+
+class BulkWriteTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Bulk')
+        self.user = User.objects.create_user(email='bulk@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.design = Design.objects.create(name='Diseño Bulk', tenant=self.tenant)
+        self.product = Product.objects.create(name='Camiseta Bulk', design=self.design, tenant=self.tenant)
+        self.supplier = Supplier.objects.create(name='Proveedor Bulk', tenant=self.tenant)
+        self.raw_material = RawMaterial.objects.create(name='Tela Bulk', tenant=self.tenant)
+
+    def production_order(self, lines):
+        items = [{'product': self.product.id, 'quantity': 1, 'size': str(i), 'detail': f'Jugador {i}'} for i in range(lines)]
+        return {'op_type': 'Indumentaria', 'equipo': 'Club Bulk', 'items': items}
+
+    def purchase_order(self, quantity=2):
+        return {
+            'supplier': self.supplier.id, 'expected_delivery_date': '2025-01-01',
+            'items': [{'raw_material': self.raw_material.id, 'quantity': quantity, 'unit_price': '10.00'}],
+        }
+
+    def test_item_inserts_do_not_grow_with_lines(self):
+        url = reverse('productionorder-list')
+        small = self.client.post(url, self.production_order(2), format='json')
+        large = self.client.post(url, self.production_order(200), format='json')
+        self.assertEqual(large.status_code, status.HTTP_201_CREATED, large.data)
+        self.assertGreater(int(small['X-DB-Statements']), 0)
+        # SQLite parte el INSERT por su límite de parámetros; en PostgreSQL es uno solo.
+        fields = [field for field in ProductionOrderItem._meta.concrete_fields if not field.primary_key]
+        inserts = math.ceil(200 / min(connection.ops.bulk_batch_size(fields, [None] * 200), BATCH_SIZE))
+        self.assertEqual(int(large['X-DB-Statements']), int(small['X-DB-Statements']) + inserts - 1)
+        self.assertEqual(ProductionOrderItem.objects.filter(tenant=self.tenant).count(), 202)
+        self.assertEqual(DailyProductionRollup.objects.get(tenant=self.tenant).quantity, 202)
+
+    def test_unknown_product_is_rejected_before_writing(self):
+        payload = self.production_order(1)
+        payload['items'].append({'product': 999999, 'quantity': 1, 'size': 'M'})
+        response = self.client.post(reverse('productionorder-list'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ProductionOrder.objects.filter(tenant=self.tenant).exists())
+
+    def test_bulk_endpoint_creates_all_documents(self):
+        response = self.client.post(reverse('purchaseorder-bulk'), [self.purchase_order(2), self.purchase_order(3)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual([row['total_amount'] for row in response.data], [Decimal('20.00'), Decimal('30.00')])
+        self.assertGreater(int(response['X-DB-Statements']), 0)
+        expenses = DailyExpenseRollup.objects.get(tenant=self.tenant)
+        self.assertEqual(expenses.amount, Decimal('50.00'))
+        before = sorted(DailyExpenseRollup.objects.filter(tenant=self.tenant).values_list('date', 'amount'))
+        rollups.rebuild(self.tenant.id)
+        self.assertEqual(sorted(DailyExpenseRollup.objects.filter(tenant=self.tenant).values_list('date', 'amount')), before)
+
+    def test_bulk_endpoint_validates_every_document_first(self):
+        invalid = self.purchase_order()
+        del invalid['supplier']
+        response = self.client.post(reverse('productionorder-bulk'), [self.production_order(1), {'op_type': 'Medias', 'items': 'x'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data['errors']), [1])
+        response = self.client.post(reverse('purchaseorder-bulk'), [self.purchase_order(), invalid], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PurchaseOrder.objects.filter(tenant=self.tenant).exists())
+        self.assertFalse(PurchaseOrderItem.objects.filter(tenant=self.tenant).exists())
@@ -0,0 +1,66 @@
+import datetime
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Tenant, User, Client, Sale, Account, Transaction
+
+
+class ClientLedgerTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Cuenta Corriente')
+        self.user = User.objects.create_user(email='ledger@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.account = Account.objects.create(name='Caja', account_type='Activo', code='LEDGER-1', tenant=self.tenant)
+        self.customer = Client.objects.create(name='Club Mayorista', tenant=self.tenant)
+        # Ventas y cobros en días distintos: 10/01 venta 100, 11/01 cobro 40, 12/01 venta 50, 13/01 cobro 50.
+        self.sales = [
+            self.make_sale(datetime.date(2025, 1, 10), Decimal('100.00')),
+            self.make_sale(datetime.date(2025, 1, 12), Decimal('50.00')),
+        ]
+        self.make_payment(self.sales[0], datetime.date(2025, 1, 11), Decimal('40.00'))
+        self.make_payment(self.sales[1], datetime.date(2025, 1, 13), Decimal('50.00'))
+
+    def make_sale(self, day, total):
+        sale = Sale.objects.create(client=self.customer, user=self.user, total_amount=total, payment_method='Cuenta Corriente', tenant=self.tenant)
+        Sale.objects.filter(pk=sale.pk).update(sale_date=datetime.datetime.combine(day, datetime.time(12), tzinfo=datetime.timezone.utc))
+        return sale
+
+    def make_payment(self, sale, day, amount):
+        payment = Transaction.objects.create(tenant=self.tenant, account=self.account, amount=amount, related_sale=sale, description='Cobro')
+        Transaction.objects.filter(pk=payment.pk).update(date=day)
+        return payment
+
+    def url(self, name):
+        return reverse(f'client-{name}', args=[self.customer.id])
+
+    def test_running_balance_is_computed_in_order(self):
+        response = self.client.get(self.url('account-movements'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['type'] for row in response.data], ['Venta', 'Pago', 'Venta', 'Pago'])
+        self.assertEqual([row['balance'] for row in response.data], [-100.0, -60.0, -110.0, -60.0])
+        self.assertEqual(response.data[0]['user'], 'ledger@example.com')
+
+    def test_date_range_keeps_opening_balance(self):
+        response = self.client.get(self.url('account-movements') + '?start_date=2025-01-12&end_date=2025-01-12')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['id'], f'V-{self.sales[1].id}')
+        self.assertEqual(response.data[0]['balance'], -110.0)
+
+    def test_cursor_pagination(self):
+        first = self.client.get(self.url('account-movements') + '?page_size=3')
+        self.assertEqual(len(first.data['results']), 3)
+        second = self.client.get(first.data['next'])
+        self.assertEqual(second.data['next'], None)
+        self.assertEqual([row['balance'] for row in second.data['results']], [-60.0])
+        self.assertEqual(self.client.get(self.url('account-movements') + '?cursor=bogus').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_pending_sales(self):
+        with self.assertNumQueries(3):  # tenant, get_object, ventas anotadas
+            response = self.client.get(self.url('pending-sales'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['id'], self.sales[0].id)
+        self.assertEqual(response.data[0]['pending_balance'], 60.0)
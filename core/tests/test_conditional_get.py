@@ -0,0 +1,93 @@
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import versions
+from core.models import (
+    Tenant, User, Design, Product, Color, RawMaterial, DesignMaterial, Account, Client, Sale, OrderNote, ProductionOrder,
+    Transaction
+)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant ETag')
+        self.user = User.objects.create_user(email='etag@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.design = Design.objects.create(name='Diseño ETag', tenant=self.tenant)
+        self.product = Product.objects.create(name='Camiseta ETag', design=self.design, tenant=self.tenant)
+        self.url = reverse('products-list')
+
+    def test_unchanged_list_returns_304_without_serializing(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        with mock.patch('core.views.ProductViewSet.get_queryset') as get_queryset:
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            get_queryset.assert_not_called()
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached['ETag'], etag)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+    def test_writes_to_dependencies_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        # Las versiones cambian al confirmarse la transacción.
+        with self.captureOnCommitCallbacks(execute=True):
+            raw_material = RawMaterial.objects.create(name='Tela ETag', tenant=self.tenant)
+            DesignMaterial.objects.create(design=self.design, raw_material=raw_material, quantity=Decimal('1.00'), tenant=self.tenant)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.colors.add(Color.objects.create(name='Rojo', tenant=self.tenant))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_tenant_and_query(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertNotEqual(self.client.get(self.url + '?expand=recipe')['ETag'], etag)
+        other = Tenant.objects.create(name='Otro Tenant ETag')
+        other_user = User.objects.create_user(email='etag2@example.com', password='password123', tenant=other)
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(self.url, HTTP_X_TENANT_ID=other.id, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bumps_wait_for_commit(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                for i in range(3):
+                    Product.objects.create(name=f'Producto {i}', tenant=self.tenant)
+            self.assertFalse([q for q in queries.captured_queries if 'core_dataversion' in q['sql']])
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        self.assertEqual(len([q for q in queries.captured_queries if 'core_dataversion' in q['sql']]), 1)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_dependencies_follow_query_plan(self):
+        found = versions.dependencies(Product, ('design__designmaterial_set__raw_material',))
+        self.assertTrue({Product, Design, DesignMaterial, RawMaterial, Color} <= found)
+
+    def test_annotation_sources_change_the_etag(self):
+        client = Client.objects.create(name='Cliente ETag', tenant=self.tenant)
+        sale = Sale.objects.create(client=client, total_amount=Decimal('100.00'), payment_method='Efectivo', tenant=self.tenant)
+        order_note = OrderNote.objects.create(sale=sale, estimated_delivery_date='2030-01-01', tenant=self.tenant)
+        ProductionOrder.objects.create(order_note=order_note, op_type='Medias', tenant=self.tenant)
+        url = reverse('productionorder-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        # El cobro sólo cambia la anotación sale_paid_amount del listado.
+        account = Account.objects.create(name='Caja', account_type='Ingreso', code='ETAG-1', tenant=self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(amount=Decimal('100.00'), account=account, related_sale=sale, tenant=self.tenant)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['order_note']['sale']['payment_status'], 'Pagado')
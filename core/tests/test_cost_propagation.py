@@ -0,0 +1,129 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import design_costs
+from core.models import (
+    CostHistory, Design, DesignMaterial, MateriaPrimaProveedor, Product, RawMaterial, Tenant, User, Warehouse
+)
+
+
+class CostPropagationTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Propagación')
+        self.warehouses = [Warehouse.objects.create(name=f'Depósito {i}', tenant=self.tenant) for i in range(2)]
+        self.tela = RawMaterial.objects.create(name='Tela', tenant=self.tenant)
+        self.hilo = RawMaterial.objects.create(name='Hilo', tenant=self.tenant)
+        self.designs = [Design.objects.create(name=f'Camiseta {i}', tenant=self.tenant) for i in range(5)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lot = MateriaPrimaProveedor.objects.create(
+                raw_material=self.tela, warehouse=self.warehouses[0], cost=Decimal('10.00'), tenant=self.tenant
+            )
+            for design in self.designs:
+                DesignMaterial.objects.create(
+                    design=design, raw_material=self.tela, quantity=2, cost=Decimal('10.00'), tenant=self.tenant
+                )
+        self.other = Design.objects.create(name='Sin tela', tenant=self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            DesignMaterial.objects.create(
+                design=self.other, raw_material=self.hilo, quantity=1, cost=Decimal('3.00'), tenant=self.tenant
+            )
+        self.product = Product.objects.create(
+            name='Camiseta', design=self.designs[0], factory_price=Decimal('25.00'), club_price=Decimal('40.00'),
+            tenant=self.tenant
+        )
+
+    def test_lot_cost_change_updates_only_affected_designs_once(self):
+        self.lot.cost = Decimal('15.00')
+        with mock.patch('core.design_costs._recalculate_chunk', wraps=design_costs._recalculate_chunk) as chunk:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.lot.save()
+        self.assertEqual(chunk.call_count, 1)
+        self.assertEqual(set(chunk.call_args.args[0]), {design.pk for design in self.designs})
+        self.assertEqual(
+            set(DesignMaterial.objects.filter(raw_material=self.tela).values_list('cost', flat=True)), {Decimal('15.00')}
+        )
+        self.assertEqual(
+            set(Design.objects.filter(pk__in=[d.pk for d in self.designs]).values_list('calculated_cost', flat=True)),
+            {Decimal('30.00')}
+        )
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.calculated_cost, Decimal('3.00'))
+
+        history = CostHistory.objects.exclude(previous_cost=None).get()
+        self.assertEqual((history.previous_cost, history.new_cost), (Decimal('10.00'), Decimal('15.00')))
+        self.assertEqual(history.material_cost, Decimal('15.00'))
+        self.assertEqual(history.designs_updated, 5)
+        self.assertEqual(history.products_below_cost, [self.product.pk])
+
+    def test_material_cost_is_the_highest_lot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            lot = MateriaPrimaProveedor.objects.create(
+                raw_material=self.tela, warehouse=self.warehouses[1], cost=Decimal('8.00'), tenant=self.tenant
+            )
+        self.assertEqual(DesignMaterial.objects.filter(raw_material=self.tela).first().cost, Decimal('10.00'))
+        history = CostHistory.objects.get(materia_prima_proveedor=lot)
+        self.assertEqual((history.previous_cost, history.material_cost, history.designs_updated), (None, Decimal('10.00'), 0))
+
+    def test_many_lot_changes_propagate_in_one_pass(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for cost in ('11.00', '12.00', '13.00'):
+                        self.lot.cost = Decimal(cost)
+                        self.lot.save()
+                    self.lot.save(update_fields=['qr_code'])
+        propagation = [q for q in queries.captured_queries if 'core_designmaterial' in q['sql']]
+        # Índice de dependencias, UPDATE de las líneas y el agregado del recálculo.
+        self.assertEqual(len(propagation), 3)
+        self.assertEqual(CostHistory.objects.exclude(previous_cost=None).count(), 3)
+        self.assertEqual(DesignMaterial.objects.filter(raw_material=self.tela).first().cost, Decimal('13.00'))
+
+    def test_command_syncs_recipes_with_material_costs(self):
+        MateriaPrimaProveedor.objects.filter(pk=self.lot.pk).update(cost=Decimal('20.00'))
+        call_command(
+            'recalculate_design_costs', '--tenant', str(self.tenant.id), '--sync-materials', stdout=StringIO()
+        )
+        self.designs[1].refresh_from_db()
+        self.assertEqual(self.designs[1].calculated_cost, Decimal('40.00'))
+
+
+class CostPropagationApiTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant API Propagación')
+        self.user = User.objects.create_user(email='propagacion@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.tenant.id))
+        self.material = RawMaterial.objects.create(name='Friselina', tenant=self.tenant)
+        self.design = Design.objects.create(name='Short', tenant=self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lot = MateriaPrimaProveedor.objects.create(raw_material=self.material, cost=Decimal('5.00'), tenant=self.tenant)
+            DesignMaterial.objects.create(
+                design=self.design, raw_material=self.material, quantity=3, cost=Decimal('5.00'), tenant=self.tenant
+            )
+        self.product = Product.objects.create(
+            name='Short', design=self.design, factory_price=Decimal('20.00'), tenant=self.tenant
+        )
+
+    def test_lot_update_reports_products_below_cost(self):
+        url = reverse('materiaprimaproveedor-detail', args=[self.lot.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'cost': '9.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+        response = self.client.get(reverse('products-below-cost'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data], [self.product.pk])
+        self.assertEqual(response.data[0]['prices_below_cost'], ['factory_price'])
+        self.assertEqual(Decimal(response.data[0]['cost']), Decimal('27.00'))
+
+        response = self.client.get(reverse('costhistory-list'), {'raw_material': self.material.pk})
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([(row['previous_cost'], row['new_cost']) for row in rows], [('5.00', '9.00'), (None, '5.00')])
+        self.assertEqual(rows[0]['products_below_cost'], [self.product.pk])
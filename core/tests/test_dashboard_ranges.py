@@ -0,0 +1,51 @@
+import datetime
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import rollups
+from core.models import Tenant, User, Client, Sale, Local, Account, Transaction
+
+
+def at(day):
+    return datetime.datetime.combine(day, datetime.time(15), tzinfo=datetime.timezone.utc)
+
+
+class DashboardRangeTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Series')
+        self.user = User.objects.create_user(email='series@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        customer = Client.objects.create(name='Cliente Series', tenant=self.tenant)
+        local = Local.objects.create(name='Local Series', tenant=self.tenant)
+        account = Account.objects.create(name='Caja Series', account_type='Ingreso', code='SERIES-1', tenant=self.tenant)
+        for day, amount in ((datetime.date(2025, 1, 10), '100.00'), (datetime.date(2025, 1, 20), '50.00'), (datetime.date(2025, 2, 5), '70.00')):
+            sale = Sale.objects.create(client=customer, local=local, total_amount=Decimal(amount), payment_method='Efectivo', tenant=self.tenant)
+            transaction = Transaction.objects.create(tenant=self.tenant, account=account, amount=Decimal(amount), related_sale=sale)
+            Sale.objects.filter(pk=sale.pk).update(sale_date=at(day))
+            Transaction.objects.filter(pk=transaction.pk).update(date=day)
+        rollups.rebuild(self.tenant.id)
+
+    def test_monthly_sales_series(self):
+        response = self.client.get(reverse('sales-volume') + '?bucket=month')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['period'], row['total_sales']) for row in response.data],
+            [(datetime.date(2025, 1, 1), Decimal('150.00')), (datetime.date(2025, 2, 1), Decimal('70.00'))]
+        )
+
+    def test_date_range_without_bucket_keeps_total_shape(self):
+        response = self.client.get(reverse('revenue-expenses') + '?start_date=2025-01-15&end_date=2025-02-28')
+        self.assertEqual(response.data['total_revenue'], Decimal('120.00'))
+
+    def test_running_balance_series(self):
+        response = self.client.get(reverse('current-balance') + '?bucket=month&start_date=2025-02-01')
+        balances = response.data['account_balances']
+        self.assertEqual(len(balances), 1)
+        self.assertEqual(balances[0]['period'], datetime.date(2025, 2, 1))
+        self.assertEqual(balances[0]['balance'], Decimal('220.00'))
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(reverse('sales-volume') + '?bucket=year').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse('sales-volume') + '?start_date=01/01/2025').status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from core import deferred
+
+
+class DeferredBatchTests(TestCase):
+    def test_one_call_per_commit_without_rolled_back_savepoints(self):
+        calls = []
+        with self.captureOnCommitCallbacks(execute=True):
+            deferred.add('tests', calls.append, 1)
+            deferred.add('tests', calls.append, 2)
+            try:
+                with transaction.atomic():
+                    deferred.add('tests', calls.append, 3)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            deferred.add('tests', calls.append, 2)
+        self.assertEqual(calls, [{1, 2}])
+
+        # Lo que se agrega después de ejecutarse el lote va a uno nuevo.
+        with self.captureOnCommitCallbacks(execute=True):
+            deferred.add('tests', calls.append, 4)
+        self.assertEqual(calls, [{1, 2}, {4}])
+
+    def test_items_added_to_a_pending_batch_are_flushed(self):
+        calls = []
+        deferred.add('tests', calls.append, 1)  # fuera de la captura
+        with self.captureOnCommitCallbacks(execute=True):
+            deferred.add('tests', calls.append, 2)
+        self.assertEqual(calls, [{1, 2}])
+
+
+class DeferredRollbackTests(TransactionTestCase):
+    def test_rolled_back_transaction_does_not_leak_into_the_next(self):
+        calls = []
+        try:
+            with transaction.atomic():
+                deferred.add('tests', calls.append, 1)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with transaction.atomic():
+            deferred.add('tests', calls.append, 2)
+        self.assertEqual(calls, [{2}])
+
+        deferred.add('tests', calls.append, 3)  # sin transacción: enseguida
+        self.assertEqual(calls, [{2}, {3}])
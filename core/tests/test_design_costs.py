@@ -0,0 +1,109 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import design_costs
+from core.models import Design, DesignMaterial, DesignProcess, Process, RawMaterial, Tenant, User
+
+
+class DesignCostTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Costos')
+        self.design = Design.objects.create(name='Camiseta', tenant=self.tenant)
+        self.materials = [RawMaterial.objects.create(name=f'Material {i}', tenant=self.tenant) for i in range(3)]
+        self.process = Process.objects.create(name='Corte', cost=Decimal('99.00'), tenant=self.tenant)
+
+    def test_recipe_writes_recalculate_once_on_commit(self):
+        with mock.patch('core.design_costs._recalculate_chunk', wraps=design_costs._recalculate_chunk) as chunk:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for material in self.materials:
+                        DesignMaterial.objects.create(
+                            design=self.design, raw_material=material, quantity=Decimal('1.5'), cost=Decimal('10.00'),
+                            tenant=self.tenant
+                        )
+                    DesignProcess.objects.create(
+                        design=self.design, process=self.process, order=1, cost=Decimal('5.00'), tenant=self.tenant
+                    )
+        self.assertEqual(chunk.call_count, 1)
+        self.design.refresh_from_db()
+        self.assertEqual(self.design.calculated_cost, Decimal('50.00'))
+
+    def test_rolled_back_writes_do_not_lose_later_marks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        DesignProcess.objects.create(
+                            design=self.design, process=self.process, order=1, cost=Decimal('5.00'), tenant=self.tenant
+                        )
+                        raise ValueError
+                except ValueError:
+                    pass
+                DesignMaterial.objects.create(
+                    design=self.design, raw_material=self.materials[0], quantity=2, cost=Decimal('3.00'), tenant=self.tenant
+                )
+        self.design.refresh_from_db()
+        self.assertEqual(self.design.calculated_cost, Decimal('6.00'))
+
+    def test_command_recalculates_all_designs_with_constant_queries(self):
+        designs = [Design.objects.create(name=f'Diseño {i}', tenant=self.tenant) for i in range(20)]
+        DesignMaterial.objects.bulk_create([
+            DesignMaterial(design=design, raw_material=material, quantity=Decimal('0.5'), cost=Decimal('4.00'), tenant=self.tenant)
+            for design in designs for material in self.materials
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            call_command('recalculate_design_costs', '--tenant', str(self.tenant.id), stdout=StringIO())
+        self.assertLess(len(queries), 12)
+        self.assertEqual(
+            set(Design.objects.filter(pk__in=[design.pk for design in designs]).values_list('calculated_cost', flat=True)),
+            {Decimal('6.00')}
+        )
+
+
+class DesignCostApiTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant API Costos')
+        self.user = User.objects.create_user(email='costos@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.tenant.id))
+        self.materials = [RawMaterial.objects.create(name=f'Insumo {i}', tenant=self.tenant) for i in range(30)]
+        self.process = Process.objects.create(name='Estampado', tenant=self.tenant)
+
+    def payload(self, cost):
+        return {
+            'name': 'Buzo', 'category_id': None, 'size_ids': [],
+            'materials': [{'raw_material': material.pk, 'quantity': '2', 'cost': cost} for material in self.materials],
+            'processes': [{'process': self.process.pk, 'order': 1, 'cost': '15.00'}],
+        }
+
+    def test_saving_a_design_recalculates_once(self):
+        response = self.client.post(reverse('plantilla-list'), self.payload('1.00'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(Decimal(response.data['calculated_cost']), Decimal('75.00'))
+
+        url = reverse('plantilla-detail', args=[response.data['id']])
+        with mock.patch('core.design_costs._recalculate_chunk', wraps=design_costs._recalculate_chunk) as chunk:
+            response = self.client.put(url, self.payload('2.00'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(chunk.call_count, 1)
+        self.assertEqual(Decimal(response.data['calculated_cost']), Decimal('135.00'))
+
+    def test_recalculate_costs_job(self):
+        design = Design.objects.create(name='Desactualizado', calculated_cost=Decimal('1.00'), tenant=self.tenant)
+        DesignProcess.objects.bulk_create([
+            DesignProcess(design=design, process=self.process, order=1, cost=Decimal('8.00'), tenant=self.tenant)
+        ])
+        response = self.client.post(reverse('plantilla-recalculate-costs'))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        call_command('run_workers', '--once', stdout=StringIO())
+        design.refresh_from_db()
+        self.assertEqual(design.calculated_cost, Decimal('8.00'))
+        job = self.client.get(reverse('job-detail', args=[response.data['job']])).data
+        self.assertEqual(job['result'], {'designs': 1, 'changed': 1})
@@ -0,0 +1,57 @@
+import csv
+import datetime
+import io
+import json
+from decimal import Decimal
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from comercializadora.models import CommercialProduct, CommercialInventory
+from core.models import Tenant, User, Client, Sale, Account, Transaction, Warehouse
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Export')
+        self.user = User.objects.create_user(email='export@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.account = Account.objects.create(name='Caja Export', account_type='Activo', code='EXP-1', tenant=self.tenant)
+        for day, amount in ((datetime.date(2024, 12, 31), '5.00'), (datetime.date(2025, 3, 1), '12.50')):
+            transaction = Transaction.objects.create(tenant=self.tenant, account=self.account, amount=Decimal(amount))
+            Transaction.objects.filter(pk=transaction.pk).update(date=day)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content).decode()
+
+    def test_transactions_ndjson_with_date_range(self):
+        response = self.client.get(reverse('transaction-export') + '?start_date=2025-01-01')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(rows, [{
+            'id': rows[0]['id'], 'date': '2025-03-01', 'account_code': 'EXP-1', 'account_name': 'Caja Export',
+            'amount': '12.50', 'description': None, 'related_sale_id': None, 'related_purchase_id': None,
+            'cash_register_id': None,
+        }])
+
+    def test_sales_csv(self):
+        customer = Client.objects.create(name='Cliente, Export', tenant=self.tenant)
+        Sale.objects.create(client=customer, total_amount=Decimal('30.00'), payment_method='Efectivo', tenant=self.tenant)
+        rows = list(csv.DictReader(io.StringIO(self.read(self.client.get(reverse('sale-export') + '?output=csv')))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['client_name'], rows[0]['total_amount']), ('Cliente, Export', '30.00'))
+
+    def test_commercial_inventory_export_is_tenant_scoped(self):
+        warehouse = Warehouse.objects.create(name='Depósito Export', tenant=self.tenant)
+        other = Tenant.objects.create(name='Otro Tenant Export')
+        for tenant, sku in ((self.tenant, 'EXP-SKU-1'), (other, 'EXP-SKU-2')):
+            product = CommercialProduct.objects.create(sku=sku, name=f'Producto {sku}', tenant=tenant)
+            CommercialInventory.objects.create(commercial_product=product, warehouse=warehouse, quantity=7, tenant=tenant)
+        rows = self.read(self.client.get(reverse('commercialinventory-export'))).splitlines()
+        self.assertEqual([json.loads(line)['sku'] for line in rows], ['EXP-SKU-1'])
+
+    def test_invalid_output(self):
+        self.assertEqual(self.client.get(reverse('inventory-export') + '?output=xml').status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,78 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+import numpy as np
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import forecasting
+from core.models import Tenant, User, Client, Sale, DailySalesRollup
+
+
+class ForecastModelTests(SimpleTestCase):
+    def test_recovers_trend_and_seasonality(self):
+        months = np.arange(36)
+        seasonal = np.tile([10, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 30], 3)
+        values = 100 + 5 * months + seasonal
+        origin = 2023 * 12
+        model = forecasting.fit(values.astype(float), origin)
+        projection = forecasting.project(model, origin + 36, origin + 47)
+        expected = 100 + 5 * np.arange(36, 48) + seasonal[:12]
+        np.testing.assert_allclose([row['value'] for row in projection], expected, atol=1e-6)
+        self.assertEqual(projection[0]['date'], '2026-01-01')
+
+    def test_short_history_projects_mean_with_band(self):
+        model = forecasting.fit(np.array([80.0, 120.0]), 2024 * 12)
+        row = forecasting.project(model, 2024 * 12 + 2, 2024 * 12 + 2)[0]
+        self.assertEqual(row['value'], 100.0)
+        self.assertLess(row['lower'], 100.0)
+        self.assertGreater(row['upper'], 100.0)
+
+
+class ProjectedGrowthViewTests(APITestCase):
+    def setUp(self):
+        forecasting.get_cache().clear()
+        self.tenant = Tenant.objects.create(name='Tenant Proyecciones')
+        self.user = User.objects.create_user(email='forecast@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        for month in range(1, 13):
+            DailySalesRollup.objects.create(
+                tenant=self.tenant, date=datetime.date(2024, month, 15), total_amount=Decimal(1000 + 100 * month), sale_count=1
+            )
+        self.url = reverse('projected-growth') + (
+            '?data_type=sales&start_date=2024-01-01&end_date=2024-12-31'
+            '&projection_start_date=2025-01-01&projection_end_date=2025-03-31'
+        )
+
+    def test_projection_follows_history(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['date'] for row in response.data], ['2025-01-01', '2025-02-01', '2025-03-01'])
+        self.assertAlmostEqual(response.data[0]['value'], 2300.0, places=2)
+        self.assertLessEqual(response.data[0]['lower'], response.data[0]['value'])
+
+    def test_fitted_model_is_cached_until_new_data(self):
+        with mock.patch.object(forecasting, 'fit', wraps=forecasting.fit) as fit:
+            self.client.get(self.url)
+            self.client.get(self.url)
+            self.assertEqual(fit.call_count, 1)
+            customer = Client.objects.create(name='Cliente Proyecciones', tenant=self.tenant)
+            Sale.objects.create(client=customer, total_amount=Decimal('10.00'), payment_method='Efectivo', tenant=self.tenant)
+            self.client.get(self.url)
+            self.assertEqual(fit.call_count, 2)
+
+    @override_settings(FORECAST_CACHE_ALIAS='responses')
+    def test_generation_lives_in_the_shared_cache(self):
+        caches['default'].clear()
+        caches['responses'].clear()
+        self.client.get(self.url)
+        key = forecasting._generation_key(self.tenant.id, 'sales')
+        self.assertIsNotNone(caches['responses'].get(key))
+        self.assertIsNone(caches['default'].get(key))
+
+    def test_unknown_data_type(self):
+        response = self.client.get(self.url.replace('data_type=sales', 'data_type=weather'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,157 @@
+import datetime
+import shutil
+import tempfile
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from unittest import mock
+from core import bank_ingestion, jobs
+from core.models import Bank, BankStatement, BankTransaction, Job, Tenant, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CALLS = []
+
+
+@jobs.task('tests.echo')
+def echo(tenant_id, value):
+    CALLS.append(value)
+    return {'tenant': tenant_id, 'value': value}
+
+
+@jobs.task('tests.broken', max_attempts=2)
+def broken(tenant_id):
+    raise RuntimeError('sin conexión')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+        self.tenant = Tenant.objects.create(name='Tenant Jobs')
+
+    def test_runs_in_order_and_stores_result(self):
+        first = jobs.enqueue('tests.echo', self.tenant.id, value=1)
+        later = jobs.enqueue('tests.echo', self.tenant.id, delay=60, value=3)
+        second = jobs.enqueue('tests.echo', self.tenant.id, value=2)
+
+        self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual(CALLS, [1, 2])
+        first.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual((first.status, first.attempts, first.result), ('Completado', 1, {'tenant': self.tenant.id, 'value': 1}))
+        self.assertEqual(later.status, 'Pendiente')
+        self.assertEqual(Job.objects.get(pk=second.pk).status, 'Completado')
+
+    def test_failed_job_retries_with_backoff_then_errors(self):
+        job = jobs.enqueue('tests.broken', self.tenant.id)
+        with self.assertLogs('core.jobs', level='ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('Pendiente', 1))
+        self.assertIn('sin conexión', job.error)
+        self.assertGreater(job.run_at, timezone.now() + datetime.timedelta(seconds=jobs.RETRY_BASE_SECONDS - 5))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', level='ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('Error', 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_claimed_job_is_not_taken_twice_and_stale_jobs_return(self):
+        jobs.enqueue('tests.echo', self.tenant.id, value=1)
+        claimed = jobs.claim('worker-a')
+        self.assertEqual((claimed.status, claimed.locked_by), ('Procesando', 'worker-a'))
+        self.assertIsNone(jobs.claim('worker-b'))
+
+        Job.objects.filter(pk=claimed.pk).update(locked_at=timezone.now() - jobs.STALE_AFTER * 2)
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(jobs.claim('worker-b').attempts, 2)
+
+    def test_unknown_task(self):
+        with self.assertRaises(jobs.UnknownTask):
+            jobs.enqueue('tests.missing', self.tenant.id)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BankStatementJobApiTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant API Jobs')
+        self.user = User.objects.create_user(email='jobs@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.tenant.id))
+        self.bank = Bank.objects.create(name='Banco Ciudad', tenant=self.tenant)
+
+    def test_upload_enqueues_ingestion_job(self):
+        upload = SimpleUploadedFile('marzo.csv', b'fecha,descripcion,monto\n2025-03-01,Venta mostrador,1500\n')
+        response = self.client.post(
+            reverse('bankstatement-list'), {'bank': self.bank.pk, 'statement_date': '2025-03-31', 'file': upload}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'Pendiente')
+        job_url = reverse('job-detail', args=[response.data['job']])
+        self.assertEqual(self.client.get(job_url).data['status'], 'Pendiente')
+
+        call_command('run_workers', '--once', stdout=StringIO())
+
+        job = self.client.get(job_url).data
+        self.assertEqual(job['status'], 'Completado')
+        self.assertEqual((job['result']['status'], job['result']['lines_imported']), ('Procesado', 1))
+        self.assertEqual(BankStatement.objects.get(pk=response.data['id']).status, 'Procesado')
+        self.assertEqual(BankTransaction.objects.filter(tenant=self.tenant).count(), 1)
+        self.assertEqual(self.client.delete(job_url).status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_statement_left_processing_by_a_dead_worker_is_retried(self):
+        upload = SimpleUploadedFile('marzo.csv', b'fecha,descripcion,monto\n2025-03-01,Venta mostrador,1500\n')
+        response = self.client.post(
+            reverse('bankstatement-list'), {'bank': self.bank.pk, 'statement_date': '2025-03-31', 'file': upload}
+        )
+        statement = BankStatement.objects.get(pk=response.data['id'])
+        # El worker toma el trabajo y el extracto, y muere sin terminar.
+        job = jobs.claim('worker-muerto')
+        bank_ingestion.claim(statement.pk)
+        reprocess_url = reverse('bankstatement-reprocess', args=[statement.pk])
+        self.assertEqual(self.client.post(reprocess_url).status_code, status.HTTP_409_CONFLICT)
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.STALE_AFTER * 2)
+        self.assertEqual(jobs.requeue_stale(), 1)
+        jobs.run_pending()
+        job.refresh_from_db()
+        statement.refresh_from_db()
+        self.assertEqual((job.status, job.result['status'], statement.status), ('Completado', 'Procesado', 'Procesado'))
+
+    def test_hung_statement_without_a_running_job_can_be_reprocessed(self):
+        statement = BankStatement.objects.create(
+            bank=self.bank, statement_date=datetime.date(2025, 3, 31), status='Procesando', tenant=self.tenant
+        )
+        response = self.client.post(reverse('bankstatement-reprocess', args=[statement.pk]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'Pendiente')
+
+    def test_statement_errors_after_the_last_attempt(self):
+        upload = SimpleUploadedFile('marzo.csv', b'fecha,descripcion,monto\n2025-03-01,Venta mostrador,1500\n')
+        response = self.client.post(
+            reverse('bankstatement-list'), {'bank': self.bank.pk, 'statement_date': '2025-03-31', 'file': upload}
+        )
+        job = Job.objects.get(pk=response.data['job'])
+        statement = BankStatement.objects.get(pk=response.data['id'])
+        with mock.patch.object(bank_ingestion, 'ingest', side_effect=RuntimeError('base caída')), \
+                self.assertLogs('core.jobs', level='ERROR'):
+            for attempt in range(job.max_attempts):
+                Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+                jobs.run_pending()
+                statement.refresh_from_db()
+                if attempt < job.max_attempts - 1:
+                    self.assertEqual(statement.status, 'Pendiente')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Error')
+        self.assertEqual((statement.status, statement.error_message), ('Error', 'base caída'))
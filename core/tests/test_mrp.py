@@ -0,0 +1,111 @@
+import datetime
+import time
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import mrp
+from core.models import (
+    Design, DesignMaterial, MateriaPrimaProveedor, Product, ProductionOrder, ProductionOrderItem, RawMaterial, Tenant,
+    User, Warehouse
+)
+
+
+class MrpTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant MRP')
+        self.user = User.objects.create_user(email='mrp@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.tenant.id))
+        self.central = Warehouse.objects.create(name='Central', tenant=self.tenant)
+        self.taller = Warehouse.objects.create(name='Taller', tenant=self.tenant)
+        self.tela = RawMaterial.objects.create(name='Tela', unit_of_measure='metros', tenant=self.tenant)
+        self.hilo = RawMaterial.objects.create(name='Hilo', tenant=self.tenant)
+        MateriaPrimaProveedor.objects.create(raw_material=self.tela, warehouse=self.central, current_stock=20, tenant=self.tenant)
+        MateriaPrimaProveedor.objects.create(raw_material=self.tela, warehouse=self.taller, current_stock=5, tenant=self.tenant)
+        MateriaPrimaProveedor.objects.create(raw_material=self.hilo, warehouse=self.central, current_stock=100, tenant=self.tenant)
+        design = Design.objects.create(name='Camiseta', tenant=self.tenant)
+        DesignMaterial.objects.create(design=design, raw_material=self.tela, quantity=Decimal('1.5'), tenant=self.tenant)
+        DesignMaterial.objects.create(design=design, raw_material=self.hilo, quantity=Decimal('2'), tenant=self.tenant)
+        self.product = Product.objects.create(name='Camiseta', design=design, tenant=self.tenant)
+        self.orders = [
+            self.order(datetime.date(2026, 11, 1), 10),
+            self.order(datetime.date(2026, 11, 10), 6),
+            self.order(datetime.date(2026, 11, 20), 4),
+        ]
+        self.order(datetime.date(2026, 10, 1), 50, status='Completada')
+
+    def order(self, delivery, quantity, status='Pendiente'):
+        order = ProductionOrder.objects.create(
+            base_product=self.product, op_type='Indumentaria', status=status, estimated_delivery_date=delivery,
+            tenant=self.tenant
+        )
+        ProductionOrderItem.objects.create(
+            production_order=order, product=self.product, quantity=quantity, size='M', tenant=self.tenant
+        )
+        return order
+
+    def test_plan_nets_open_orders_against_stock(self):
+        result = mrp.plan(self.tenant.id)
+        self.assertEqual((result['orders'], result['shortages']), (3, 1))
+        tela, hilo = result['materials']
+        self.assertEqual(tela['raw_material'], self.tela.pk)
+        self.assertEqual((tela['required'], tela['available'], tela['shortage']), (30.0, 25.0, 5.0))
+        # 15 m para la primera OP alcanzan, con la segunda se llega a 24 y con la tercera a 30.
+        self.assertEqual((tela['short_from'], tela['short_order']), (datetime.date(2026, 11, 20), self.orders[2].pk))
+        self.assertEqual(
+            [(row['warehouse_name'], row['stock']) for row in tela['stock_by_warehouse']], [('Central', 20.0), ('Taller', 5.0)]
+        )
+        self.assertEqual((hilo['required'], hilo['shortage'], hilo['short_from']), (40.0, 0.0, None))
+
+    def test_plan_with_warehouse_filter(self):
+        result = mrp.plan(self.tenant.id, warehouse_ids=[self.central.pk])
+        tela = result['materials'][0]
+        self.assertEqual((tela['available'], tela['short_order']), (20.0, self.orders[1].pk))
+
+    def test_mrp_endpoint(self):
+        response = self.client.get(reverse('productionorder-mrp'), {'shortages': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['name'] for row in response.data['materials']], ['Tela'])
+        response = self.client.get(reverse('productionorder-mrp'), {'warehouse': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MrpScaleTests(TestCase):
+    def test_hundreds_of_orders_in_constant_queries(self):
+        tenant = Tenant.objects.create(name='Tenant MRP Escala')
+        materials = RawMaterial.objects.bulk_create([
+            RawMaterial(name=f'Insumo {i}', tenant=tenant) for i in range(200)
+        ])
+        designs = Design.objects.bulk_create([Design(name=f'Diseño {i}', tenant=tenant) for i in range(50)])
+        DesignMaterial.objects.bulk_create([
+            DesignMaterial(design=design, raw_material=materials[(d * 7 + m) % 200], quantity=Decimal('0.25'), tenant=tenant)
+            for d, design in enumerate(designs) for m in range(40)
+        ])
+        MateriaPrimaProveedor.objects.bulk_create([
+            MateriaPrimaProveedor(raw_material=material, current_stock=50, tenant=tenant) for material in materials
+        ])
+        products = Product.objects.bulk_create([
+            Product(name=design.name, design=design, tenant=tenant) for design in designs
+        ])
+        orders = ProductionOrder.objects.bulk_create([
+            ProductionOrder(base_product=products[i % 50], op_type='Medias', tenant=tenant) for i in range(400)
+        ])
+        ProductionOrderItem.objects.bulk_create([
+            ProductionOrderItem(production_order=order, product=order.base_product, quantity=12, size=size, tenant=tenant)
+            for order in orders for size in ('S', 'M', 'L')
+        ])
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            result = mrp.plan(tenant.id)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(queries), 4)
+        self.assertEqual(result['orders'], 400)
+        self.assertLess(elapsed, 1)
+        # 2000 líneas de receta × 8 OPs por diseño × 36 unidades × 0,25.
+        self.assertEqual(sum(row['required'] for row in result['materials']), 144000.0)
+        self.assertEqual(result['shortages'], len(result['materials']))
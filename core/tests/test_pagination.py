@@ -0,0 +1,44 @@
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Tenant, User, Account, Transaction
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Paginacion')
+        self.other_tenant = Tenant.objects.create(name='Otro Tenant Paginacion')
+        self.user = User.objects.create_user(email='pagination@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+
+        account = Account.objects.create(name='Caja', account_type='Activo', code='PAG-1', tenant=self.tenant)
+        other_account = Account.objects.create(name='Caja', account_type='Activo', code='PAG-2', tenant=self.other_tenant)
+        for i in range(7):
+            Transaction.objects.create(tenant=self.tenant, account=account, amount=Decimal(i + 1))
+        Transaction.objects.create(tenant=self.other_tenant, account=other_account, amount=Decimal('99'))
+
+    def test_list_without_params_is_not_paginated(self):
+        response = self.client.get(reverse('transaction-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 7)
+
+    def test_cursor_walks_all_rows_once(self):
+        url = reverse('transaction-list') + '?page_size=3'
+        seen = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+            pages += 1
+        self.assertEqual(pages, 3)
+        expected = list(Transaction.objects.filter(tenant=self.tenant).order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_tampered_cursor_is_rejected(self):
+        response = self.client.get(reverse('transaction-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,45 @@
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Tenant, User, Design, RawMaterial, DesignMaterial, Size, Color, Product
+from core.tests.utils import NPlusOneGuardMixin
+
+
+class ProductCatalogTests(NPlusOneGuardMixin, APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Catalogo')
+        self.user = User.objects.create_user(email='catalog@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.size = Size.objects.create(name='XL', tenant=self.tenant)
+        self.colors = [Color.objects.create(name=f'Color {i}', tenant=self.tenant) for i in range(2)]
+        self.design = Design.objects.create(name='Camiseta Base', tenant=self.tenant)
+        raw_material = RawMaterial.objects.create(name='Tela Catalogo', tenant=self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):  # el costo se recalcula al confirmar
+            DesignMaterial.objects.create(design=self.design, raw_material=raw_material, quantity=Decimal('1.0'), cost=Decimal('42.50'), tenant=self.tenant)
+
+    def make_product(self, i):
+        product = Product.objects.create(name=f'Producto {i}', sku=f'CAT-{i}', design=self.design, size=self.size, tenant=self.tenant)
+        product.colors.set(self.colors)
+        return product
+
+    def test_compact_list(self):
+        product = self.make_product(1)
+        response = self.client.get(reverse('products-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row = response.data[0]
+        self.assertEqual(row['id'], product.id)
+        self.assertEqual(row['design_name'], 'Camiseta Base')
+        self.assertEqual(row['cost'], '42.50')
+        self.assertEqual(sorted(row['color_ids']), sorted(c.id for c in self.colors))
+        self.assertNotIn('design', row)
+
+    def test_compact_list_query_count_is_constant(self):
+        self.assertListQueriesConstant(reverse('products-list'), self.make_product)
+
+    def test_expand_recipe_returns_full_design(self):
+        self.make_product(1)
+        response = self.client.get(reverse('products-list') + '?expand=recipe')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data[0]['design']['materials']), 1)
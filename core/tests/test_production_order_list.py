@@ -0,0 +1,62 @@
+import datetime
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import (
+    Tenant, User, Client, Contact, Sale, SaleItem, OrderNote, Product, Size, Color,
+    ProductionOrder, ProductionOrderItem, Account, Transaction
+)
+from core.tests.utils import NPlusOneGuardMixin
+
+
+class ProductionOrderListTests(NPlusOneGuardMixin, APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant OPs')
+        self.user = User.objects.create_user(email='ops@example.com', password='password123', first_name='Vendedor', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.account = Account.objects.create(name='Caja', account_type='Activo', code='OPS-1', tenant=self.tenant)
+        self.size = Size.objects.create(name='L', tenant=self.tenant)
+        self.color = Color.objects.create(name='Azul', tenant=self.tenant)
+
+    def make_order(self, i, paid=Decimal('0.00')):
+        client = Client.objects.create(name=f'Club {i}', tenant=self.tenant)
+        Contact.objects.create(client=client, name=f'Contacto {i}', tenant=self.tenant)
+        product = Product.objects.create(name=f'Camiseta {i}', size=self.size, tenant=self.tenant)
+        product.colors.set([self.color])
+        sale = Sale.objects.create(client=client, user=self.user, total_amount=Decimal('100.00'), payment_method='Efectivo', tenant=self.tenant)
+        SaleItem.objects.create(sale=sale, product=product, quantity=2, unit_price=Decimal('50.00'), tenant=self.tenant)
+        if paid:
+            Transaction.objects.create(tenant=self.tenant, account=self.account, amount=paid, related_sale=sale)
+        order_note = OrderNote.objects.create(sale=sale, estimated_delivery_date=datetime.date(2025, 1, 1), tenant=self.tenant)
+        order = ProductionOrder.objects.create(order_note=order_note, base_product=product, op_type='Indumentaria', tenant=self.tenant)
+        order.colors.set([self.color])
+        ProductionOrderItem.objects.create(production_order=order, product=product, quantity=2, size='L', tenant=self.tenant)
+        return order
+
+    def test_list_query_count_is_constant(self):
+        url = reverse('productionorder-list')
+        self.assertListQueriesConstant(url, self.make_order)
+        self.assertListQueriesConstant(url + '?expand=sale', lambda i: self.make_order(100 + i))
+
+    def test_compact_list_includes_client_and_payment_status(self):
+        self.make_order(1, paid=Decimal('40.00'))
+        response = self.client.get(reverse('productionorder-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sale = response.data[0]['order_note']['sale']
+        self.assertEqual(sale['client']['name'], 'Club 1')
+        self.assertEqual(sale['payment_status'], 'Pago Parcial')
+        self.assertNotIn('items', sale)
+
+    def test_detail_expands_sale_block(self):
+        order = self.make_order(2, paid=Decimal('100.00'))
+        response = self.client.get(reverse('productionorder-detail', args=[order.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sale = response.data['order_note']['sale']
+        self.assertEqual(sale['payment_status'], 'Pagado')
+        self.assertEqual(len(sale['items']), 1)
+        self.assertEqual(sale['client']['contacts'][0]['name'], 'Contacto 2')
+
+    def test_order_note_list_query_count_is_constant(self):
+        self.assertListQueriesConstant(reverse('ordernote-list'), self.make_order)
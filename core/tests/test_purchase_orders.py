@@ -0,0 +1,49 @@
+import datetime
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Tenant, User, Supplier, RawMaterial, PurchaseOrder, PurchaseOrderItem, Payment
+from core.tests.utils import NPlusOneGuardMixin
+
+
+class PurchaseOrderTotalsTests(NPlusOneGuardMixin, APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Compras')
+        self.user = User.objects.create_user(email='compras@example.com', password='password123', first_name='Comprador', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.supplier = Supplier.objects.create(name='Proveedor Compras', tenant=self.tenant)
+        self.raw_material = RawMaterial.objects.create(name='Tela Compras', tenant=self.tenant)
+
+    def make_order(self, i, paid=Decimal('0.00')):
+        order = PurchaseOrder.objects.create(
+            supplier=self.supplier, user=self.user, expected_delivery_date=datetime.date(2025, 1, 1), tenant=self.tenant
+        )
+        PurchaseOrderItem.objects.create(purchase_order=order, raw_material=self.raw_material, quantity=2, unit_price=Decimal('25.00'), tenant=self.tenant)
+        PurchaseOrderItem.objects.create(purchase_order=order, raw_material=self.raw_material, quantity=1, unit_price=Decimal(i), tenant=self.tenant)
+        if paid:
+            Payment.objects.create(purchase_order=order, date=datetime.date(2025, 1, 2), amount=paid, payment_method='Efectivo', tenant=self.tenant)
+        return order
+
+    def test_list_query_count_is_constant(self):
+        self.assertListQueriesConstant(reverse('purchaseorder-list'), self.make_order)
+
+    def test_totals_come_from_annotations(self):
+        order = self.make_order(10, paid=Decimal('15.00'))
+        response = self.client.get(reverse('purchaseorder-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row = next(row for row in response.data if row['id'] == order.id)
+        self.assertEqual(Decimal(row['total_amount']), Decimal('60.00'))
+        self.assertEqual(Decimal(row['paid_amount']), Decimal('15.00'))
+        self.assertEqual(Decimal(row['outstanding_balance']), Decimal('45.00'))
+        self.assertEqual(row['user_name'], 'Comprador')
+
+    def test_filter_and_order_by_outstanding_balance(self):
+        settled = self.make_order(10, paid=Decimal('60.00'))
+        small = self.make_order(5)
+        large = self.make_order(50)
+        response = self.client.get(reverse('purchaseorder-list') + '?has_balance=true&ordering=-outstanding_balance')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data], [large.id, small.id])
+        self.assertNotIn(settled.id, [row['id'] for row in response.data])
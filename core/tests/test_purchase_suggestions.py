@@ -0,0 +1,125 @@
+import datetime
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import purchase_suggestions
+from core.models import (
+    DailyExpenseRollup, Design, DesignMaterial, MateriaPrimaProveedor, Product, ProductionOrder, ProductionOrderItem,
+    PurchaseOrder, PurchaseOrderItem, RawMaterial, Supplier, Tenant, User, Warehouse
+)
+
+
+class PurchaseSuggestionTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Compras Sugeridas')
+        self.user = User.objects.create_user(email='compras@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.tenant.id))
+        self.textil = Supplier.objects.create(name='Textil Norte', tenant=self.tenant)
+        self.avios = Supplier.objects.create(name='Avíos Sur', tenant=self.tenant)
+        central = Warehouse.objects.create(name='Central', tenant=self.tenant)
+        taller = Warehouse.objects.create(name='Taller', tenant=self.tenant)
+        self.tela = RawMaterial.objects.create(name='Tela', tenant=self.tenant)
+        self.hilo = RawMaterial.objects.create(name='Hilo', tenant=self.tenant)
+        self.boton = RawMaterial.objects.create(name='Botón', tenant=self.tenant)
+        lots = [
+            (self.tela, central, self.textil, '10.00', 20),
+            (self.tela, taller, self.avios, '8.00', 0),
+            (self.hilo, central, self.avios, '3.00', 10),
+        ]
+        for material, warehouse, supplier, cost, stock in lots:
+            MateriaPrimaProveedor.objects.create(
+                raw_material=material, warehouse=warehouse, supplier=supplier, cost=Decimal(cost), current_stock=stock,
+                tenant=self.tenant
+            )
+        design = Design.objects.create(name='Camiseta', tenant=self.tenant)
+        for material, quantity in ((self.tela, '1.55'), (self.hilo, '1'), (self.boton, '4')):
+            DesignMaterial.objects.create(design=design, raw_material=material, quantity=Decimal(quantity), tenant=self.tenant)
+        product = Product.objects.create(name='Camiseta', design=design, tenant=self.tenant)
+        order = ProductionOrder.objects.create(
+            base_product=product, op_type='Indumentaria', estimated_delivery_date=datetime.date(2030, 3, 1),
+            tenant=self.tenant
+        )
+        ProductionOrderItem.objects.create(production_order=order, product=product, quantity=20, size='M', tenant=self.tenant)
+
+    def test_cheapest_supplier_per_material(self):
+        result = purchase_suggestions.suggest(self.tenant.id)
+        self.assertEqual([group['supplier_name'] for group in result['suppliers']], ['Avíos Sur'])
+        items = {item['name']: item for item in result['suppliers'][0]['items']}
+        # Tela: 31 requeridos, 20 en stock; hilo: 20 requeridos, 10 en stock.
+        self.assertEqual((items['Tela']['quantity'], items['Tela']['unit_price']), (11, Decimal('8.00')))
+        self.assertEqual((items['Hilo']['quantity'], items['Hilo']['unit_price']), (10, Decimal('3.00')))
+        self.assertEqual(result['suppliers'][0]['total'], Decimal('118.00'))
+        self.assertEqual(result['suppliers'][0]['expected_delivery_date'], datetime.date(2030, 3, 1))
+        self.assertEqual([item['name'] for item in result['unassigned']], ['Botón'])
+
+    def test_preferred_supplier_is_the_last_one_bought_from(self):
+        last = PurchaseOrder.objects.create(
+            supplier=self.textil, expected_delivery_date=datetime.date(2026, 1, 1), status='Pagada', tenant=self.tenant
+        )
+        PurchaseOrderItem.objects.create(
+            purchase_order=last, raw_material=self.tela, quantity=5, unit_price=Decimal('9.00'), tenant=self.tenant
+        )
+        result = purchase_suggestions.suggest(self.tenant.id, 'preferred')
+        suppliers = {group['supplier_name']: [item['name'] for item in group['items']] for group in result['suppliers']}
+        self.assertEqual(suppliers, {'Textil Norte': ['Tela'], 'Avíos Sur': ['Hilo']})
+
+    def test_post_creates_one_draft_per_supplier_in_bulk(self):
+        url = reverse('purchaseorder-suggestions')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'strategy': 'preferred'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "core_purchaseorder')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(len(response.data['orders']), 1)
+        order = response.data['orders'][0]
+        self.assertEqual((order['status'], order['supplier_name'], order['total_amount']), ('Borrador', 'Avíos Sur', Decimal('118.00')))
+        self.assertEqual(len(order['items']), 2)
+
+        # Lo ya pedido en borradores se descuenta: no se duplica.
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.data['orders'], [])
+
+        # Los borradores no son deuda con el proveedor.
+        response = self.client.get(reverse('supplier-payables'))
+        self.assertEqual(response.data, [])
+
+    def test_confirmed_orders_still_count_until_received(self):
+        url = reverse('purchaseorder-suggestions')
+        response = self.client.post(url, format='json')
+        order = PurchaseOrder.objects.get(pk=response.data['orders'][0]['id'])
+        order.status = 'Pendiente'
+        order.save()
+        response = self.client.post(url, format='json')
+        self.assertEqual(response.data['orders'], [])
+
+        order.status = PurchaseOrder.RECEIVED
+        order.save()
+        response = self.client.post(url, format='json')
+        self.assertEqual(len(response.data['orders']), 1)
+
+    def test_drafts_only_count_as_purchases_once_confirmed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('purchaseorder-suggestions'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        expenses = DailyExpenseRollup.objects.filter(tenant=self.tenant, source='Compras')
+        self.assertFalse(expenses.exists())
+
+        order = PurchaseOrder.objects.get(pk=response.data['orders'][0]['id'])
+        order.status = 'Pendiente'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        self.assertEqual(list(expenses.values_list('date', 'amount')), [(order.order_date, Decimal('118.00'))])
+
+        # Volver a borrador lo saca del gasto.
+        order.status = purchase_suggestions.DRAFT
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        self.assertFalse(expenses.exclude(amount=0).exists())
+
+    def test_invalid_strategy(self):
+        response = self.client.get(reverse('purchaseorder-suggestions'), {'strategy': 'fastest'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,148 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import jobs, qr_labels
+from core.models import MateriaPrimaProveedor, ProductionOrder, RawMaterial, Supplier, Tenant, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class RenderTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_repeated_contents_come_from_cache(self):
+        with mock.patch('core.qr_labels.render_png', wraps=qr_labels.render_png) as render:
+            first = qr_labels.render_many(['Lote A', 'Lote B', 'Lote A'], processes=1)
+            second = qr_labels.render_many(['Lote B', 'Lote A'], processes=1)
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(first, second)
+        self.assertEqual(Image.open(BytesIO(first[qr_labels.content_hash('Lote A')])).format, 'PNG')
+
+    def test_pool_renders_same_images(self):
+        texts = [f'Lote {i}' for i in range(qr_labels.POOL_MIN_ITEMS + 6)]
+        images = qr_labels.render_many(texts, processes=2)
+        self.assertEqual(len(images), len(texts))
+        self.assertEqual(images[qr_labels.content_hash('Lote 3')], qr_labels.render_png('Lote 3'))
+
+    def test_sheet_pages(self):
+        labels = [(f'Lote {i}', f'Etiqueta {i}') for i in range(qr_labels.COLUMNS * qr_labels.ROWS + 1)]
+        self.assertEqual(qr_labels.page_count(labels), 2)
+        pdf = qr_labels.compose_sheet(labels, 'pdf', processes=1)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertEqual(pdf.count(b'/Type /Page\n') + pdf.count(b'/Type /Page\r'), 2)
+        png = Image.open(BytesIO(qr_labels.compose_sheet(labels, 'png', page=2, processes=1)))
+        self.assertEqual(png.size, qr_labels.PAGE_SIZE)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QRLabelApiTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        caches['default'].clear()
+        self.tenant = Tenant.objects.create(name='Tenant QR')
+        self.user = User.objects.create_user(email='qr@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.tenant.id))
+        supplier = Supplier.objects.create(name='Hilados SA', tenant=self.tenant)
+        self.lots = []
+        for i in range(12):
+            material = RawMaterial.objects.create(name=f'Tela {i}', tenant=self.tenant)
+            self.lots.append(MateriaPrimaProveedor.objects.create(
+                raw_material=material, supplier=supplier, current_stock=Decimal(10 + i),
+                batch_number=f'L-{i}', tenant=self.tenant
+            ))
+        self.url = reverse('materiaprimaproveedor-qr-label-sheet')
+
+    def test_lot_label_sheet(self):
+        ids = [lot.pk for lot in self.lots]
+        self.client.post(self.url, {'ids': ids[:1]}, format='json')  # tenant en cache
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, {'ids': ids[:2]}, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertEqual(len(queries), len(small))
+
+        response = self.client.post(self.url, {'ids': ids, 'output': 'png'}, format='json')
+        self.assertEqual((response['Content-Type'], response['X-Total-Pages']), ('image/png', '1'))
+
+    def test_large_sheet_goes_to_the_job_queue(self):
+        ids = [lot.pk for lot in self.lots]
+        with mock.patch.object(qr_labels, 'SYNC_MAX_LABELS', 5):
+            response = self.client.post(self.url, {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        result_url = reverse('materiaprimaproveedor-qr-label-sheet-result', args=[response.data['job']])
+        self.assertEqual(self.client.get(result_url).status_code, status.HTTP_409_CONFLICT)
+
+        jobs.run_pending()
+        sheet = self.client.get(result_url)
+        self.assertEqual((sheet.status_code, sheet['Content-Type'], sheet['X-Total-Pages']), (200, 'application/pdf', '1'))
+        self.assertTrue(b''.join(sheet.streaming_content).startswith(b'%PDF'))
+
+        other = Tenant.objects.create(name='Otro QR Cola')
+        self.client.credentials(HTTP_X_TENANT_ID=str(other.id))
+        self.user.tenant = other
+        self.user.save()
+        self.assertEqual(self.client.get(result_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_viewset_must_define_qr_labels(self):
+        with self.assertRaises(TypeError):
+            type('SinEtiquetas', (qr_labels.QRLabelSheetMixin,), {})
+
+    def test_foreign_or_invalid_ids(self):
+        other = Tenant.objects.create(name='Otro QR')
+        foreign = MateriaPrimaProveedor.objects.create(
+            raw_material=RawMaterial.objects.create(name='Ajena', tenant=other), tenant=other
+        )
+        response = self.client.post(self.url, {'ids': [self.lots[0].pk, foreign.pk]}, format='json')
+        self.assertEqual((response.status_code, response.data['ids']), (status.HTTP_404_NOT_FOUND, [foreign.pk]))
+        response = self.client.post(self.url, {'ids': [self.lots[0].pk], 'output': 'png', 'page': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_production_order_labels_and_single_code(self):
+        order = ProductionOrder.objects.create(op_type='Medias', equipo='Club Atlético', tenant=self.tenant)
+        response = self.client.post(reverse('productionorder-qr-label-sheet'), {'ids': [order.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('productionorder-generate-qr-code', args=[order.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['qr_code_data'])
+
+    def test_lot_qr_is_stored_by_content_hash(self):
+        lot = self.lots[0]
+        response = self.client.post(reverse('materiaprimaproveedor-generate-qr-code', args=[lot.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lot.refresh_from_db()
+        self.assertEqual(len(lot.qr_code), 64)
+        self.assertTrue(response.data['qr_code_url'].endswith(f'/qr/{lot.qr_code}.png'))
+
+        listing = self.client.get(reverse('materiaprimaproveedor-list'))
+        row = next(row for row in listing.data if row['id'] == lot.pk)
+        self.assertNotIn('qr_code_data', row)
+        self.assertEqual(row['qr_code_url'], response.data['qr_code_url'])
+
+        self.client.credentials()  # la imagen se pide sin token, desde un <img>
+        image = self.client.get(reverse('qr-code-image', args=[lot.qr_code]))
+        self.assertEqual((image.status_code, image['Content-Type']), (status.HTTP_200_OK, 'image/png'))
+        self.assertIn('immutable', image['Cache-Control'])
+        self.assertEqual(b''.join(image.streaming_content)[:8], b'\x89PNG\r\n\x1a\n')
+        cached = self.client.get(reverse('qr-code-image', args=[lot.qr_code]), HTTP_IF_NONE_MATCH=image['ETag'])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        missing = self.client.get(reverse('qr-code-image', args=['0' * 64]))
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,68 @@
+import datetime
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from core.models import (
+    Tenant, User, RawMaterial, Supplier, Warehouse, MateriaPrimaProveedor, Employee, Factory,
+    EmployeeRole, PaymentMethodType, Bank, FinancialCostRule, Salary, Client, Contact
+)
+from core.tests.utils import NPlusOneGuardMixin
+
+
+class QueryPlanTests(NPlusOneGuardMixin, APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Query Plans')
+        self.user = User.objects.create_user(email='plans@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.warehouse = Warehouse.objects.create(name='Central', tenant=self.tenant)
+
+    def test_materia_prima_proveedor_list(self):
+        def make_row(i):
+            raw_material = RawMaterial.objects.create(name=f'Tela {i}', tenant=self.tenant)
+            supplier = Supplier.objects.create(name=f'Proveedor {i}', tenant=self.tenant)
+            MateriaPrimaProveedor.objects.create(
+                raw_material=raw_material, supplier=supplier, warehouse=self.warehouse,
+                cost=Decimal('10.00'), current_stock=Decimal('5.00'), tenant=self.tenant
+            )
+        self.assertListQueriesConstant(reverse('materiaprimaproveedor-list'), make_row)
+
+    def test_raw_material_list(self):
+        def make_row(i):
+            raw_material = RawMaterial.objects.create(name=f'Hilo {i}', tenant=self.tenant)
+            MateriaPrimaProveedor.objects.create(raw_material=raw_material, cost=Decimal(i), tenant=self.tenant)
+        self.assertListQueriesConstant(reverse('rawmaterial-list'), make_row)
+
+    def test_employee_list(self):
+        def make_row(i):
+            Employee.objects.create(
+                first_name=f'Nombre {i}', last_name='Apellido', dni=str(i), cuil=str(i), address='Calle 1',
+                factory=Factory.objects.create(name=f'Planta {i}', location='X', tenant=self.tenant),
+                role=EmployeeRole.objects.create(name=f'Rol {i}', tenant=self.tenant),
+                hire_date=datetime.date(2024, 1, 1), tenant=self.tenant
+            )
+        self.assertListQueriesConstant(reverse('employee-list'), make_row)
+
+    def test_financial_cost_rule_list(self):
+        def make_row(i):
+            FinancialCostRule.objects.create(
+                payment_method=PaymentMethodType.objects.create(name=f'Tarjeta {i}', tenant=self.tenant),
+                bank=Bank.objects.create(name=f'Banco {i}', tenant=self.tenant),
+                percentage=Decimal('3.50'), tenant=self.tenant
+            )
+        self.assertListQueriesConstant(reverse('financialcostrule-list'), make_row)
+
+    def test_salary_list(self):
+        def make_row(i):
+            employee = Employee.objects.create(
+                first_name=f'Empleado {i}', last_name='Apellido', dni=str(i), cuil=str(i), address='Calle 1',
+                hire_date=datetime.date(2024, 1, 1), tenant=self.tenant
+            )
+            Salary.objects.create(employee=employee, amount=Decimal('1000.00'), pay_date=datetime.date(2024, 2, 1), tenant=self.tenant)
+        self.assertListQueriesConstant(reverse('salary-list'), make_row)
+
+    def test_client_list(self):
+        def make_row(i):
+            client = Client.objects.create(name=f'Cliente {i}', tenant=self.tenant)
+            Contact.objects.create(client=client, name=f'Contacto {i}', tenant=self.tenant)
+        self.assertListQueriesConstant(reverse('client-list'), make_row)
@@ -0,0 +1,141 @@
+import datetime
+import time
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import (
+    Account, Bank, BankReconciliation, BankStatement, BankTransaction, Check, Payment, PurchaseOrder, Supplier,
+    Tenant, Transaction, User,
+)
+from core.reconciliation import reconcile, similarity, normalize
+
+MARCH = datetime.date(2025, 3, 1)
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Conciliación')
+        bank = Bank.objects.create(name='Banco Galicia', tenant=self.tenant)
+        self.statement = BankStatement.objects.create(
+            bank=bank, statement_date=MARCH, file='bank_statements/marzo.csv', tenant=self.tenant, status='Procesado'
+        )
+        self.expenses = Account.objects.create(name='Gastos', account_type='Egreso', code='5.1', tenant=self.tenant)
+        self.supplier = Supplier.objects.create(name='Telas del Sur', tenant=self.tenant)
+
+    def line(self, day, amount, description):
+        return BankTransaction.objects.create(
+            bank_statement=self.statement, date=MARCH + datetime.timedelta(days=day), amount=Decimal(amount),
+            description=description, tenant=self.tenant
+        )
+
+    def payment(self, day, amount, method='Transferencia'):
+        order = PurchaseOrder.objects.create(supplier=self.supplier, expected_delivery_date=MARCH, tenant=self.tenant)
+        return Payment.objects.create(
+            purchase_order=order, date=MARCH + datetime.timedelta(days=day), amount=Decimal(amount),
+            payment_method=method, tenant=self.tenant
+        )
+
+    def test_matches_by_amount_date_and_description(self):
+        rent = Transaction.objects.create(description='Alquiler local', amount=Decimal('50000'), account=self.expenses, tenant=self.tenant)
+        Transaction.objects.filter(pk=rent.pk).update(date=MARCH + datetime.timedelta(days=3))
+        own_check = Check.objects.create(
+            order_number='000123', amount=Decimal('50000'), issuer='Fanáticos', is_own=True,
+            due_date=MARCH + datetime.timedelta(days=4), receiver='Telas del Sur', tenant=self.tenant
+        )
+        supplier_payment = self.payment(10, '18250.40')
+        self.payment(30, '18250.40')  # fuera de la ventana
+        rent_line = self.line(3, '-50000', 'DEB. ALQUILER LOCAL MARZO')
+        check_line = self.line(5, '-50000', 'CHEQUE 000123 TELAS DEL SUR')
+        payment_line = self.line(11, '-18250.40', 'TRANSFERENCIA TELAS DEL SUR SA')
+        self.line(12, '999.99', 'Acreditación sin movimiento')
+        self.line(13, '18250.40', 'Crédito con importe de un pago')  # sentido opuesto
+
+        summary = reconcile(self.tenant.id, statement_id=self.statement.id)
+
+        self.assertEqual((summary['bank_lines'], summary['matched'], summary['unmatched']), (5, 3, 2))
+        matches = {r.bank_transaction_id: r for r in BankReconciliation.objects.all()}
+        self.assertEqual(matches[rent_line.pk].transaction_id, rent.pk)
+        self.assertEqual(matches[check_line.pk].check_record_id, own_check.pk)
+        self.assertEqual(matches[payment_line.pk].payment_id, supplier_payment.pk)
+
+        # Lo ya conciliado no vuelve a entrar.
+        self.assertEqual(reconcile(self.tenant.id)['matched'], 0)
+
+    def test_month_of_lines_reconciles_with_constant_queries(self):
+        count = 3000
+        BankTransaction.objects.bulk_create([
+            BankTransaction(
+                bank_statement=self.statement, date=MARCH + datetime.timedelta(days=i % 28),
+                amount=-(Decimal(1000 + i) + Decimal('0.25')), description=f'TRANSFERENCIA PROVEEDOR {i}', tenant=self.tenant
+            ) for i in range(count)
+        ])
+        Payment.objects.bulk_create([
+            Payment(
+                date=MARCH + datetime.timedelta(days=i % 28 + i % 3), amount=Decimal(1000 + i) + Decimal('0.25'),
+                payment_method=f'Transferencia proveedor {i}', tenant=self.tenant
+            ) for i in range(count)
+        ])
+
+        started = time.monotonic()
+        with CaptureQueriesContext(connection) as queries:
+            summary = reconcile(self.tenant.id)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual((summary['matched'], summary['unmatched']), (count, 0))
+        self.assertLess(len(queries), 40)
+        self.assertLess(elapsed, 10)
+
+    def test_similarity(self):
+        self.assertEqual(normalize('Transferencia  Telas-del Sur S.A.'), 'transferencia telas del sur s a')
+        self.assertGreater(similarity(normalize('TRANSF TELAS DEL SUR'), normalize('Telas del Sur')), 0.9)
+        self.assertLess(similarity(normalize('Alquiler'), normalize('Cheque 000123')), 0.5)
+
+
+class BankReconciliationApiTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant API Conciliación')
+        self.user = User.objects.create_user(email='conciliacion@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_TENANT_ID=str(self.tenant.id))
+        bank = Bank.objects.create(name='Banco Macro', tenant=self.tenant)
+        statement = BankStatement.objects.create(
+            bank=bank, statement_date=MARCH, file='bank_statements/marzo.csv', tenant=self.tenant, status='Procesado'
+        )
+        self.line = BankTransaction.objects.create(
+            bank_statement=statement, date=MARCH, amount=Decimal('-300'), description='Débito varios', tenant=self.tenant
+        )
+        self.payment = Payment.objects.create(date=MARCH, amount=Decimal('300'), payment_method='Débito', tenant=self.tenant)
+
+    def test_run_manual_match_and_unmatched(self):
+        url = reverse('bankreconciliation-unmatched')
+        response = self.client.get(url, {'start_date': '2025-03-01', 'end_date': '2025-03-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((len(response.data['bank_transactions']), len(response.data['payments'])), (1, 1))
+
+        response = self.client.post(reverse('bankreconciliation-run'), {'start_date': '2025-03-01'}, format='json')
+        self.assertEqual(response.data['matched'], 1)
+        match = BankReconciliation.objects.get()
+        self.assertFalse(match.is_manual)
+
+        response = self.client.delete(reverse('bankreconciliation-detail', args=[match.pk]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.post(
+            reverse('bankreconciliation-list'), {'bank_transaction': self.line.pk, 'payment': self.payment.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['is_manual'])
+        response = self.client.patch(
+            reverse('bankreconciliation-detail', args=[response.data['id']]), {'payment': None}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        response = self.client.get(url, {'start_date': '2025-03-01'})
+        self.assertEqual((len(response.data['bank_transactions']), len(response.data['payments'])), (0, 0))
+
+    def test_manual_match_requires_single_target(self):
+        response = self.client.post(reverse('bankreconciliation-list'), {'bank_transaction': self.line.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
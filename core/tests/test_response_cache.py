@@ -0,0 +1,58 @@
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import response_cache
+from core.models import Tenant, User, Category, Client, Sale, Local
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        caches[response_cache.CACHE_ALIAS].clear()
+        self.tenant = Tenant.objects.create(name='Tenant Cache')
+        self.user = User.objects.create_user(email='cache@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        Category.objects.create(name='Remeras', tenant=self.tenant)
+
+    def test_reference_list_is_cached_until_write(self):
+        url = reverse('category-list')
+        self.assertEqual(len(self.client.get(url).data), 1)
+        with mock.patch('core.views.CategoryViewSet.get_queryset') as get_queryset:
+            self.assertEqual(len(self.client.get(url).data), 1)
+            get_queryset.assert_not_called()
+        Category.objects.create(name='Buzos', tenant=self.tenant)
+        self.assertEqual(len(self.client.get(url).data), 2)
+        stats = self.client.get(reverse('cache-stats')).data['categories']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_cache_is_per_tenant(self):
+        other = Tenant.objects.create(name='Otro Tenant Cache')
+        Category.objects.create(name='Gorras', tenant=other)
+        self.client.get(reverse('category-list'))
+        other_user = User.objects.create_user(email='cache2@example.com', password='password123', tenant=other)
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(reverse('category-list'), HTTP_X_TENANT_ID=other.id)
+        self.assertEqual([row['name'] for row in response.data], ['Gorras'])
+        # Cada tenant ve sólo sus propios contadores.
+        stats = self.client.get(reverse('cache-stats'), HTTP_X_TENANT_ID=other.id).data['categories']
+        self.assertEqual((stats['hits'], stats['misses']), (0, 1))
+
+    def test_dashboard_invalidated_by_sale(self):
+        customer = Client.objects.create(name='Cliente Cache', tenant=self.tenant)
+        local = Local.objects.create(name='Local Cache', tenant=self.tenant)
+        Sale.objects.create(client=customer, local=local, total_amount=Decimal('40.00'), payment_method='Efectivo', tenant=self.tenant)
+        url = reverse('sales-volume')
+        self.assertEqual(self.client.get(url).data[0]['total_sales'], Decimal('40.00'))
+        self.assertEqual(self.client.get(url).data[0]['total_sales'], Decimal('40.00'))
+        Sale.objects.create(client=customer, local=local, total_amount=Decimal('10.00'), payment_method='Efectivo', tenant=self.tenant)
+        self.assertEqual(self.client.get(url).data[0]['total_sales'], Decimal('50.00'))
+        self.assertEqual(response_cache.stats(self.tenant.id)['dashboards']['hits'], 1)
+
+    def test_errors_are_not_cached(self):
+        url = reverse('category-detail', args=[999999])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response_cache.stats(self.tenant.id)['categories']['hits'], 0)
@@ -0,0 +1,93 @@
+import datetime
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from core import rollups
+from core.views import DashboardView
+from core.models import (
+    Tenant, User, Client, Sale, Local, Account, Transaction, Process, Design, Product, ProductionOrder,
+    ProductionOrderItem, ProductionProcessLog, Supplier, RawMaterial, PurchaseOrder, PurchaseOrderItem,
+    Employee, Salary, DailySalesRollup, DailyTransactionRollup, DailyProcessRollup, DailyProductionRollup,
+    DailyExpenseRollup
+)
+
+
+class DashboardRollupTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Dashboards')
+        self.user = User.objects.create_user(email='dash@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.customer = Client.objects.create(name='Cliente Dashboard', tenant=self.tenant)
+        self.local = Local.objects.create(name='Local Dashboard', tenant=self.tenant)
+        self.income = Account.objects.create(name='Ventas', account_type='Ingreso', code='DASH-I', tenant=self.tenant)
+        self.expense = Account.objects.create(name='Gastos', account_type='Egreso', code='DASH-E', tenant=self.tenant)
+
+        self.sale = Sale.objects.create(client=self.customer, local=self.local, total_amount=Decimal('100.00'), payment_method='Efectivo', tenant=self.tenant)
+        Sale.objects.create(client=self.customer, local=self.local, total_amount=Decimal('50.00'), payment_method='Efectivo', tenant=self.tenant)
+        Transaction.objects.create(tenant=self.tenant, account=self.income, amount=Decimal('150.00'))
+        Transaction.objects.create(tenant=self.tenant, account=self.expense, amount=Decimal('30.00'))
+
+        process = Process.objects.create(name='Corte Dashboard', tenant=self.tenant)
+        design = Design.objects.create(name='Diseño Dashboard', tenant=self.tenant)
+        product = Product.objects.create(name='Camiseta Dashboard', design=design, tenant=self.tenant)
+        self.order = ProductionOrder.objects.create(op_type='Indumentaria', tenant=self.tenant)
+        ProductionOrderItem.objects.create(production_order=self.order, product=product, quantity=10, size='M', tenant=self.tenant)
+        ProductionOrderItem.objects.create(production_order=self.order, product=product, quantity=5, size='L', tenant=self.tenant)
+        ProductionProcessLog.objects.create(production_order=self.order, process=process, quantity_processed=20, quantity_defective=2, tenant=self.tenant)
+
+        supplier = Supplier.objects.create(name='Proveedor Dashboard', tenant=self.tenant)
+        raw_material = RawMaterial.objects.create(name='Tela Dashboard', tenant=self.tenant)
+        purchase = PurchaseOrder.objects.create(supplier=supplier, expected_delivery_date=datetime.date(2025, 1, 1), tenant=self.tenant)
+        PurchaseOrderItem.objects.create(purchase_order=purchase, raw_material=raw_material, quantity=3, unit_price=Decimal('10.00'), tenant=self.tenant)
+        employee = Employee.objects.create(
+            first_name='Ana', last_name='Pérez', dni='1', cuil='1', address='Calle 1', hire_date=datetime.date(2024, 1, 1), tenant=self.tenant
+        )
+        Salary.objects.create(employee=employee, amount=Decimal('200.00'), pay_date=datetime.date(2025, 1, 31), tenant=self.tenant)
+
+    def rollup_state(self):
+        return {
+            model.__name__: sorted(
+                tuple(row) for row in model.objects.filter(tenant=self.tenant).values_list(*fields)
+            )
+            for model, fields in (
+                (DailySalesRollup, ('date', 'local_id', 'total_amount', 'sale_count')),
+                (DailyTransactionRollup, ('date', 'account_id', 'amount', 'transaction_count')),
+                (DailyProcessRollup, ('date', 'process_id', 'quantity_processed', 'quantity_defective')),
+                (DailyProductionRollup, ('date', 'design_id', 'op_type', 'quantity')),
+                (DailyExpenseRollup, ('date', 'source', 'amount')),
+            )
+        }
+
+    def test_dashboards_read_rollups(self):
+        sales = self.client.get(reverse('sales-volume')).data
+        self.assertEqual(sales[0]['local__name'], 'Local Dashboard')
+        self.assertEqual(sales[0]['total_sales'], Decimal('150.00'))
+        self.assertEqual(self.client.get(reverse('overall-profit-loss')).data['overall_profit_loss'], Decimal('120.00'))
+        self.assertEqual(self.client.get(reverse('defective-products-rate')).data['defective_rate'], 10.0)
+        volume = self.client.get(reverse('production-volume')).data
+        self.assertEqual(volume, [{'items__product__design__name': 'Diseño Dashboard', 'op_type': 'Indumentaria', 'total_quantity': 15}])
+        revenue_expenses = self.client.get(reverse('revenue-expenses')).data
+        self.assertEqual(revenue_expenses['total_expenses'], Decimal('230.00'))
+        balances = self.client.get(reverse('current-balance')).data['account_balances']
+        self.assertEqual({row['account__name']: row['balance'] for row in balances}, {'Ventas': Decimal('150.00'), 'Gastos': Decimal('30.00')})
+
+    def test_updates_and_deletes_are_applied_incrementally(self):
+        sale = Sale.objects.get(pk=self.sale.pk)
+        sale.total_amount = Decimal('120.00')
+        sale.save()
+        self.order.op_type = 'Medias'
+        self.order.save()
+        Transaction.objects.filter(account=self.expense).get().delete()
+
+        self.assertEqual(self.client.get(reverse('sales-volume')).data[0]['total_sales'], Decimal('170.00'))
+        self.assertEqual(self.client.get(reverse('production-volume')).data[0]['op_type'], 'Medias')
+        self.assertEqual(self.client.get(reverse('overall-profit-loss')).data['overall_profit_loss'], Decimal('150.00'))
+
+        incremental = self.rollup_state()
+        rollups.rebuild(self.tenant.id)
+        self.assertEqual(self.rollup_state(), incremental)
+
+    def test_dashboard_must_define_get_data(self):
+        with self.assertRaises(TypeError):
+            type('SinDatos', (DashboardView,), {})
@@ -0,0 +1,61 @@
+import datetime
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import Tenant, User, Supplier, RawMaterial, PurchaseOrder, PurchaseOrderItem, Payment
+
+AS_OF = datetime.date(2025, 6, 30)
+
+
+class SupplierPayablesTests(APITestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name='Tenant Cuentas a Pagar')
+        self.user = User.objects.create_user(email='payables@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        self.raw_material = RawMaterial.objects.create(name='Tela Cuentas a Pagar', tenant=self.tenant)
+        self.textil = Supplier.objects.create(name='Textil Norte', tenant=self.tenant)
+        self.avios = Supplier.objects.create(name='Avíos Sur', tenant=self.tenant)
+        self.make_order(self.textil, days_overdue=10, amount=Decimal('100.00'))
+        self.make_order(self.textil, days_overdue=45, amount=Decimal('200.00'), paid=Decimal('50.00'))
+        self.make_order(self.textil, days_overdue=-5, amount=Decimal('30.00'))
+        self.make_order(self.avios, days_overdue=120, amount=Decimal('80.00'))
+        self.make_order(self.avios, days_overdue=70, amount=Decimal('40.00'), paid=Decimal('40.00'))
+
+    def make_order(self, supplier, days_overdue, amount, paid=None):
+        order = PurchaseOrder.objects.create(
+            supplier=supplier, expected_delivery_date=AS_OF - datetime.timedelta(days=days_overdue), tenant=self.tenant
+        )
+        PurchaseOrderItem.objects.create(purchase_order=order, raw_material=self.raw_material, quantity=1, unit_price=amount, tenant=self.tenant)
+        if paid:
+            Payment.objects.create(purchase_order=order, date=AS_OF, amount=paid, payment_method='Transferencia', tenant=self.tenant)
+        return order
+
+    def url(self, query=''):
+        return reverse('supplier-payables') + f'?as_of={AS_OF.isoformat()}' + query
+
+    def test_buckets_per_supplier(self):
+        response = self.client.get(self.url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['supplier_name'] for row in response.data], ['Textil Norte', 'Avíos Sur'])
+        textil, avios = response.data
+        self.assertEqual(textil['total_outstanding'], Decimal('280.00'))
+        self.assertEqual(textil['current'], Decimal('130.00'))
+        self.assertEqual(textil['days_31_60'], Decimal('150.00'))
+        self.assertEqual(textil['open_orders'], 3)
+        self.assertEqual(avios['total_outstanding'], Decimal('80.00'))
+        self.assertEqual(avios['days_61_90'], Decimal('0.00'))
+        self.assertEqual(avios['over_90'], Decimal('80.00'))
+
+    def test_ordering_and_cursor_pagination(self):
+        first = self.client.get(self.url('&ordering=-over_90&page_size=1'))
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data['results'][0]['supplier_name'], 'Avíos Sur')
+        second = self.client.get(first.data['next'])
+        self.assertEqual(second.data['results'][0]['supplier_name'], 'Textil Norte')
+        self.assertIsNone(second.data['next'])
+
+    def test_invalid_ordering(self):
+        response = self.client.get(self.url('&ordering=supplier_name'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
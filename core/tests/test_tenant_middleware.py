@@ -0,0 +1,46 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.middleware import get_cached_tenant, invalidate_tenant_cache
+from core.models import Tenant, User, Category
+
+
+class TenantMiddlewareTests(APITestCase):
+    def setUp(self):
+        invalidate_tenant_cache()
+        self.tenant = Tenant.objects.create(name='Tenant Middleware')
+        self.user = User.objects.create_user(email='middleware@example.com', password='password123', tenant=self.tenant)
+        self.client.force_authenticate(user=self.user)
+        self.client.defaults['HTTP_X_TENANT_ID'] = self.tenant.id
+        Category.objects.create(name='Cat Middleware', tenant=self.tenant)
+
+    def test_tenant_lookup_is_cached_between_requests(self):
+        url = reverse('category-list')
+        self.client.get(url)  # warm the cache
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertFalse(any('FROM "core_tenant"' in q['sql'] for q in ctx.captured_queries))
+
+    def test_unknown_tenant_is_rejected(self):
+        response = self.client.get(reverse('category-list'), HTTP_X_TENANT_ID='999999')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_cache_is_invalidated_on_save_and_delete(self):
+        self.assertEqual(get_cached_tenant(self.tenant.id).name, 'Tenant Middleware')
+        self.tenant.name = 'Tenant Renombrado'
+        self.tenant.save()
+        self.assertEqual(get_cached_tenant(self.tenant.id).name, 'Tenant Renombrado')
+
+        other = Tenant.objects.create(name='Tenant Temporal')
+        self.assertIsNotNone(get_cached_tenant(other.id))
+        other_id = other.id
+        other.delete()
+        self.assertIsNone(get_cached_tenant(other_id))
+
+    def test_invalid_tenant_id_returns_none(self):
+        self.assertIsNone(get_cached_tenant('abc'))
+        self.assertIsNone(get_cached_tenant(None))
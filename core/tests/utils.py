@@ -0,0 +1,35 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class NPlusOneGuardMixin:
+    """
+    Mixin para APITestCase que detecta consultas N+1 en endpoints de listado.
+
+    Lista el endpoint con `initial_rows` filas, agrega más filas con
+    `make_row` y vuelve a listar: si la cantidad de consultas crece con las
+    filas, el test falla.
+    """
+
+    def count_list_queries(self, url):
+        caches['responses'].clear()  # mide el plan de consultas, no el cache de respuestas
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return len(ctx.captured_queries)
+
+    def assertListQueriesConstant(self, url, make_row, initial_rows=2, extra_rows=5):
+        for i in range(initial_rows):
+            make_row(i)
+        self.client.get(url)  # calienta caches por proceso (p. ej. el del tenant)
+        baseline = self.count_list_queries(url)
+        for i in range(initial_rows, initial_rows + extra_rows):
+            make_row(i)
+        grown = self.count_list_queries(url)
+        self.assertEqual(
+            baseline, grown,
+            f"{url}: las consultas crecen con las filas ({baseline} con {initial_rows} filas, "
+            f"{grown} con {initial_rows + extra_rows} filas)."
+        )
+        return grown
@@ -1,4 +1,4 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     TenantViewSet, ProductViewSet, UserViewSet, SystemRoleViewSet, ProcessViewSet,
@@ -6,7 +6,7 @@ from .views import (
     ProductionProcessLogViewSet, LocalViewSet, SaleViewSet, InventoryViewSet,
     SupplierViewSet, PurchaseOrderViewSet, PurchaseOrderItemViewSet, AccountViewSet,
     CashRegisterViewSet, TransactionViewSet, ClientViewSet, InvoiceViewSet, PaymentViewSet,
-    BankStatementViewSet, BankTransactionViewSet, BankViewSet, PaymentMethodTypeViewSet,
+    BankStatementViewSet, BankTransactionViewSet, BankReconciliationViewSet, BankViewSet, PaymentMethodTypeViewSet,
     FinancialCostRuleViewSet, FactoryViewSet, EmployeeRoleViewSet, EmployeeViewSet,
     SalaryViewSet, VacationViewSet, PermitViewSet,     MedicalRecordViewSet, QuotationViewSet,
     QuotationItemViewSet, StockAdjustmentViewSet, DesignViewSet, DeliveryNoteViewSet,
@@ -14,7 +14,8 @@ from .views import (
     ProductionVolumeView, ProcessCompletionRateView,
     RawMaterialConsumptionView, DefectiveProductsRateView, SalesVolumeView, InventoryTurnoverRateView,
     SupplierPerformanceView, OverallProfitLossView, CurrentBalanceView, RevenueExpensesView,
-    ProjectedGrowthView, WarehouseViewSet
+    ProjectedGrowthView, WarehouseViewSet, ResponseCacheStatsView, JobViewSet, QRCodeImageView,
+    CostHistoryViewSet
 )
 
 router = DefaultRouter()
@@ -28,6 +29,7 @@ router.register(r'production-orders', ProductionOrderViewSet)
 router.register(r'raw-materials', RawMaterialViewSet)
 router.register(r'brands', BrandViewSet)
 router.register(r'materia-prima-proveedores', MateriaPrimaProveedorViewSet)
+router.register(r'cost-history', CostHistoryViewSet)
 router.register(r'pedidos-materiales', PedidoMaterialViewSet)
 router.register(r'production-process-logs', ProductionProcessLogViewSet)
 router.register(r'plantillas', DesignViewSet, basename='plantilla')
@@ -45,6 +47,7 @@ router.register(r'invoices', InvoiceViewSet)
 router.register(r'payments', PaymentViewSet)
 router.register(r'bank-statements', BankStatementViewSet)
 router.register(r'bank-transactions', BankTransactionViewSet)
+router.register(r'bank-reconciliations', BankReconciliationViewSet)
 router.register(r'banks', BankViewSet)
 router.register(r'payment-method-types', PaymentMethodTypeViewSet)
 router.register(r'financial-cost-rules', FinancialCostRuleViewSet)
@@ -67,6 +70,7 @@ router.register(r'design-files', DesignFileViewSet)
 router.register(r'product-files', ProductFileViewSet)
 router.register(r'contacts', ContactViewSet)
 router.register(r'warehouses', WarehouseViewSet, basename='warehouse')
+router.register(r'jobs', JobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -83,6 +87,8 @@ urlpatterns = [
     path('management/current-balance/', CurrentBalanceView.as_view(), name='current-balance'),
     path('management/revenue-expenses/', RevenueExpensesView.as_view(), name='revenue-expenses'),
     path('management/projected-growth/', ProjectedGrowthView.as_view(), name='projected-growth'),
+    path('cache-stats/', ResponseCacheStatsView.as_view(), name='cache-stats'),
+    re_path(r'^qr/(?P<key>[0-9a-f]{64})\.png$', QRCodeImageView.as_view(), name='qr-code-image'),
     path('suppliers/<int:pk>/account-movements/', SupplierViewSet.as_view({'get': 'account_movements'}), name='supplier-account-movements'),
     path('clients/<int:pk>/account-movements/', ClientViewSet.as_view({'get': 'account_movements'}), name='client-account-movements'),
     path('clients/<int:pk>/register-payment/', ClientViewSet.as_view({'post': 'register_payment'}), name='client-register-payment'),
@@ -0,0 +1,162 @@
+"""
+Versiones de datos por tenant y modelo para los GET condicionales.
+
+Cada escritura (post_save / post_delete) de un modelo con tenant incrementa
+su fila de DataVersion con un UPDATE. TenantAwareViewSet combina las
+versiones de los modelos de los que depende un listado en un ETag y toma la
+fecha más nueva como Last-Modified; si el cliente ya tiene esa versión
+responde 304 sin consultar ni serializar los datos.
+
+Las filas se crean al leer: si no hay fila, ningún cliente pudo recibir un
+ETag que dependa de ella, así que las escrituras sólo necesitan actualizar.
+Las cargas masivas que no disparan señales (bulk_create, update()) deben
+llamar a bump() a mano.
+
+Dentro de una transacción bump() sólo anota (core.deferred) y los UPDATE
+se hacen al confirmarla, uno por tenant: así no se toma el lock de la fila
+de DataVersion durante toda la transacción, que serializaría las escrituras
+concurrentes al mismo modelo y podría trabar dos requests que tocan modelos
+en orden inverso.
+"""
+import hashlib
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F
+from django.db.models.sql import Query
+from django.utils import timezone
+from django.utils.http import parse_etags, parse_http_date_safe, quote_etag
+
+from . import deferred
+from .models import DataVersion, Tenant
+from .rollups import VALUE_FIELDS as ROLLUP_MODELS
+
+
+class NotModified(Exception):
+    """El cliente ya tiene la versión actual de la respuesta."""
+
+
+def label_of(model):
+    return model._meta.label_lower
+
+
+def is_tracked(model):
+    if model is DataVersion or model in ROLLUP_MODELS:
+        return False
+    try:
+        field = model._meta.get_field('tenant')
+    except FieldDoesNotExist:
+        return False
+    return field.is_relation and field.related_model is Tenant
+
+
+def tracked_models():
+    """Modelos con tenant cuyas escrituras cambian su versión."""
+    return [model for model in apps.get_models() if is_tracked(model)]
+
+
+BATCH_NAME = 'versions'
+
+
+def bump(tenant_id, *models):
+    """Cambia la versión de `models` para `tenant_id` al confirmarse la transacción."""
+    for model in models:
+        deferred.add(BATCH_NAME, _apply_bumps, (tenant_id, label_of(model)))
+
+
+def _apply_bumps(items):
+    labels = defaultdict(set)
+    for tenant_id, label in items:
+        labels[tenant_id].add(label)
+    now = timezone.now()
+    for tenant_id in sorted(labels):
+        DataVersion.objects.filter(tenant_id=tenant_id, model_label__in=sorted(labels[tenant_id])).update(
+            version=F('version') + 1, modified_at=now
+        )
+
+
+def _field_on_path(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # Relaciones inversas sin related_name: 'designmaterial_set'.
+        for field in model._meta.get_fields():
+            if field.auto_created and field.is_relation and field.get_accessor_name() == name:
+                return field
+    return None
+
+
+def dependencies(model, paths=()):
+    """
+    `model`, sus relaciones directas e inversas y los modelos recorridos por
+    `paths` (rutas de select_related / prefetch_related), filtrados a los que
+    tienen versión.
+    """
+    found = {model}
+    found.update(field.related_model for field in model._meta.get_fields() if field.is_relation and field.related_model)
+    for path in paths:
+        current = model
+        for name in getattr(path, 'prefetch_through', path).split('__'):
+            field = _field_on_path(current, name)
+            if field is None or not field.related_model:
+                break
+            current = field.related_model
+            found.add(current)
+    return {related for related in found if is_tracked(related)}
+
+
+def expression_dependencies(model, expression):
+    """
+    Modelos con versión que lee una anotación de `model`: los de sus
+    Subquery y los recorridos por las rutas de sus F()/OuterRef().
+    """
+    found, paths = set(), []
+    pending = [expression]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Query):
+            found.add(node.model)
+            pending.extend(node.annotations.values())
+            continue
+        if isinstance(node, F):
+            paths.append(node.name)
+        if hasattr(node, 'get_source_expressions'):
+            pending.extend(source for source in node.get_source_expressions() if source is not None)
+    return {related for related in found if is_tracked(related)} | dependencies(model, paths)
+
+
+def current(tenant_id, models):
+    """{label: (version, modified_at)} de `models`, creando las filas que falten."""
+    labels = sorted({label_of(model) for model in models})
+    queryset = DataVersion.objects.filter(tenant_id=tenant_id, model_label__in=labels)
+    rows = {label: (version, modified) for label, version, modified in queryset.values_list('model_label', 'version', 'modified_at')}
+    missing = [label for label in labels if label not in rows]
+    if missing:
+        DataVersion.objects.bulk_create(
+            [DataVersion(tenant_id=tenant_id, model_label=label) for label in missing], ignore_conflicts=True
+        )
+        rows = {label: (version, modified) for label, version, modified in queryset.values_list('model_label', 'version', 'modified_at')}
+    return rows
+
+
+def validators(request, tenant_id, models):
+    """(ETag, Last-Modified) de la respuesta a `request` según las versiones actuales."""
+    versions = current(tenant_id, models)
+    payload = '|'.join(
+        [str(tenant_id), request.get_full_path(), request.headers.get('Accept', '')]
+        + [f'{label}:{version}' for label, (version, _) in sorted(versions.items())]
+    )
+    etag = quote_etag(hashlib.sha1(payload.encode()).hexdigest())
+    last_modified = max((modified for _, modified in versions.values()), default=None)
+    return etag, last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """Evalúa If-None-Match y, si no viene, If-Modified-Since (RFC 9110)."""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        return '*' in etags or etag in etags
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since'))
+    return bool(since and last_modified and int(last_modified.timestamp()) <= since)
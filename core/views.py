@@ -1,35 +1,41 @@
 import datetime
 import json
 from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date, parse_etags, quote_etag
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
 from rest_framework import serializers
 import uuid
-import qrcode
 import base64
-from io import BytesIO
 from decimal import Decimal
 from rest_framework import viewsets, status
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.exceptions import PermissionDenied
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.db import models, transaction
-from django.db.models import Sum, Count, F, Avg, Case, When
+from django.db.models import Sum, Count, F, Avg, Case, When, Value
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
 from .models import (
     Product, Tenant, User, SystemRole, Process, OrderNote, ProductionOrder, 
     RawMaterial, Brand, MateriaPrimaProveedor, PedidoMaterial, # Refactored Raw Material Models
     ProductionProcessLog, Local, Sale, Inventory, 
     Supplier, PurchaseOrder, PurchaseOrderItem, Account, CashRegister, Transaction, 
-    Client, Invoice, Payment, BankStatement, BankTransaction, Bank, 
+    Client, Invoice, Payment, BankStatement, BankTransaction, BankReconciliation, Bank, 
     PaymentMethodType, FinancialCostRule, Factory, EmployeeRole, Employee, 
     Salary, Vacation, Permit, MedicalRecord, Quotation, QuotationItem, StockAdjustment,
     Design, DesignMaterial, DesignProcess, SaleItem, DeliveryNote, DeliveryNoteItem, DesignFile, ProductFile, Contact,
     MedicalRecord, Quotation, QuotationItem, StockAdjustment,
     Design, DesignMaterial, DesignProcess, SaleItem, DeliveryNote, DeliveryNoteItem,
-    Category, Size, Color, Check, Warehouse
+    Category, Size, Color, Check, Warehouse, Job,
+    DailySalesRollup, DailyTransactionRollup, DailyProcessRollup, DailyProductionRollup, DailyExpenseRollup, CostHistory
 )
 from .serializers import (
-    ProductSerializer, TenantSerializer, UserSerializer, UserCreateSerializer, 
+    ProductSerializer, ProductCompactSerializer, TenantSerializer, UserSerializer, UserCreateSerializer, 
     SystemRoleSerializer, ProcessSerializer, OrderNoteSerializer, 
     ProductionOrderReadOnlySerializer, ProductionOrderIndumentariaSerializer, ProductionOrderMediasSerializer, # REFACTORED
     RawMaterialSerializer, BrandSerializer, MateriaPrimaProveedorSerializer, PedidoMaterialSerializer, # Refactored Raw Material Serializers
@@ -37,44 +43,184 @@ from .serializers import (
     InventorySerializer, SupplierSerializer, PurchaseOrderSerializer, 
     PurchaseOrderItemSerializer, AccountSerializer, CashRegisterSerializer, 
     TransactionSerializer, ClientSerializer, InvoiceSerializer, PaymentSerializer, 
-    BankStatementSerializer, BankTransactionSerializer, BankSerializer, 
+    BankStatementSerializer, BankTransactionSerializer, BankReconciliationSerializer, BankSerializer, 
     PaymentMethodTypeSerializer, FinancialCostRuleSerializer, FactorySerializer, 
     EmployeeRoleSerializer, EmployeeSerializer, SalarySerializer, VacationSerializer, 
     PermitSerializer, MedicalRecordSerializer, StockAdjustmentSerializer, QuotationSerializer, QuotationItemSerializer,
     DesignSerializer, SaleItemSerializer, DeliveryNoteSerializer, DeliveryNoteItemSerializer, 
     DesignMaterialSerializer, DesignProcessSerializer, DesignFileSerializer, ProductFileSerializer, ContactSerializer,
-    CategorySerializer, SizeSerializer, ColorSerializer, CheckSerializer, TenantTokenObtainPairSerializer, WarehouseSerializer
+    CategorySerializer, SizeSerializer, ColorSerializer, CheckSerializer, TenantTokenObtainPairSerializer, WarehouseSerializer,
+    JobSerializer, CostHistorySerializer
 )
+from .middleware import get_cached_tenant
+from .pagination import TenantKeysetPagination
+from .bulk import BulkCreateMixin
+from .exports import ExportMixin
+from .response_cache import CachedResponseMixin
+from .qr_labels import QRLabelSheetMixin, production_order_text, sourced_material_text
+from . import qr_labels
+from . import cost_propagation, forecasting, jobs, mrp, purchase_suggestions, reconciliation, response_cache, versions
+from .ledger import SALE, client_ledger, ledger_cursor_key, parse_ledger_cursor
+from .queries import MONEY, purchase_order_paid, purchase_order_total, sale_paid_amount, supplier_payables
 
 # Base ViewSet for Tenant-Aware Models
 class TenantAwareViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    # Paginación opcional por cursor: se activa con ?page_size= o ?cursor=
+    pagination_class = TenantKeysetPagination
+    pagination_ordering = '-id'
 
     def get_tenant(self):
+        # TenantMiddleware ya resolvió el header X-Tenant-ID (con cache).
+        tenant = getattr(self.request, 'tenant', None)
+        if tenant is not None:
+            return tenant
+
         tenant_id = self.request.headers.get('X-Tenant-ID')
         if not tenant_id:
             if self.request.method == 'POST' and 'tenant' in self.request.data:
                 tenant_id = self.request.data['tenant']
             else:
                  raise PermissionDenied("X-Tenant-ID header is required.")
-        try:
-            return Tenant.objects.get(id=tenant_id)
-        except Tenant.DoesNotExist:
+        tenant = get_cached_tenant(tenant_id)
+        if tenant is None:
             raise PermissionDenied("Tenant not found.")
+        return tenant
+
+    # Plan de consultas declarativo por acción: cada vista puede definir
+    # `<accion>_select_related`, `<accion>_prefetch` y `<accion>_annotations`.
+    # `retrieve` usa el plan de `list` si no declara uno propio.
+    list_select_related = ()
+    list_prefetch = ()
+    list_annotations = {}
+
+    def get_query_plan_attr(self, suffix):
+        action = self.action or 'list'
+        value = getattr(self, f'{action}_{suffix}', None)
+        if value is None and action == 'retrieve':
+            value = getattr(self, f'list_{suffix}', None)
+        return value
+
+    def apply_query_plan(self, queryset):
+        select_related = self.get_query_plan_attr('select_related')
+        prefetch = self.get_query_plan_attr('prefetch')
+        annotations = self.get_query_plan_attr('annotations')
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
 
     def get_queryset(self):
         tenant = self.get_tenant()
-        return self.queryset.filter(tenant=tenant)
+        return self.apply_query_plan(self.queryset.filter(tenant=tenant))
 
     def perform_create(self, serializer):
         tenant = self.get_tenant()
         serializer.save(tenant=tenant)
 
+    # GET condicional (ver core.versions): list y retrieve llevan ETag y
+    # Last-Modified armados con las versiones del modelo, sus relaciones
+    # directas, las rutas del plan de consultas (incluidas las de
+    # `expand_prefetch`) y los modelos que leen sus anotaciones.
+    # `etag_models` agrega las dependencias más lejanas que use el serializer.
+    conditional_actions = ('list', 'retrieve')
+    etag_models = ()
+    expand_prefetch = {}
+
+    def get_etag_models(self):
+        model = self.queryset.model
+        paths = tuple(self.list_select_related) + tuple(self.list_prefetch)
+        for expand_paths in self.expand_prefetch.values():
+            paths += tuple(expand_paths)
+        found = versions.dependencies(model, paths) | set(self.etag_models)
+        for expression in self.list_annotations.values():
+            found |= versions.expression_dependencies(model, expression)
+        return found
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if request.method in ('GET', 'HEAD') and self.action in self.conditional_actions:
+            self.validators = versions.validators(request, self.get_tenant().id, self.get_etag_models())
+            if versions.not_modified(request, *self.validators):
+                raise versions.NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, versions.NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'validators', None)
+        if validators and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+            # El navegador guarda la respuesta pero revalida siempre, por tenant.
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('X-Tenant-ID', 'Authorization'))
+        return response
+
 # Tenant-aware ViewSets
 class ProductViewSet(TenantAwareViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    list_select_related = ('design__category', 'size')
+    list_prefetch = (
+        'colors', 'design__designmaterial_set__raw_material', 'design__designprocess_set__process',
+        'design__design_files', 'design__sizes',
+    )
+    compact_fields = (
+        'id', 'name', 'sku', 'design_id', 'design_name', 'size_id', 'size_name',
+        'factory_price', 'club_price', 'suggested_final_price', 'is_manufactured', 'cost',
+    )
+
+    def list(self, request, *args, **kwargs):
+        """
+        Listado compacto del catálogo (ver ProductCompactSerializer) armado con
+        una sola consulta anotada más una para los colores. Con ?expand=recipe
+        se devuelve la representación completa con el diseño y su receta.
+        """
+        expand = {value.strip() for value in request.query_params.get('expand', '').split(',')}
+        if 'recipe' in expand:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(
+            Product.objects.filter(tenant=self.get_tenant()).annotate(
+                design_name=F('design__name'),
+                size_name=F('size__name'),
+                cost=Coalesce(F('design__calculated_cost'), Value(Decimal('0.00'))),
+            ).values(*self.compact_fields)
+        )
+        page = self.paginate_queryset(queryset)
+        rows = list(page if page is not None else queryset)
+
+        color_links = Product.colors.through.objects.all()
+        if page is not None:
+            color_links = color_links.filter(product_id__in=[row['id'] for row in rows])
+        else:
+            color_links = color_links.filter(product_id__in=queryset.values('id'))
+        color_ids = {}
+        for product_id, color_id in color_links.values_list('product_id', 'color_id'):
+            color_ids.setdefault(product_id, []).append(color_id)
+        for row in rows:
+            row['color_ids'] = color_ids.get(row['id'], [])
+
+        data = ProductCompactSerializer(rows, many=True).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
     
+    @action(detail=False, methods=['get'], url_path='below-cost')
+    def below_cost(self, request):
+        """Productos con algún precio cargado menor que el costo calculado de su diseño."""
+        return Response(cost_propagation.below_cost_report(self.get_tenant().id))
+
     def perform_create(self, serializer):
         tenant = self.get_tenant()
         
@@ -114,11 +260,36 @@ class ProductFileViewSet(TenantAwareViewSet):
     serializer_class = ProductFileSerializer
 
 class SystemRoleViewSet(TenantAwareViewSet): queryset = SystemRole.objects.all(); serializer_class = SystemRoleSerializer
-class ProcessViewSet(TenantAwareViewSet): queryset = Process.objects.all(); serializer_class = ProcessSerializer
-class OrderNoteViewSet(TenantAwareViewSet): queryset = OrderNote.objects.all(); serializer_class = OrderNoteSerializer
-class ProductionOrderViewSet(TenantAwareViewSet):
+class ProcessViewSet(CachedResponseMixin, TenantAwareViewSet): queryset = Process.objects.all(); serializer_class = ProcessSerializer; cache_scope = 'processes'
+class OrderNoteViewSet(TenantAwareViewSet):
+    queryset = OrderNote.objects.all()
+    serializer_class = OrderNoteSerializer
+    list_select_related = ('sale__client', 'sale__user')
+    list_annotations = {'sale_paid_amount': sale_paid_amount('sale')}
+    list_prefetch = (
+        'sale__client__contacts', 'sale__user__roles', 'sale__items__product__size',
+        'sale__items__product__colors', 'sale__items__size', 'sale__items__color',
+    )
+
+class ProductionOrderViewSet(QRLabelSheetMixin, BulkCreateMixin, TenantAwareViewSet):
     queryset = ProductionOrder.objects.all()
+    pagination_ordering = '-creation_date'
+    list_select_related = ('order_note__sale__client', 'order_note__sale__user', 'base_product__size')
+    list_prefetch = ('items', 'files', 'colors', 'base_product__colors')
+    list_annotations = {'sale_paid_amount': sale_paid_amount('order_note__sale')}
+    # Bloques pesados de la venta, sólo cuando se pide ?expand=sale (o en el detalle)
+    expand_prefetch = {
+        'sale': (
+            'order_note__sale__client__contacts', 'order_note__sale__user__roles',
+            'order_note__sale__items__product__size', 'order_note__sale__items__product__colors',
+            'order_note__sale__items__size', 'order_note__sale__items__color',
+        ),
+    }
     # serializer_class = ProductionOrderSerializer # REMOVED FOR DYNAMIC SELECTION
+    write_serializers = {
+        'Medias': ProductionOrderMediasSerializer,
+        'Indumentaria': ProductionOrderIndumentariaSerializer,
+    }
 
     def get_serializer_class(self):
         """
@@ -127,20 +298,34 @@ class ProductionOrderViewSet(TenantAwareViewSet):
         # Para operaciones de escritura (crear/actualizar), decidimos por el op_type
         if self.action in ['create', 'update', 'partial_update']:
             # El op_type debería venir en los datos de la solicitud
-            op_type = self.request.data.get('op_type')
-            if op_type == 'Medias':
-                return ProductionOrderMediasSerializer
-            elif op_type == 'Indumentaria':
-                return ProductionOrderIndumentariaSerializer
             # Si no hay op_type en una escritura, podría ser un error o necesitar un default
             # Devolver el de solo lectura puede ayudar a mostrar errores de validación claros
-            return ProductionOrderReadOnlySerializer
+            return self.write_serializers.get(self.request.data.get('op_type'), ProductionOrderReadOnlySerializer)
 
         # Para operaciones de lectura (list, retrieve), usamos el de solo lectura
         return ProductionOrderReadOnlySerializer
 
+    def get_bulk_serializer(self, data):
+        op_type = data.get('op_type') if isinstance(data, dict) else None
+        serializer_class = self.write_serializers.get(op_type, ProductionOrderReadOnlySerializer)
+        return serializer_class(data=data, context=self.get_serializer_context())
+
+    def get_expand(self):
+        expand = {value.strip() for value in self.request.query_params.get('expand', '').split(',') if value.strip()}
+        if self.action == 'retrieve':
+            expand.add('sale')
+        return expand & set(self.expand_prefetch)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
     def get_queryset(self):
-        queryset = super().get_queryset().prefetch_related('items') # Add prefetch_related
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            for key in self.get_expand():
+                queryset = queryset.prefetch_related(*self.expand_prefetch[key])
         op_type = self.request.query_params.get('op_type')
         if op_type:
             queryset = queryset.filter(op_type=op_type)
@@ -162,6 +347,29 @@ class ProductionOrderViewSet(TenantAwareViewSet):
             raise
     # ================================
 
+    @action(detail=False, methods=['get'])
+    def mrp(self, request):
+        """
+        Materiales que necesitan las OPs abiertas contra el stock de los lotes
+        (ver core.mrp). Filtros: ?op_type=, ?warehouse=1,2 y ?shortages=true
+        para devolver sólo los faltantes.
+        """
+        tenant = self.get_tenant()
+        orders = mrp.open_orders(tenant.id)
+        op_type = request.query_params.get('op_type')
+        if op_type:
+            orders = orders.filter(op_type=op_type)
+        warehouse_ids = None
+        if request.query_params.get('warehouse'):
+            try:
+                warehouse_ids = [int(pk) for pk in request.query_params['warehouse'].split(',') if pk.strip()]
+            except ValueError:
+                return Response({'error': 'warehouse must be a comma-separated list of ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        result = mrp.plan(tenant.id, orders, warehouse_ids)
+        if request.query_params.get('shortages') in ('1', 'true'):
+            result['materials'] = [row for row in result['materials'] if row['shortage'] > 0]
+        return Response(result)
+
     @action(detail=True, methods=['post'], url_path='complete-process')
     def complete_process(self, request, pk=None):
         production_order = self.get_object()
@@ -237,42 +445,26 @@ class ProductionOrderViewSet(TenantAwareViewSet):
     @action(detail=True, methods=['post'])
     def generate_qr_code(self, request, pk=None):
         production_order = self.get_object()
-        
-        # ===== DATOS PERSONALIZADOS PARA EL QR =====
-        base_product_name = production_order.base_product.name if production_order.base_product else 'Sin producto base'
-        estimated_delivery = production_order.estimated_delivery_date.strftime('%d/%m/%Y') if production_order.estimated_delivery_date else 'No definida'
-        
-        qr_data_str = (
-            f"━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            f"  ORDEN DE PRODUCCIÓN\n"
-            f"━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"ID: #{production_order.id}\n"
-            f"Tipo: {production_order.op_type}\n"
-            f"Producto: {base_product_name}\n"
-            f"Entrega estimada: {estimated_delivery}\n"
-            f"Estado: {production_order.status}\n\n"
-            f"━━━━━━━━━━━━━━━━━━━━━━━━━"
-        )
+        qr_data_str = production_order_text(production_order)
+        png = qr_labels.render_many([qr_data_str])[qr_labels.content_hash(qr_data_str)]
+        qr_code_base64 = base64.b64encode(png).decode('utf-8')
+        qr_code_url = qr_labels.image_url(qr_labels.store_png(png), request)
 
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_data_str)
-        qr.make(fit=True)
+        return Response({'qr_code_data': qr_code_base64, 'qr_code_url': qr_code_url}, status=status.HTTP_200_OK)
 
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        qr_code_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    # Hoja de etiquetas: POST production-orders/qr-labels/ (ver core.qr_labels)
+    qr_label_name = 'etiquetas-ordenes'
+    qr_label_sheet_select_related = ('base_product',)
 
-        return Response({'qr_code_data': qr_code_base64}, status=status.HTTP_200_OK)
+    def qr_labels(self, orders):
+        return [(production_order_text(order), f"OP #{order.id} {order.equipo}".strip()) for order in orders]
 
 class RawMaterialViewSet(TenantAwareViewSet):
     queryset = RawMaterial.objects.all()
     serializer_class = RawMaterialSerializer
+    list_annotations = {
+        'highest_cost_value': models.Max('proveedores__cost', filter=models.Q(proveedores__tenant=F('tenant'))),
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -281,13 +473,28 @@ class RawMaterialViewSet(TenantAwareViewSet):
             queryset = queryset.filter(name__iexact=name)
         return queryset
 
+class CostHistoryViewSet(TenantAwareViewSet):
+    """Historial de costos de los lotes y su propagación (ver core.cost_propagation); sólo lectura."""
+    queryset = CostHistory.objects.all()
+    serializer_class = CostHistorySerializer
+    http_method_names = ['get', 'head', 'options']
+    list_select_related = ('raw_material',)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        raw_material = self.request.query_params.get('raw_material')
+        if raw_material:
+            queryset = queryset.filter(raw_material_id=raw_material)
+        return queryset
+
 class BrandViewSet(TenantAwareViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
 
-class MateriaPrimaProveedorViewSet(TenantAwareViewSet):
+class MateriaPrimaProveedorViewSet(QRLabelSheetMixin, TenantAwareViewSet):
     queryset = MateriaPrimaProveedor.objects.all()
     serializer_class = MateriaPrimaProveedorSerializer
+    list_select_related = ('raw_material', 'supplier', 'warehouse')
 
     def perform_create(self, serializer):
         tenant = self.get_tenant()
@@ -306,74 +513,62 @@ class MateriaPrimaProveedorViewSet(TenantAwareViewSet):
             tenant=sourced_material.tenant
         ).aggregate(total=Sum('current_stock'))['total'] or 0
         
-        # Manejar proveedor opcional
-        supplier_name = sourced_material.supplier.name if sourced_material.supplier else 'Sin proveedor'
-        batch_number = sourced_material.batch_number if sourced_material.batch_number else 'Sin lote'
+        qr_data_str = sourced_material_text(sourced_material, total_stock)
+        png = qr_labels.render_many([qr_data_str])[qr_labels.content_hash(qr_data_str)]
+        qr_code_base64 = base64.b64encode(png).decode('utf-8')
         
-        qr_data_str = (
-            f"Material: {raw_material.name}\n"
-            f"Proveedor: {supplier_name}\n"
-            f"Lote: {batch_number}\n"
-            f"Stock del Lote: {sourced_material.current_stock}\n"
-            f"Stock Total (Material): {total_stock}"
-        )
+        # En la base queda sólo el hash; la imagen va al storage.
+        sourced_material.qr_code = qr_labels.store_png(png)
+        sourced_material.save(update_fields=['qr_code'])
         
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
+        return Response({
+            'qr_code_data': qr_code_base64,
+            'qr_code_url': qr_labels.image_url(sourced_material.qr_code, request),
+        }, status=status.HTTP_200_OK)
+
+    # Hoja de etiquetas: POST materia-prima-proveedores/qr-labels/ (ver core.qr_labels)
+    qr_label_name = 'etiquetas-lotes'
+    qr_label_sheet_select_related = ('raw_material', 'supplier')
+
+    def qr_labels(self, lots):
+        # Stock total por materia prima en una sola consulta para todo el lote de etiquetas.
+        totals = dict(
+            MateriaPrimaProveedor.objects.filter(
+                tenant=self.get_tenant(), raw_material__in={lot.raw_material_id for lot in lots}
+            ).values('raw_material').annotate(total=Sum('current_stock')).values_list('raw_material', 'total')
         )
-        qr.add_data(qr_data_str)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        qr_code_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        sourced_material.qr_code_data = qr_code_base64
-        sourced_material.save()
-        
-        return Response({'qr_code_data': qr_code_base64}, status=status.HTTP_200_OK)
+        return [
+            (
+                sourced_material_text(lot, totals.get(lot.raw_material_id) or 0),
+                f"{lot.raw_material.name} - {lot.batch_number or 'Sin lote'}",
+            )
+            for lot in lots
+        ]
 
 
 class ProductionProcessLogViewSet(TenantAwareViewSet): queryset = ProductionProcessLog.objects.all(); serializer_class = ProductionProcessLogSerializer
 class DesignViewSet(TenantAwareViewSet):
     queryset = Design.objects.all()
     serializer_class = DesignSerializer
+    list_select_related = ('category',)
+    list_prefetch = ('designmaterial_set__raw_material', 'designprocess_set__process', 'design_files', 'sizes')
 
-    def perform_create(self, serializer):
-        # Save the design first to get an instance
-        design = serializer.save(tenant=self.get_tenant())
-        self._calculate_and_save_cost(design)
-
-    def perform_update(self, serializer):
-        # Save the updated design
-        design = serializer.save()
-        self._calculate_and_save_cost(design)
-
-    def _calculate_and_save_cost(self, design):
-        total_material_cost = design.designmaterial_set.aggregate(
-            total=Sum(F('quantity') * F('cost')) # Changed F('raw_material__cost') to F('cost')
-        )['total'] or 0
-
-        total_process_cost = design.designprocess_set.aggregate(
-            total=Sum('cost')
-        )['total'] or 0
-
-        design.calculated_cost = total_material_cost + total_process_cost
-        design.save(update_fields=['calculated_cost'])
+    # El costo lo recalcula core.design_costs al guardar la receta.
+    @action(detail=False, methods=['post'], url_path='recalculate-costs')
+    def recalculate_costs(self, request):
+        """Recalcula en segundo plano el costo de todos los diseños del tenant."""
+        job = jobs.enqueue('designs.recalculate_costs', self.get_tenant().id)
+        return Response({'job': job.pk}, status=status.HTTP_202_ACCEPTED)
 
 
 class DesignFileViewSet(TenantAwareViewSet):
     queryset = DesignFile.objects.all()
     serializer_class = DesignFileSerializer
 
-class CategoryViewSet(TenantAwareViewSet): queryset = Category.objects.all(); serializer_class = CategorySerializer # NEW
-class SizeViewSet(TenantAwareViewSet): queryset = Size.objects.all(); serializer_class = SizeSerializer         # NEW
+class CategoryViewSet(CachedResponseMixin, TenantAwareViewSet): queryset = Category.objects.all(); serializer_class = CategorySerializer; cache_scope = 'categories' # NEW
+class SizeViewSet(CachedResponseMixin, TenantAwareViewSet): queryset = Size.objects.all(); serializer_class = SizeSerializer; cache_scope = 'sizes' # NEW
 
-class ColorViewSet(TenantAwareViewSet): queryset = Color.objects.all(); serializer_class = ColorSerializer
+class ColorViewSet(CachedResponseMixin, TenantAwareViewSet): queryset = Color.objects.all(); serializer_class = ColorSerializer; cache_scope = 'colors'
 class LocalViewSet(TenantAwareViewSet):
     queryset = Local.objects.all()
     serializer_class = LocalSerializer
@@ -418,9 +613,23 @@ class LocalViewSet(TenantAwareViewSet):
 
         return super().destroy(request, *args, **kwargs)
 
-class SaleViewSet(TenantAwareViewSet):
+class SaleViewSet(BulkCreateMixin, ExportMixin, TenantAwareViewSet):
     queryset = Sale.objects.all().order_by('-sale_date')
     serializer_class = SaleSerializer
+    pagination_ordering = '-sale_date'
+    # start_date / end_date ya los aplica get_queryset.
+    export_fields = {
+        'id': 'id', 'sale_date': 'sale_date', 'client_id': 'client_id', 'client_name': 'client__name',
+        'local_name': 'local__name', 'user_email': 'user__email', 'total_amount': 'total_amount',
+        'payment_method': 'payment_method', 'is_ecommerce_sale': 'is_ecommerce_sale',
+    }
+    export_ordering = ('sale_date', 'id')
+    list_select_related = ('client', 'user', 'related_quotation__client', 'related_quotation__user')
+    list_prefetch = (
+        'client__contacts', 'user__roles', 'items__product__size', 'items__product__colors',
+        'items__size', 'items__color', 'related_quotation__items__product',
+        'related_quotation__client__contacts', 'related_quotation__user__roles',
+    )
 
     @action(detail=False, methods=['get'], url_path='available-for-order-note')
     def available_for_order_note(self, request, *args, **kwargs):
@@ -484,9 +693,16 @@ class SaleViewSet(TenantAwareViewSet):
                 # Se asume que la configuración del sistema incluye al menos una cuenta de activo.
 
 
-class InventoryViewSet(TenantAwareViewSet):
+class InventoryViewSet(ExportMixin, TenantAwareViewSet):
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
+    list_select_related = ('product__size', 'warehouse')
+    list_prefetch = ('product__colors',)
+    export_fields = {
+        'id': 'id', 'product_id': 'product_id', 'product_name': 'product__name', 'sku': 'product__sku',
+        'size': 'product__size__name', 'warehouse_id': 'warehouse_id', 'warehouse_name': 'warehouse__name',
+        'quantity': 'quantity',
+    }
 
     @action(detail=True, methods=['post'], url_path='transfer-stock')
     def transfer_stock(self, request, pk=None):
@@ -529,13 +745,66 @@ class InventoryViewSet(TenantAwareViewSet):
 
         return Response({'message': 'Stock transferred successfully.'}, status=status.HTTP_200_OK)
 
-class WarehouseViewSet(TenantAwareViewSet):
+class WarehouseViewSet(CachedResponseMixin, TenantAwareViewSet):
     queryset = Warehouse.objects.all()
     serializer_class = WarehouseSerializer
+    cache_scope = 'warehouses'
 
 class SupplierViewSet(TenantAwareViewSet):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
+    payables_ordering_fields = ('total_outstanding', 'current', 'days_31_60', 'days_61_90', 'over_90')
+
+    @action(detail=False, methods=['get'])
+    def payables(self, request):
+        """
+        Deuda con proveedores por tramos de antigüedad (ver supplier_payables).
+        Parámetros: as_of (YYYY-MM-DD, por defecto hoy), age_from
+        (expected_delivery_date u order_date) y ordering (campo de monto con
+        '-' opcional, por defecto -total_outstanding). Admite page_size/cursor.
+        """
+        params = request.query_params
+        try:
+            as_of = parse_date(params.get('as_of', '')) or timezone.localdate()
+        except ValueError:
+            return Response({'error': 'Date format should be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        age_field = params.get('age_from', 'expected_delivery_date')
+        if age_field not in ('expected_delivery_date', 'order_date'):
+            return Response({'error': 'age_from must be expected_delivery_date or order_date.'}, status=status.HTTP_400_BAD_REQUEST)
+        ordering = params.get('ordering', '-total_outstanding')
+        field = ordering.lstrip('-')
+        if field not in self.payables_ordering_fields:
+            return Response({'error': f'ordering must be one of {", ".join(self.payables_ordering_fields)}.'}, status=status.HTTP_400_BAD_REQUEST)
+        descending = ordering.startswith('-')
+        prefix, lookup = ('-', 'lt') if descending else ('', 'gt')
+
+        report = supplier_payables(
+            PurchaseOrder.objects.filter(tenant=self.get_tenant()).exclude(status=purchase_suggestions.DRAFT), as_of, age_field
+        ).order_by(f'{prefix}{field}', f'{prefix}supplier_id')
+
+        def fetch_rows(after, limit):
+            rows = report
+            if after:
+                value, supplier_id = after
+                rows = rows.filter(
+                    models.Q(**{f'{field}__{lookup}': value}) | models.Q(**{field: value, f'supplier_id__{lookup}': supplier_id})
+                )
+            return list(rows[:limit] if limit else rows)
+
+        def cursor_key(row):
+            return [ordering, str(row[field]), row['supplier_id']]
+
+        def parse_cursor(values):
+            cursor_ordering, value, supplier_id = values
+            if cursor_ordering != ordering:
+                raise ValueError(values)
+            return MONEY.to_python(value), int(supplier_id)
+
+        paginator = self.paginator
+        page = paginator.paginate_rows(request, fetch_rows, cursor_key, parse_cursor)
+        if page is None:
+            return Response(fetch_rows(None, None))
+        return paginator.get_paginated_response(page)
 
     @action(detail=True, methods=['get'], url_path='account-movements')
     def account_movements(self, request, pk=None):
@@ -546,8 +815,8 @@ class SupplierViewSet(TenantAwareViewSet):
         purchases = PurchaseOrder.objects.filter(
             supplier=supplier, 
             tenant=tenant
-        ).annotate(
-            calculated_total=Sum(F('items__quantity') * F('items__unit_price'))
+        ).exclude(status=purchase_suggestions.DRAFT).annotate(
+            calculated_total=purchase_order_total()
         )
 
         # Obtener todos los pagos al proveedor (movimientos HABER - positivos)
@@ -598,27 +867,100 @@ class SupplierViewSet(TenantAwareViewSet):
             })
 
         return Response(movements_with_balance)
-class PurchaseOrderViewSet(TenantAwareViewSet):
+class PurchaseOrderViewSet(BulkCreateMixin, TenantAwareViewSet):
     queryset = PurchaseOrder.objects.all()
     serializer_class = PurchaseOrderSerializer
+    list_select_related = ('supplier', 'user')
+    list_prefetch = ('items',)
+    list_annotations = {
+        'total_amount_value': purchase_order_total(),
+        'paid_amount_value': purchase_order_paid(),
+        'outstanding_balance_value': F('total_amount_value') - F('paid_amount_value'),
+    }
+    # Los borradores creados por POST .../suggestions/ se devuelven con el mismo plan que el listado.
+    suggestions_select_related = list_select_related
+    suggestions_prefetch = list_prefetch
+    suggestions_annotations = list_annotations
+    ordering_fields = {
+        'order_date': 'order_date',
+        'expected_delivery_date': 'expected_delivery_date',
+        'total_amount': 'total_amount_value',
+        'outstanding_balance': 'outstanding_balance_value',
+    }
 
     def get_queryset(self):
+        """
+        Filtros: supplier, status__in (separado por comas) y has_balance=true
+        (saldo pendiente > 0). ?ordering= acepta los campos de `ordering_fields`
+        con '-' opcional; con paginación por cursor manda `pagination_ordering`.
+        """
         queryset = super().get_queryset()
-        supplier_id = self.request.query_params.get('supplier')
+        params = self.request.query_params
+        supplier_id = params.get('supplier')
         if supplier_id:
             queryset = queryset.filter(supplier_id=supplier_id)
+        statuses = [value for value in params.get('status__in', '').split(',') if value]
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+        if self.action in ('list', 'retrieve'):
+            if params.get('has_balance', '').lower() == 'true':
+                queryset = queryset.filter(outstanding_balance_value__gt=0)
+            ordering = params.get('ordering', '')
+            field = self.ordering_fields.get(ordering.lstrip('-'))
+            if field:
+                queryset = queryset.order_by(('-' if ordering.startswith('-') else '') + field, 'id')
         return queryset
 
     def perform_create(self, serializer):
         tenant = self.get_tenant()
         serializer.save(tenant=tenant, user=self.request.user)
+
+    @action(detail=False, methods=['get', 'post'])
+    def suggestions(self, request):
+        """
+        Compras sugeridas para los faltantes de las OPs abiertas (ver
+        core.purchase_suggestions). GET devuelve la propuesta agrupada por
+        proveedor; POST la crea como órdenes en estado 'Borrador'.
+        Parámetros: strategy=cheapest|preferred y warehouse=1,2.
+        """
+        params = request.query_params if request.method == 'GET' else request.data
+        strategy = params.get('strategy', 'cheapest')
+        if strategy not in purchase_suggestions.STRATEGIES:
+            return Response({'error': f'strategy must be one of {", ".join(purchase_suggestions.STRATEGIES)}.'}, status=status.HTTP_400_BAD_REQUEST)
+        warehouse_ids = None
+        if params.get('warehouse'):
+            try:
+                warehouse_ids = [int(pk) for pk in str(params['warehouse']).split(',') if pk.strip()]
+            except ValueError:
+                return Response({'error': 'warehouse must be a comma-separated list of ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        tenant = self.get_tenant()
+        suggestions = purchase_suggestions.suggest(tenant.id, strategy, warehouse_ids=warehouse_ids)
+        if request.method == 'GET':
+            return Response(suggestions)
+        orders = purchase_suggestions.create_drafts(tenant.id, suggestions, user=request.user)
+        queryset = self.get_queryset().filter(pk__in=[order.pk for order in orders]).order_by('id')
+        return Response({
+            'orders': self.get_serializer(queryset, many=True).data,
+            'unassigned': suggestions['unassigned'],
+        }, status=status.HTTP_201_CREATED)
 class PurchaseOrderItemViewSet(TenantAwareViewSet): queryset = PurchaseOrderItem.objects.all(); serializer_class = PurchaseOrderItemSerializer
 class AccountViewSet(TenantAwareViewSet): queryset = Account.objects.all(); serializer_class = AccountSerializer
 class CashRegisterViewSet(TenantAwareViewSet): queryset = CashRegister.objects.all(); serializer_class = CashRegisterSerializer
-class TransactionViewSet(TenantAwareViewSet): queryset = Transaction.objects.all(); serializer_class = TransactionSerializer
+class TransactionViewSet(ExportMixin, TenantAwareViewSet):
+    queryset = Transaction.objects.all()
+    serializer_class = TransactionSerializer
+    pagination_ordering = '-date'
+    export_fields = {
+        'id': 'id', 'date': 'date', 'account_code': 'account__code', 'account_name': 'account__name',
+        'amount': 'amount', 'description': 'description', 'related_sale_id': 'related_sale_id',
+        'related_purchase_id': 'related_purchase_id', 'cash_register_id': 'cash_register_id',
+    }
+    export_date_field = 'date'
+    export_ordering = ('date', 'id')
 class ClientViewSet(TenantAwareViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
+    list_prefetch = ('contacts',)
 
     @action(detail=True, methods=['get'], url_path='current-account-balance')
     def get_current_account_balance(self, request, pk=None):
@@ -634,65 +976,41 @@ class ClientViewSet(TenantAwareViewSet):
 
     @action(detail=True, methods=['get'], url_path='account-movements')
     def account_movements(self, request, pk=None):
-        from decimal import Decimal
+        """
+        Cuenta corriente del cliente (ver core.ledger). Admite start_date y
+        end_date (YYYY-MM-DD); el saldo de cada fila incluye los movimientos
+        anteriores al rango. Con page_size/cursor se pagina por cursor.
+        """
         client = self.get_object()
         tenant = self.get_tenant()
+        try:
+            start_date = parse_date(request.query_params.get('start_date', ''))
+            end_date = parse_date(request.query_params.get('end_date', ''))
+        except ValueError:
+            return Response({'error': 'Date format should be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Obtener todas las ventas del cliente (movimientos DEBE)
-        sales = Sale.objects.filter(client=client, tenant=tenant)
-
-        # Obtener todos los pagos del cliente (movimientos HABER)
-        payments = Transaction.objects.filter(
-            related_sale__client=client,
-            tenant=tenant,
-            amount__gt=0
-        )
-
-        # Crear lista de movimientos
-        movements = []
-        
-        # Agregar ventas como DEBE (negativo)
-        for sale in sales:
-            movements.append({
-                'id': f"V-{sale.id}",
-                'type': 'Venta',
-                'detail': f"Venta #{sale.id}",
-                'amount': -float(sale.total_amount),
-                'date': sale.sale_date.date() if hasattr(sale.sale_date, 'date') else sale.sale_date,
-                'user': sale.user.email if sale.user else 'N/A'
-            })
-        
-        # Agregar pagos como HABER (positivo)
-        for payment in payments:
-            movements.append({
-                'id': f"P-{payment.id}",
-                'type': 'Pago',
-                'detail': payment.description or 'Pago',
-                'amount': float(payment.amount),
-                'date': payment.date,
-                'user': 'N/A'
-            })
-
-        # Ordenar por fecha
-        movements.sort(key=lambda x: x['date'])
-
-        # Calcular balance acumulado
-        balance = Decimal('0.00')
-        movements_with_balance = []
-        
-        for movement in movements:
-            balance += Decimal(str(movement['amount']))
-            movements_with_balance.append({
-                'id': movement['id'],
-                'type': movement['type'],
-                'detail': movement['detail'],
-                'amount': movement['amount'],
-                'balance': float(balance),
-                'date': movement['date'].strftime('%Y-%m-%d') if hasattr(movement['date'], 'strftime') else str(movement['date']),
-                'user': movement['user']
-            })
-
-        return Response(movements_with_balance)
+        def fetch_rows(after, limit):
+            return client_ledger(tenant.id, client.id, start_date, end_date, after=after, limit=limit)
+
+        def serialize(rows):
+            return [
+                {
+                    'id': f"V-{row['ref_id']}" if row['kind'] == SALE else f"P-{row['ref_id']}",
+                    'type': 'Venta' if row['kind'] == SALE else 'Pago',
+                    'detail': f"Venta #{row['ref_id']}" if row['kind'] == SALE else (row['detail'] or 'Pago'),
+                    'amount': float(row['amount']),
+                    'balance': float(row['balance']),
+                    'date': row['date'].strftime('%Y-%m-%d'),
+                    'user': row['user_email'] or 'N/A',
+                }
+                for row in rows
+            ]
+
+        paginator = self.paginator
+        page = paginator.paginate_rows(request, fetch_rows, ledger_cursor_key, parse_ledger_cursor)
+        if page is None:
+            return Response(serialize(fetch_rows(None, None)))
+        return paginator.get_paginated_response(serialize(page))
 
     @action(detail=True, methods=['post'], url_path='register-payment')
     def register_payment(self, request, pk=None):
@@ -826,33 +1144,28 @@ class ClientViewSet(TenantAwareViewSet):
 
     @action(detail=True, methods=['get'], url_path='pending-sales')
     def pending_sales(self, request, pk=None):
-        from decimal import Decimal
         client = self.get_object()
         tenant = self.get_tenant()
-        
-        sales = Sale.objects.filter(client=client, tenant=tenant).order_by('-sale_date')
-        
-        sales_with_balance = []
-        for sale in sales:
-            total_pagado = Transaction.objects.filter(
-                related_sale=sale,
-                tenant=tenant,
-                amount__gt=0
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            
-            saldo_pendiente = sale.total_amount - total_pagado
-            
-            if saldo_pendiente > 0:
-                sales_with_balance.append({
-                    'id': sale.id,
-                    'sale_date': sale.sale_date.strftime('%Y-%m-%d'),
-                    'total_amount': float(sale.total_amount),
-                    'paid_amount': float(total_pagado),
-                    'pending_balance': float(saldo_pendiente),
-                    'description': f"Venta #{sale.id} - {sale.sale_date.strftime('%d/%m/%Y')}"
-                })
-        
-        return Response(sales_with_balance)
+
+        sales = (
+            Sale.objects.filter(client=client, tenant=tenant)
+            .annotate(paid_amount=sale_paid_amount())
+            .annotate(pending_balance=F('total_amount') - F('paid_amount'))
+            .filter(pending_balance__gt=0)
+            .order_by('-sale_date')
+        )
+
+        return Response([
+            {
+                'id': sale.id,
+                'sale_date': sale.sale_date.strftime('%Y-%m-%d'),
+                'total_amount': float(sale.total_amount),
+                'paid_amount': float(sale.paid_amount),
+                'pending_balance': float(sale.pending_balance),
+                'description': f"Venta #{sale.id} - {sale.sale_date.strftime('%d/%m/%Y')}"
+            }
+            for sale in sales
+        ])
 
 class ContactViewSet(TenantAwareViewSet):
     queryset = Contact.objects.all()
@@ -869,27 +1182,142 @@ class PaymentViewSet(TenantAwareViewSet):
         if purchase_order_id:
             queryset = queryset.filter(purchase_order_id=purchase_order_id)
         return queryset
-class BankStatementViewSet(TenantAwareViewSet): queryset = BankStatement.objects.all(); serializer_class = BankStatementSerializer
+class BankStatementViewSet(TenantAwareViewSet):
+    # El archivo se lee en la cola de trabajos (tarea 'bank_statements.ingest');
+    # la respuesta trae el id del Job y el frontend consulta status / progress.
+    queryset = BankStatement.objects.all()
+    serializer_class = BankStatementSerializer
+
+    def enqueue_ingestion(self, statement):
+        return jobs.enqueue('bank_statements.ingest', statement.tenant_id, statement_id=statement.pk)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.job = self.enqueue_ingestion(serializer.instance)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['job'] = self.job.pk
+        return response
+
+    @action(detail=True, methods=['post'])
+    def reprocess(self, request, pk=None):
+        statement = self.get_object()
+        # Si ningún trabajo lo tiene en curso, un extracto 'Procesando' quedó
+        # colgado (el worker murió y se agotaron los intentos) y se puede reprocesar.
+        running = Job.objects.filter(
+            name='bank_statements.ingest', payload__statement_id=statement.pk, status__in=('Pendiente', 'Procesando')
+        )
+        if statement.status == 'Procesando' and running.exists():
+            return Response({'error': 'El extracto se está procesando.'}, status=status.HTTP_409_CONFLICT)
+        statement.status = 'Pendiente'
+        statement.progress = 0
+        statement.error_message = ''
+        statement.save(update_fields=['status', 'progress', 'error_message'])
+        job = self.enqueue_ingestion(statement)
+        return Response({**self.get_serializer(statement).data, 'job': job.pk}, status=status.HTTP_202_ACCEPTED)
+
+class JobViewSet(TenantAwareViewSet):
+    """Estado de los trabajos en segundo plano (ver core.jobs); sólo lectura."""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    http_method_names = ['get', 'head', 'options']
+
 class BankTransactionViewSet(TenantAwareViewSet): queryset = BankTransaction.objects.all(); serializer_class = BankTransactionSerializer
+
+class BankReconciliationViewSet(TenantAwareViewSet):
+    """
+    Conciliaciones bancarias (ver core.reconciliation). POST crea una
+    conciliación manual; DELETE la deshace. No se editan: se borran y se
+    vuelven a crear.
+    """
+    queryset = BankReconciliation.objects.all()
+    serializer_class = BankReconciliationSerializer
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+    def perform_create(self, serializer):
+        tenant = self.get_tenant()
+        if serializer.validated_data['bank_transaction'].tenant_id != tenant.id:
+            raise serializers.ValidationError({'bank_transaction': 'La línea del extracto no pertenece a la empresa.'})
+        serializer.save(tenant=tenant, is_manual=True, score=1)
+
+    def get_date_range(self, params):
+        start_date = parse_date(params.get('start_date', ''))
+        end_date = parse_date(params.get('end_date', ''))
+        return start_date, end_date
+
+    @action(detail=False, methods=['post'])
+    def run(self, request):
+        """Concilia automáticamente un extracto (`bank_statement`) o un rango de fechas."""
+        tenant = self.get_tenant()
+        try:
+            start_date, end_date = self.get_date_range(request.data)
+        except ValueError:
+            return Response({'error': 'Date format should be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        statement_id = request.data.get('bank_statement')
+        if statement_id and not BankStatement.objects.filter(pk=statement_id, tenant=tenant).exists():
+            return Response({'error': 'Extracto inexistente.'}, status=status.HTTP_404_NOT_FOUND)
+        summary = reconciliation.reconcile(tenant.id, statement_id=statement_id, start_date=start_date, end_date=end_date)
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def unmatched(self, request):
+        """Líneas de extracto y movimientos internos sin conciliar (start_date / end_date)."""
+        tenant = self.get_tenant()
+        try:
+            start_date, end_date = self.get_date_range(request.query_params)
+        except ValueError:
+            return Response({'error': 'Date format should be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        pending = reconciliation.unmatched(tenant.id, start_date, end_date)
+        return Response({
+            'bank_transactions': BankTransactionSerializer(pending['bank_transactions'], many=True).data,
+            'transactions': TransactionSerializer(pending['transactions'], many=True).data,
+            'payments': PaymentSerializer(pending['payments'], many=True).data,
+            'checks': CheckSerializer(pending['checks'], many=True).data,
+        })
 class BankViewSet(TenantAwareViewSet): queryset = Bank.objects.all(); serializer_class = BankSerializer
-class PaymentMethodTypeViewSet(TenantAwareViewSet): queryset = PaymentMethodType.objects.all(); serializer_class = PaymentMethodTypeSerializer
-class FinancialCostRuleViewSet(TenantAwareViewSet): queryset = FinancialCostRule.objects.all(); serializer_class = FinancialCostRuleSerializer
+class PaymentMethodTypeViewSet(CachedResponseMixin, TenantAwareViewSet): queryset = PaymentMethodType.objects.all(); serializer_class = PaymentMethodTypeSerializer; cache_scope = 'payment-method-types'
+class FinancialCostRuleViewSet(CachedResponseMixin, TenantAwareViewSet):
+    queryset = FinancialCostRule.objects.all()
+    serializer_class = FinancialCostRuleSerializer
+    cache_scope = 'financial-cost-rules'
+    list_select_related = ('payment_method', 'bank')
+
 class FactoryViewSet(TenantAwareViewSet): queryset = Factory.objects.all(); serializer_class = FactorySerializer
 class EmployeeRoleViewSet(TenantAwareViewSet): queryset = EmployeeRole.objects.all(); serializer_class = EmployeeRoleSerializer
-class EmployeeViewSet(TenantAwareViewSet): queryset = Employee.objects.all(); serializer_class = EmployeeSerializer
-class SalaryViewSet(TenantAwareViewSet): queryset = Salary.objects.all(); serializer_class = SalarySerializer
-class VacationViewSet(TenantAwareViewSet): queryset = Vacation.objects.all(); serializer_class = VacationSerializer
+class EmployeeViewSet(TenantAwareViewSet):
+    queryset = Employee.objects.all()
+    serializer_class = EmployeeSerializer
+    list_select_related = ('user', 'factory', 'role')
+
+class SalaryViewSet(TenantAwareViewSet):
+    queryset = Salary.objects.all()
+    serializer_class = SalarySerializer
+    list_select_related = ('employee',)
+
+class VacationViewSet(TenantAwareViewSet):
+    queryset = Vacation.objects.all()
+    serializer_class = VacationSerializer
+    list_select_related = ('employee',)
+
 class PermitViewSet(TenantAwareViewSet): queryset = Permit.objects.all(); serializer_class = PermitSerializer
-class MedicalRecordViewSet(TenantAwareViewSet): queryset = MedicalRecord.objects.all(); serializer_class = MedicalRecordSerializer
+
+class MedicalRecordViewSet(TenantAwareViewSet):
+    queryset = MedicalRecord.objects.all()
+    serializer_class = MedicalRecordSerializer
+    list_select_related = ('employee',)
 
 class PedidoMaterialViewSet(TenantAwareViewSet):
     queryset = PedidoMaterial.objects.all()
     serializer_class = PedidoMaterialSerializer
+    list_select_related = ('user',)
 
 class CheckViewSet(TenantAwareViewSet): queryset = Check.objects.all(); serializer_class = CheckSerializer
-class QuotationViewSet(TenantAwareViewSet):
+class QuotationViewSet(BulkCreateMixin, TenantAwareViewSet):
     queryset = Quotation.objects.all()
     serializer_class = QuotationSerializer
+    list_select_related = ('client', 'user')
+    list_prefetch = ('items__product', 'client__contacts', 'user__roles')
 
     def perform_create(self, serializer):
         serializer.save(tenant=self.get_tenant(), user=self.request.user)
@@ -952,10 +1380,15 @@ class QuotationViewSet(TenantAwareViewSet):
         quotation.save()
 
         return Response(SaleSerializer(sale, context={'request': request}).data, status=status.HTTP_201_CREATED)
-class QuotationItemViewSet(TenantAwareViewSet): queryset = QuotationItem.objects.all(); serializer_class = QuotationItemSerializer
+class QuotationItemViewSet(TenantAwareViewSet):
+    queryset = QuotationItem.objects.all()
+    serializer_class = QuotationItemSerializer
+    list_select_related = ('product',)
+
 class StockAdjustmentViewSet(TenantAwareViewSet):
     queryset = StockAdjustment.objects.all()
     serializer_class = StockAdjustmentSerializer
+    list_select_related = ('user',)
 
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -990,11 +1423,14 @@ class StockAdjustmentViewSet(TenantAwareViewSet):
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
-class DeliveryNoteViewSet(TenantAwareViewSet):
+class DeliveryNoteViewSet(BulkCreateMixin, TenantAwareViewSet):
     queryset = DeliveryNote.objects.all()
     serializer_class = DeliveryNoteSerializer
+    list_select_related = ('cliente', 'origen', 'destino', 'venta_asociada')
+    list_prefetch = ('items__product__size', 'items__product__colors', 'cliente__contacts')
 
     def perform_create(self, serializer):
+            tenant = self.get_tenant()
             origen_warehouse = serializer.validated_data.get('origen')
             if not origen_warehouse:
                 raise serializers.ValidationError({"origen": "Se requiere un almacén de origen."})
@@ -1010,11 +1446,11 @@ class DeliveryNoteViewSet(TenantAwareViewSet):
                 quantity_to_deduct = item_data['quantity']
 
                 # NUEVA VALIDACIÓN: Verificar que no se exceda la cantidad vendida
-                sold_quantity = SaleItem.objects.filter(sale=sale, product=product, tenant=self.get_tenant()).aggregate(total=Sum('quantity'))['total'] or 0
+                sold_quantity = SaleItem.objects.filter(sale=sale, product=product, tenant=tenant).aggregate(total=Sum('quantity'))['total'] or 0
                 if sold_quantity == 0:
                     raise serializers.ValidationError(f"El producto '{product.name}' no está en la venta.")
                 
-                delivered_quantity = DeliveryNoteItem.objects.filter(delivery_note__venta_asociada=sale, product=product, delivery_note__tenant=self.get_tenant()).aggregate(total=Sum('quantity'))['total'] or 0
+                delivered_quantity = DeliveryNoteItem.objects.filter(delivery_note__venta_asociada=sale, product=product, delivery_note__tenant=tenant).aggregate(total=Sum('quantity'))['total'] or 0
                 remaining_quantity = sold_quantity - delivered_quantity
                 if quantity_to_deduct > remaining_quantity:
                     raise serializers.ValidationError(f"Producto '{product.name}': Cantidad a entregar ({quantity_to_deduct}) excede lo pendiente ({remaining_quantity}). Vendido: {sold_quantity}, Ya entregado: {delivered_quantity}")
@@ -1024,7 +1460,7 @@ class DeliveryNoteViewSet(TenantAwareViewSet):
                     inventory_item = Inventory.objects.get(
                         product=product,
                         warehouse=origen_warehouse,
-                        tenant=self.get_tenant()
+                        tenant=tenant
                     )
                     if inventory_item.quantity < quantity_to_deduct:
                         raise serializers.ValidationError(f"Stock insuficiente para el producto {product.name} en el almacén de origen. Requerido: {quantity_to_deduct}, Disponible: {inventory_item.quantity}.")
@@ -1032,12 +1468,12 @@ class DeliveryNoteViewSet(TenantAwareViewSet):
                     raise serializers.ValidationError(f"No hay registro de inventario para el producto {product.name} en el almacén de origen.")
 
             # If all validations pass, proceed to create the delivery note and deduct stock.
-            delivery_note = serializer.save(tenant=self.get_tenant())
+            delivery_note = serializer.save(tenant=tenant)
             for item in delivery_note.items.all():
                 inventory_item = Inventory.objects.get(
                     product=item.product,
                     warehouse=origen_warehouse, # Deduct from the origin warehouse
-                    tenant=self.get_tenant()
+                    tenant=tenant
                 )
                 inventory_item.quantity -= item.quantity
                 inventory_item.save()
@@ -1064,132 +1500,247 @@ class TenantViewSet(viewsets.ModelViewSet):
 
 class UserViewSet(TenantAwareViewSet):
     queryset = User.objects.all()
+    list_prefetch = ('roles',)
     def get_serializer_class(self):
         if self.action == 'create': return UserCreateSerializer
         return UserSerializer
 
 # Dashboard API Views
-class ProductionVolumeView(APIView):
+DASHBOARD_BUCKETS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+class DashboardView(APIView):
+    """
+    Base de los dashboards: exige X-Tenant-ID y acepta start_date/end_date
+    (YYYY-MM-DD) y bucket=day|week|month. Sin bucket cada vista devuelve el
+    total del rango con su formato de siempre; con bucket, una serie con una
+    fila por 'period' calculada con Trunc* en una consulta por métrica.
+    Cada vista tiene que definir get_data(); se controla al definir la clase.
+    """
     permission_classes = [IsAuthenticated]
-    def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        data = ProductionOrder.objects.filter(tenant_id=tenant_id).values('items__product__design__name', 'op_type').annotate(total_quantity=Sum('items__quantity')).order_by('items__product__design__name', 'op_type')
-        return Response(data, status=status.HTTP_200_OK)
 
-class ProcessCompletionRateView(APIView):
-    permission_classes = [IsAuthenticated]
-    def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        process_logs = ProductionProcessLog.objects.filter(tenant_id=tenant_id)
-        process_data = process_logs.values('process__name').annotate(total_processed=Sum('quantity_processed'), total_completed=Sum(F('quantity_processed'), filter=models.Q(production_order__status='Completada'))).order_by('process__name')
-        results = []
-        for data in process_data:
-            total_processed = data['total_processed'] or 0
-            total_completed = data['total_completed'] or 0
-            completion_rate = (total_completed / total_processed) * 100 if total_processed > 0 else 0
-            results.append({'process_name': data['process__name'], 'completion_rate': round(completion_rate, 2)})
-        return Response(results, status=status.HTTP_200_OK)
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, 'get_data', None)):
+            raise TypeError(f'{cls.__name__} hereda de DashboardView y tiene que definir get_data().')
 
-class RawMaterialConsumptionView(APIView):
-    permission_classes = [IsAuthenticated]
     def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        data = ProductionProcessLog.objects.filter(tenant_id=tenant_id).values('raw_materials_consumed__name').annotate(total_consumed=Sum('quantity_processed')).order_by('raw_materials_consumed__name')
-        return Response(data, status=status.HTTP_200_OK)
-
-class DefectiveProductsRateView(APIView):
-    permission_classes = [IsAuthenticated]
-    def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        defective_data = ProductionProcessLog.objects.filter(tenant_id=tenant_id).aggregate(total_defective=Sum('quantity_defective'), total_processed=Sum('quantity_processed'))
-        total_defective = defective_data.get('total_defective') or 0
-        total_processed = defective_data.get('total_processed') or 0
-        defective_rate = (total_defective / total_processed) * 100 if total_processed > 0 else 0
-        return Response({'defective_rate': round(defective_rate, 2)}, status=status.HTTP_200_OK)
-
-class SalesVolumeView(APIView):
-    permission_classes = [IsAuthenticated]
-    def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        data = Sale.objects.filter(tenant_id=tenant_id).values('local__name', 'is_ecommerce_sale', 'ecommerce_platform').annotate(total_sales=Sum('total_amount')).order_by('local__name', 'is_ecommerce_sale', 'ecommerce_platform')
+        self.tenant = request.tenant
+        if not self.tenant: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            self.start_date = self.parse_date_param(request, 'start_date')
+            self.end_date = self.parse_date_param(request, 'end_date')
+        except ValueError:
+            return Response({'error': 'Date format should be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        self.bucket = request.query_params.get('bucket')
+        if self.bucket and self.bucket not in DASHBOARD_BUCKETS:
+            return Response({'error': 'bucket must be day, week or month.'}, status=status.HTTP_400_BAD_REQUEST)
+        data = response_cache.cached_data(request, self.tenant.id, 'dashboards', lambda: self.materialize(self.get_data()))
         return Response(data, status=status.HTTP_200_OK)
 
-class InventoryTurnoverRateView(APIView):
-    permission_classes = [IsAuthenticated]
-    def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        total_sales_quantity = Sale.objects.filter(tenant_id=tenant_id).aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-        average_inventory_quantity = Inventory.objects.filter(tenant_id=tenant_id).aggregate(Avg('quantity'))['quantity__avg'] or 0
-        inventory_turnover_rate = (total_sales_quantity / average_inventory_quantity) if average_inventory_quantity > 0 else 0
-        return Response({'inventory_turnover_rate': round(inventory_turnover_rate, 2)}, status=status.HTTP_200_OK)
-
-class SupplierPerformanceView(APIView):
-    permission_classes = [IsAuthenticated]
-    def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        total_purchase_orders = PurchaseOrder.objects.filter(tenant_id=tenant_id).count()
-        on_time_deliveries = PurchaseOrder.objects.filter(tenant_id=tenant_id, status='Recibida', order_date__lte=F('expected_delivery_date')).count()
-        on_time_rate = (on_time_deliveries / total_purchase_orders) * 100 if total_purchase_orders > 0 else 0
-        return Response({'on_time_delivery_rate': round(on_time_rate, 2)}, status=status.HTTP_200_OK)
-
-class OverallProfitLossView(APIView):
-    permission_classes = [IsAuthenticated]
-    def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        total_revenue = Transaction.objects.filter(tenant_id=tenant_id, account__account_type='Ingreso').aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = Transaction.objects.filter(tenant_id=tenant_id, account__account_type='Egreso').aggregate(total=Sum('amount'))['total'] or 0
+    @staticmethod
+    def materialize(data):
+        return list(data) if isinstance(data, models.QuerySet) else data
+
+    @staticmethod
+    def parse_date_param(request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError(value)
+        return parsed
+
+    def in_range(self, queryset, field, end_only=False):
+        """Filtra por rango sobre `field`; en DateTimeField usa límites de datetime para aprovechar el índice."""
+        is_datetime = isinstance(queryset.model._meta.get_field(field), models.DateTimeField)
+        if self.start_date and not end_only:
+            start = self.start_date
+            if is_datetime:
+                start = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+            queryset = queryset.filter(**{f'{field}__gte': start})
+        if self.end_date:
+            if is_datetime:
+                end = timezone.make_aware(datetime.datetime.combine(self.end_date + datetime.timedelta(days=1), datetime.time.min))
+                queryset = queryset.filter(**{f'{field}__lt': end})
+            else:
+                queryset = queryset.filter(**{f'{field}__lte': self.end_date})
+        return queryset
 
-        profit_loss = total_revenue - total_expenses
-        return Response({'overall_profit_loss': round(profit_loss, 2)}, status=status.HTTP_200_OK)
+    def series(self, queryset, field, group_by=(), **metrics):
+        period = DASHBOARD_BUCKETS[self.bucket](field, output_field=models.DateField())
+        return list(
+            queryset.annotate(period=period).values('period', *group_by).annotate(**metrics).order_by('period', *group_by)
+        )
 
-class CurrentBalanceView(APIView):
-    permission_classes = [IsAuthenticated]
-    def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        account_balances = Transaction.objects.filter(tenant_id=tenant_id).values('account__name', 'account__account_type').annotate(
-            balance=Sum('amount')
-        ).order_by('account__name')
+    def period_of(self, day):
+        if self.bucket == 'week': return day - datetime.timedelta(days=day.weekday())
+        if self.bucket == 'month': return day.replace(day=1)
+        return day
 
-        cash_register_balances = Transaction.objects.filter(tenant_id=tenant_id, cash_register__isnull=False).values('cash_register__name').annotate(
-            balance=Sum('amount')
-        ).order_by('cash_register__name')
+    @staticmethod
+    def rate(part, total):
+        return round((part or 0) / total * 100, 2) if total else 0
 
-        results = {'account_balances': list(account_balances), 'cash_register_balances': list(cash_register_balances)}
-        return Response(results, status=status.HTTP_200_OK)
+class ProductionVolumeView(DashboardView):
+    def get_data(self):
+        rows = self.in_range(DailyProductionRollup.objects.filter(tenant=self.tenant), 'date')
+        if self.bucket:
+            rows = self.series(rows, 'date', ('design__name', 'op_type'), total_quantity=Sum('quantity'))
+        else:
+            rows = rows.values('design__name', 'op_type').annotate(total_quantity=Sum('quantity')).order_by('design__name', 'op_type')
+        data = []
+        for row in rows:
+            item = {'items__product__design__name': row['design__name'], 'op_type': row['op_type'], 'total_quantity': row['total_quantity']}
+            if self.bucket: item = {'period': row['period'], **item}
+            data.append(item)
+        return data
+
+class ProcessCompletionRateView(DashboardView):
+    def get_data(self):
+        process_logs = self.in_range(ProductionProcessLog.objects.filter(tenant=self.tenant), 'start_time')
+        metrics = {'total_processed': Sum('quantity_processed'), 'total_completed': Sum(F('quantity_processed'), filter=models.Q(production_order__status='Completada'))}
+        if self.bucket:
+            process_data = self.series(process_logs, 'start_time', ('process__name',), **metrics)
+        else:
+            process_data = process_logs.values('process__name').annotate(**metrics).order_by('process__name')
+        results = []
+        for data in process_data:
+            row = {'process_name': data['process__name'], 'completion_rate': self.rate(data['total_completed'], data['total_processed'] or 0)}
+            if self.bucket: row = {'period': data['period'], **row}
+            results.append(row)
+        return results
+
+class RawMaterialConsumptionView(DashboardView):
+    def get_data(self):
+        process_logs = self.in_range(ProductionProcessLog.objects.filter(tenant=self.tenant), 'start_time')
+        if self.bucket:
+            return self.series(process_logs, 'start_time', ('raw_materials_consumed__name',), total_consumed=Sum('quantity_processed'))
+        return process_logs.values('raw_materials_consumed__name').annotate(total_consumed=Sum('quantity_processed')).order_by('raw_materials_consumed__name')
+
+class DefectiveProductsRateView(DashboardView):
+    def get_data(self):
+        rollups = self.in_range(DailyProcessRollup.objects.filter(tenant=self.tenant), 'date')
+        metrics = {'total_defective': Sum('quantity_defective'), 'total_processed': Sum('quantity_processed')}
+        if self.bucket:
+            return [
+                {'period': row['period'], 'defective_rate': self.rate(row['total_defective'], row['total_processed'] or 0)}
+                for row in self.series(rollups, 'date', **metrics)
+            ]
+        defective_data = rollups.aggregate(**metrics)
+        return {'defective_rate': self.rate(defective_data['total_defective'], defective_data['total_processed'] or 0)}
+
+class SalesVolumeView(DashboardView):
+    def get_data(self):
+        rollups = self.in_range(DailySalesRollup.objects.filter(tenant=self.tenant), 'date')
+        group_by = ('local__name', 'is_ecommerce_sale', 'ecommerce_platform')
+        if self.bucket:
+            return self.series(rollups, 'date', group_by, total_sales=Sum('total_amount'))
+        return rollups.values(*group_by).annotate(total_sales=Sum('total_amount')).order_by(*group_by)
+
+class InventoryTurnoverRateView(DashboardView):
+    def get_data(self):
+        rollups = self.in_range(DailySalesRollup.objects.filter(tenant=self.tenant), 'date')
+        average_inventory_quantity = Inventory.objects.filter(tenant=self.tenant).aggregate(Avg('quantity'))['quantity__avg'] or 0
+        def turnover(total_sales):
+            return round((total_sales or 0) / average_inventory_quantity, 2) if average_inventory_quantity > 0 else 0
+        if self.bucket:
+            return [
+                {'period': row['period'], 'inventory_turnover_rate': turnover(row['total_sales'])}
+                for row in self.series(rollups, 'date', total_sales=Sum('total_amount'))
+            ]
+        return {'inventory_turnover_rate': turnover(rollups.aggregate(Sum('total_amount'))['total_amount__sum'])}
+
+class SupplierPerformanceView(DashboardView):
+    def get_data(self):
+        purchase_orders = self.in_range(PurchaseOrder.objects.filter(tenant=self.tenant).exclude(status=purchase_suggestions.DRAFT), 'order_date')
+        metrics = {'total': Count('id'), 'on_time': Count('id', filter=models.Q(status=PurchaseOrder.RECEIVED, order_date__lte=F('expected_delivery_date')))}
+        if self.bucket:
+            return [
+                {'period': row['period'], 'on_time_delivery_rate': self.rate(row['on_time'], row['total'])}
+                for row in self.series(purchase_orders, 'order_date', **metrics)
+            ]
+        totals = purchase_orders.aggregate(**metrics)
+        return {'on_time_delivery_rate': self.rate(totals['on_time'], totals['total'])}
+
+class OverallProfitLossView(DashboardView):
+    def get_data(self):
+        rollups = self.in_range(DailyTransactionRollup.objects.filter(tenant=self.tenant), 'date')
+        metrics = {
+            'total_revenue': Sum('amount', filter=models.Q(account__account_type='Ingreso')),
+            'total_expenses': Sum('amount', filter=models.Q(account__account_type='Egreso')),
+        }
+        if self.bucket:
+            return [
+                {'period': row['period'], 'overall_profit_loss': round((row['total_revenue'] or 0) - (row['total_expenses'] or 0), 2)}
+                for row in self.series(rollups, 'date', **metrics)
+            ]
+        totals = rollups.aggregate(**metrics)
+        profit_loss = (totals['total_revenue'] or 0) - (totals['total_expenses'] or 0)
+        return {'overall_profit_loss': round(profit_loss, 2)}
+
+class CurrentBalanceView(DashboardView):
+    """
+    Saldos a end_date (por defecto, hoy). Con bucket devuelve el saldo al cierre
+    de cada período con movimientos; start_date sólo recorta la serie, el saldo
+    arrastra toda la historia anterior.
+    """
+    def get_data(self):
+        rollups = self.in_range(DailyTransactionRollup.objects.filter(tenant=self.tenant), 'date', end_only=True)
+        accounts = ('account__name', 'account__account_type')
+        cash_registers = rollups.filter(cash_register__isnull=False)
+        if not self.bucket:
+            account_balances = rollups.values(*accounts).annotate(balance=Sum('amount')).order_by('account__name')
+            cash_register_balances = cash_registers.values('cash_register__name').annotate(balance=Sum('amount')).order_by('cash_register__name')
+            return {'account_balances': list(account_balances), 'cash_register_balances': list(cash_register_balances)}
+        return {
+            'account_balances': self.running_balances(self.series(rollups, 'date', accounts, movement=Sum('amount')), accounts),
+            'cash_register_balances': self.running_balances(self.series(cash_registers, 'date', ('cash_register__name',), movement=Sum('amount')), ('cash_register__name',)),
+        }
 
-class RevenueExpensesView(APIView):
-    permission_classes = [IsAuthenticated]
-    def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
-        total_revenue = Sale.objects.filter(tenant_id=tenant_id).aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-        total_purchase_expenses = PurchaseOrderItem.objects.filter(purchase_order__tenant_id=tenant_id).aggregate(total_sum=Sum(F('quantity') * F('unit_price')))['total_sum'] or 0
-        total_salary_expenses = Salary.objects.filter(tenant_id=tenant_id).aggregate(Sum('amount'))['amount__sum'] or 0
+    def running_balances(self, rows, keys):
+        balances, results = {}, []
+        for row in rows:
+            key = tuple(row[k] for k in keys)
+            balances[key] = balances.get(key, 0) + row.pop('movement')
+            if self.start_date and row['period'] < self.period_of(self.start_date):
+                continue
+            results.append({**row, 'balance': balances[key]})
+        return results
+
+class RevenueExpensesView(DashboardView):
+    def get_data(self):
+        sales = self.in_range(DailySalesRollup.objects.filter(tenant=self.tenant), 'date')
+        expenses = self.in_range(DailyExpenseRollup.objects.filter(tenant=self.tenant), 'date')
+        expense_metrics = {
+            'purchases': Sum('amount', filter=models.Q(source='Compras')),
+            'salaries': Sum('amount', filter=models.Q(source='Sueldos')),
+        }
+        if self.bucket:
+            periods = {}
+            for row in self.series(sales, 'date', total_revenue=Sum('total_amount')):
+                periods.setdefault(row['period'], {'total_revenue': 0, 'total_expenses': 0})['total_revenue'] = round(row['total_revenue'] or 0, 2)
+            for row in self.series(expenses, 'date', **expense_metrics):
+                periods.setdefault(row['period'], {'total_revenue': 0, 'total_expenses': 0})['total_expenses'] = round((row['purchases'] or 0) + (row['salaries'] or 0), 2)
+            return [{'period': period, **values} for period, values in sorted(periods.items())]
+        total_revenue = sales.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
+        totals = expenses.aggregate(**expense_metrics)
+        total_purchase_expenses = totals['purchases'] or 0
+        total_salary_expenses = totals['salaries'] or 0
         other_expenses = 0
         total_expenses = total_purchase_expenses + total_salary_expenses + other_expenses
-        return Response({'total_revenue': round(total_revenue, 2), 'total_expenses': round(total_expenses, 2)}, status=status.HTTP_200_OK)
+        return {'total_revenue': round(total_revenue, 2), 'total_expenses': round(total_expenses, 2)}
 
 class ProjectedGrowthView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
+        tenant = request.tenant
         data_type = request.query_params.get('data_type')
         start_date_str = request.query_params.get('start_date')
         end_date_str = request.query_params.get('end_date')
         projection_start_date_str = request.query_params.get('projection_start_date')
         projection_end_date_str = request.query_params.get('projection_end_date')
-        if not all([tenant_id, data_type, start_date_str, end_date_str, projection_start_date_str, projection_end_date_str]):
+        if not all([tenant, data_type, start_date_str, end_date_str, projection_start_date_str, projection_end_date_str]):
             return Response({'error': 'All parameters are required.'}, status=status.HTTP_400_BAD_REQUEST)
         try:
             start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d').date()
@@ -1198,25 +1749,57 @@ class ProjectedGrowthView(APIView):
             projection_end_date = datetime.datetime.strptime(projection_end_date_str, '%Y-%m-%d').date()
         except ValueError:
             return Response({'error': 'Date format should be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
-        projected_data = []
-        current_date = projection_start_date
-        value = 100.0
-        while current_date <= projection_end_date:
-            projected_data.append({'date': current_date.isoformat(), 'value': round(value, 2)})
-            value *= 1.05
-            current_date += datetime.timedelta(days=30)
+        if data_type not in forecasting.METRICS:
+            return Response({'error': f'data_type must be one of {", ".join(forecasting.METRICS)}.'}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date or projection_start_date > projection_end_date:
+            return Response({'error': 'start dates must not be after end dates.'}, status=status.HTTP_400_BAD_REQUEST)
+        # Una fila por mes: {'date', 'value', 'lower', 'upper'} (banda del 95 %).
+        projected_data = forecasting.forecast(data_type, tenant.id, start_date, end_date, projection_start_date, projection_end_date)
         return Response(projected_data, status=status.HTTP_200_OK)
 
 class ProjectedDataView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, *args, **kwargs):
-        tenant_id = request.headers.get('X-Tenant-ID')
-        if not tenant_id: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        tenant = request.tenant
+        if not tenant: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
         data = [{'date': (datetime.date.today() + datetime.timedelta(days=i*30)).isoformat(), 'value': 100 + i*10} for i in range(12)]
         serializer = ProjectedDataSerializer(data=data, many=True)
         serializer.is_valid(raise_exception=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class ResponseCacheStatsView(APIView):
+    """Aciertos y fallos del cache de respuestas del tenant, por scope (ver core.response_cache)."""
+    permission_classes = [IsAuthenticated]
+    def get(self, request, *args, **kwargs):
+        tenant = request.tenant
+        if not tenant: return Response({'error': 'X-Tenant-ID header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(response_cache.stats(tenant.id), status=status.HTTP_200_OK)
+
+
+class QRCodeImageView(APIView):
+    """
+    PNG de un QR guardado con core.qr_labels.store_png. Sin autenticación, para
+    poder usarla en un <img>: el nombre es el SHA-256 del PNG y no se puede
+    enumerar. Como el contenido de un nombre no cambia, se cachea por un año.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, key):
+        etag = quote_etag(key)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            try:
+                image = default_storage.open(qr_labels.storage_name(key), 'rb')
+            except FileNotFoundError:
+                raise Http404
+            response = FileResponse(image, content_type='image/png')
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={qr_labels.IMAGE_MAX_AGE}, immutable'
+        return response
+
+
 class TenantTokenObtainPairView(TokenObtainPairView):
     serializer_class = TenantTokenObtainPairSerializer
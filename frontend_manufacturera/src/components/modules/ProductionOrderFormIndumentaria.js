@@ -65,7 +65,7 @@ const ProductionOrderFormIndumentaria = ({ open, onClose, onSave, order, creatio
             setLoading(true);
             try {
                 const colorsPromise = api.list('/colors/');
-                const productsPromise = api.list('/products/?is_manufactured=true');
+                const productsPromise = api.list('/products/?is_manufactured=true&expand=recipe');
                 const notesPromise = api.list('/order-notes/?status=Pendiente');
 
                 const [productsData, notesData, colorsData] = await Promise.all([
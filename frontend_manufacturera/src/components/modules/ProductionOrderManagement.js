@@ -58,7 +58,17 @@ const ProductionOrderManagement = () => {
         setProductTypeDialogOpen(true);
     };
 
-    const handleEditClick = (order) => {
+    const handleEditClick = async (listedOrder) => {
+        // El listado trae la nota de pedido resumida; los formularios necesitan
+        // la venta completa (ítems y datos del cliente), que viene en el detalle.
+        let order;
+        try {
+            order = await api.get('/production-orders/', listedOrder.id);
+        } catch (err) {
+            setError('Error al cargar la orden de producción.');
+            console.error(err);
+            return;
+        }
         const flow = order.order_note ? 'fromSale' : 'internal';
         setSelectedCreationFlow(flow);
         setSelectedOrder(order);
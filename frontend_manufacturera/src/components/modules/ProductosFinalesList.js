@@ -349,7 +349,7 @@ const ProductosFinalesList = () => {
     const fetchProducts = async () => {
         try {
             setLoading(true);
-            const data = await api.list('/products/');
+            const data = await api.list('/products/?expand=recipe');
             const productList = Array.isArray(data) ? data : data.results;
             setProducts(productList || []);
             setError(null);
@@ -53,6 +53,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.TenantMiddleware', # Resolves X-Tenant-ID into request.tenant
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -174,6 +175,31 @@ AUTH_USER_MODEL = 'core.User'
 
 AUTHENTICATION_BACKENDS = ['core.backends.TenantAwareModelBackend']
 
+# Seconds a resolved tenant stays in the per-process cache of TenantMiddleware
+TENANT_CACHE_TTL = int(os.environ.get('TENANT_CACHE_TTL', 300))
+
+# 'responses' backs core.response_cache. Point RESPONSE_CACHE_BACKEND at
+# FileBasedCache or a Redis backend to share it between processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': os.environ.get('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'fanaticos-responses'),
+        'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TTL', 300)),
+    },
+}
+
+# Cache shared by all workers that keeps the fitted projection models and their generations (core.forecasting)
+FORECAST_CACHE_ALIAS = os.environ.get('FORECAST_CACHE_ALIAS', 'responses')
+
+# Seconds a fitted projection model stays in the cache (core.forecasting)
+FORECAST_CACHE_TTL = int(os.environ.get('FORECAST_CACHE_TTL', 3600))
+
+# Processes used to render batches of QR labels (core.qr_labels); defaults to the CPU count
+QR_RENDER_PROCESSES = int(os.environ.get('QR_RENDER_PROCESSES', 0)) or None
+
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = [